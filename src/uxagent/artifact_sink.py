@@ -0,0 +1,133 @@
+import gzip
+import os
+import queue
+import threading
+from typing import Callable, Optional, Union
+
+try:
+    import zstandard  # 선택 의존성: compression="zstd"에서만 필요
+except ImportError:
+    zstandard = None
+
+# observe()가 남기는 산출물 종류
+#   - "summary": {prefix}_summary.txt (LLM에 넘긴 요약본)
+#   - "raw":     {prefix}_raw.html (page.content() 원본)
+#   - "clean":   {prefix}_clean.html (노이즈 제거 후 prettify)
+ARTIFACT_LEVELS = {
+    "none": (),
+    "summary": ("summary",),
+    "full": ("summary", "raw", "clean"),
+}
+
+# 값 자체 또는 값을 만드는 함수 (prettify 같은 비싼 작업은 writer 쪽에서 늦게 실행)
+Content = Union[str, Callable[[], str]]
+
+
+class ArtifactSink:
+    """
+    observe() 산출물 저장소의 기본 클래스입니다.
+    level에 포함되지 않는 종류는 wants()가 False를 돌려주므로, 호출 측은 만들 필요조차 없습니다.
+    """
+
+    def __init__(self, level: str = "full"):
+        if level not in ARTIFACT_LEVELS:
+            raise ValueError(f"지원하지 않는 artifact level입니다: {level} (가능: {tuple(ARTIFACT_LEVELS)})")
+        self.level = level
+        self._kinds = ARTIFACT_LEVELS[level]
+
+    def wants(self, kind: str) -> bool:
+        return kind in self._kinds
+
+    def write(self, kind: str, name: str, content: Content) -> str:
+        """산출물을 저장(또는 저장 예약)하고 저장될 경로를 돌려줍니다. 원하지 않는 종류면 ""."""
+        if not self.wants(kind):
+            return ""
+        return self._write(name, content)
+
+    def _write(self, name: str, content: Content) -> str:
+        return ""
+
+    def close(self) -> None:
+        pass
+
+
+class FileArtifactSink(ArtifactSink):
+    """기존 동작: 호출한 스레드에서 바로 압축 없이 파일로 씁니다."""
+
+    def __init__(self, directory: str = ".", level: str = "full"):
+        super().__init__(level)
+        self.directory = directory
+
+    def _write(self, name: str, content: Content) -> str:
+        path = os.path.join(self.directory, name)
+        text = content() if callable(content) else content
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+
+class BackgroundArtifactSink(ArtifactSink):
+    """
+    실행(run)별 디렉터리에 산출물을 압축해서 쓰는 백그라운드 writer 스레드입니다.
+    observe()는 큐에 넣기만 하고 바로 돌아가므로, 디스크 I/O와 prettify 비용이 관찰 시간에서 빠집니다.
+    close()를 호출하면 큐에 남은 작업을 모두 쓴 뒤 스레드를 종료합니다.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        run_dir: str,
+        level: str = "summary",
+        compression: Optional[str] = "gzip",
+        max_pending: int = 64
+    ):
+        super().__init__(level)
+        if compression not in (None, "gzip", "zstd"):
+            raise ValueError(f"지원하지 않는 압축 방식입니다: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd 압축에는 'zstandard' 패키지가 필요합니다. (pip install zstandard)")
+
+        self.run_dir = run_dir
+        self.compression = compression
+        os.makedirs(run_dir, exist_ok=True)
+
+        self._queue: "queue.Queue[object]" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._drain, name="artifact-writer", daemon=True)
+        self._thread.start()
+
+    def _suffix(self) -> str:
+        return {"gzip": ".gz", "zstd": ".zst"}.get(self.compression or "", "")
+
+    def _write(self, name: str, content: Content) -> str:
+        path = os.path.join(self.run_dir, name + self._suffix())
+        self._queue.put((path, content))  # 큐가 가득 차면 여기서 기다림 (메모리 상한)
+        return path
+
+    def _encode(self, text: str) -> bytes:
+        data = text.encode("utf-8")
+        if self.compression == "gzip":
+            return gzip.compress(data, compresslevel=6)
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=3).compress(data)
+        return data
+
+    def _drain(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                path, content = item  # type: ignore[misc]
+                text = content() if callable(content) else content
+                with open(path, "wb") as f:
+                    f.write(self._encode(text))
+            except Exception as e:
+                print(f"--- ❌ Artifact 저장 에러 ---: {e}")
+            finally:
+                self._queue.task_done()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
@@ -0,0 +1,330 @@
+import asyncio
+import time
+from typing import Tuple, Dict, Any, List, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Error as PlaywrightError, Page, Playwright, Route
+
+from . import dom_serializer
+from . import network_archive
+from . import page_cache as page_cache_module
+from . import page_settle
+from .artifact_sink import ArtifactSink
+from .page_cache import PageCache
+from .resource_blocking import ResourceBlocker, is_main_document
+from .spans import NO_SPANS, SpanRecorder
+from .browser_module import (
+    BATCH_CLICK_SETTLE_MS,
+    SCROLL_JS,
+    _ALERT_SELECTORS,
+    _DEFAULT_SINK,
+    _batch_actions,
+    _batch_error,
+    _check_observe_args,
+    _find_locator,
+    _has_target,
+    _incremental_result,
+    _new_alerts,
+    _parse_command,
+    _register_aids,
+    _restore_cached,
+    _scroll_sign,
+    summarize_html,
+)
+from .summary_budget import fit_summary
+
+# --- browser_module의 async_playwright 버전 ---
+# 한 이벤트 루프에서 여러 에이전트 세션을 동시에 돌리기 위한 모듈입니다.
+# 브라우저(Browser)는 하나를 공유하고, 세션마다 BrowserContext를 따로 만들어 쿠키/스토리지를 분리합니다.
+# 요약 규칙(summarize_html, dom_serializer)과 Locator 선택(_find_locator)은 동기 버전과 같은 코드를 씁니다.
+
+
+async def launch_browser(headless: bool = True) -> Tuple[Playwright, Browser]:
+    playwright = await async_playwright().start()
+    browser = await playwright.chromium.launch(headless=headless)
+    return playwright, browser
+
+
+async def open_session(
+    browser: Browser,
+    initial_url: str,
+    block: str = "off",
+    allow: Tuple[str, ...] = (),
+    network: str = "live",
+    har_path: str = network_archive.DEFAULT_HAR_PATH
+) -> Page:
+    """
+    공유 Browser 위에 새 BrowserContext + Page를 만들고 initial_url로 이동합니다.
+    block/allow, network/har_path는 browser_module.setup_browser와 같습니다.
+    """
+    har_args = network_archive.har_route_args(network, har_path)
+    context = await browser.new_context()
+    if har_args is not None:
+        await context.route_from_har(har_path, **har_args)
+    blocker = ResourceBlocker(block, allow)
+    blocker.add_first_party(initial_url)
+    await install_resource_blocking(context, blocker)
+    return await open_page(context, initial_url)
+
+
+async def install_resource_blocking(context: BrowserContext, blocker: ResourceBlocker) -> None:
+    """browser_module.install_resource_blocking의 async 버전입니다."""
+    context.uxagent_blocker = blocker  # type: ignore[attr-defined]
+    if not blocker.enabled:
+        return
+
+    async def handle(route: Route) -> None:
+        request = route.request
+        if blocker.check(request.url, request.resource_type, is_main_document(request)):
+            await route.abort("blockedbyclient")
+        else:
+            await route.fallback()
+
+    await context.route("**/*", handle)
+
+
+async def open_page(context: BrowserContext, initial_url: str) -> Page:
+    """이미 있는 BrowserContext(예: BrowserPool에서 빌린 것)에 Page를 열고 initial_url로 이동합니다."""
+    page = await context.new_page()
+    await install_settle_tracking(page)
+    await page.goto(initial_url)
+    await page.wait_for_load_state("domcontentloaded")
+    return page
+
+
+async def close_session(page: Page) -> None:
+    context: BrowserContext = page.context
+    await context.close()
+
+
+async def setup_browser(
+    initial_url: str,
+    headless: bool = True,
+    block: str = "off",
+    allow: Tuple[str, ...] = (),
+    network: str = "live",
+    har_path: str = network_archive.DEFAULT_HAR_PATH
+) -> Tuple[Page, Browser]:
+    """browser_module.setup_browser와 같은 모양의 단일 세션용 헬퍼입니다."""
+    playwright, browser = await launch_browser(headless=headless)
+    page = await open_session(browser, initial_url, block, allow, network, har_path)
+    browser.playwright_instance = playwright  # type: ignore[attr-defined]
+    return page, browser
+
+
+async def close_browser(browser: Browser) -> None:
+    playwright = getattr(browser, "playwright_instance", None)
+    for context in browser.contexts:
+        await context.close()  # record 모드의 HAR 저장
+    await browser.close()
+    if playwright is not None:
+        await playwright.stop()
+
+
+async def install_settle_tracking(page: Page) -> None:
+    """page_settle.install_settle_tracking의 async 버전입니다."""
+    if page_settle._track_requests(page):
+        await page.add_init_script(page_settle.SETTLE_INIT_JS)
+
+
+async def wait_for_settle(
+    page: Page,
+    quiet_ms: int = page_settle.SETTLE_QUIET_MS,
+    max_ms: int = page_settle.SETTLE_MAX_MS
+) -> Dict[str, Any]:
+    """page_settle.wait_for_settle의 async 버전입니다. 반환값도 같습니다."""
+    started = time.perf_counter()
+    reason = "timeout"
+    while True:
+        remaining = max_ms - page_settle._elapsed_ms(started)
+        if remaining <= 0:
+            return {"settled": False, "waited_ms": page_settle._elapsed_ms(started), "reason": reason}
+        try:
+            state = await page.evaluate(page_settle.SETTLE_WAIT_JS, {"quietMs": quiet_ms, "maxMs": remaining})
+        except PlaywrightError:
+            if page.is_closed():
+                raise  # 닫힌 페이지에서 다시 시도하면 max_ms까지 헛돎
+            reason = "timeout:navigation"
+            try:
+                await page.wait_for_load_state("domcontentloaded", timeout=max(remaining, 1))
+            except PlaywrightError:
+                if page.is_closed():
+                    raise
+            continue
+        if not state["settled"]:
+            return {"settled": False, "waited_ms": page_settle._elapsed_ms(started), "reason": f"timeout:{state['reason']}"}
+        if not page_settle._network_busy(page):
+            return {"settled": True, "waited_ms": page_settle._elapsed_ms(started), "reason": "quiet"}
+        reason = "timeout:network"
+        await page.wait_for_timeout(page_settle.NETWORK_POLL_MS)
+
+
+async def reveal_lazy_sections(page: Page) -> Dict[str, Any]:
+    """page_settle.reveal_lazy_sections의 async 버전입니다."""
+    if getattr(page, "uxagent_lazy_url", None) == page.url:
+        return {"steps": 0, "skipped": True}
+    try:
+        result: Dict[str, Any] = await page.evaluate(page_settle.LAZY_REVEAL_JS, page_settle.lazy_reveal_args())
+    except PlaywrightError as e:
+        print(f"--- ⚠️ lazy 섹션 스크롤 중단 ---: {e}")
+        return {"steps": 0, "error": str(e)}
+    page.uxagent_lazy_url = page.url  # type: ignore[attr-defined]
+    return result
+
+
+async def observe(
+    page: Page,
+    max_depth: int = 20,
+    max_chars: Optional[int] = 4000,
+    save_prefix: str = "observe",
+    engine: str = "bs4",
+    incremental: Optional[str] = None,
+    sink: Optional[ArtifactSink] = None,
+    spans: Optional[SpanRecorder] = None,
+    parser: str = "html.parser",
+    token_budget: Optional[int] = None,
+    goal: str = "",
+    visibility: Optional[str] = None,
+    reveal_lazy: bool = False,
+    page_cache: Optional[PageCache] = None
+) -> tuple[str, str]:
+    """browser_module.observe의 async 버전입니다. 인자와 반환값은 동일합니다."""
+    if sink is None:
+        sink = _DEFAULT_SINK
+    if spans is None:
+        spans = NO_SPANS
+    _check_observe_args(engine, incremental, visibility, page_cache is not None)
+
+    if reveal_lazy:
+        with spans.span("lazy"):
+            await reveal_lazy_sections(page)
+
+    summary: Optional[str] = None
+    cache_key = ""
+    cache_hit = False
+    if page_cache is not None:
+        with spans.span("fingerprint"):
+            fingerprint: str = await page.evaluate(dom_serializer.FINGERPRINT_JS, {"visibility": None})
+            cache_key = page_cache_module.cache_key(page.url, fingerprint, engine, max_depth, None, parser)
+        with spans.span("page_cache"):
+            entry = page_cache.get(cache_key)
+            if entry is not None:
+                state: Dict[str, Any] = await page.evaluate(dom_serializer.AID_STATE_JS, entry["targets"])
+                summary = _restore_cached(page, entry, state)
+        cache_hit = summary is not None
+
+    if cache_hit:
+        pass  # ax-id 찍기/등록까지 _restore_cached에서 끝남
+    elif engine == "bs4":
+        with spans.span("content"):
+            html_content = await page.content()
+        with spans.span("write"):
+            sink.write("raw", f"{save_prefix}_raw.html", html_content)
+        # BeautifulSoup 파싱/순회는 CPU 작업이라 이벤트 루프에서 돌리면 다른 세션이 모두 멈춤 → 스레드로
+        # (spans는 이 세션의 것이고, 스레드가 끝날 때까지 이 코루틴이 기다리므로 동시에 쓰이지 않음)
+        summary, targets = await asyncio.to_thread(
+            summarize_html,
+            html_content, max_depth, sink, save_prefix, stamp_targets=True, spans=spans, parser=parser
+        )
+        with spans.span("stamp"):
+            if page_cache is None:
+                stamped: List[str] = await page.evaluate(
+                    dom_serializer.STAMP_AIDS_JS, [list(t) for t in targets]
+                )
+                _register_aids(page, stamped)
+            else:
+                # 캐시 항목에 넣을 input 값도 같은 호출에서 읽음
+                state = await page.evaluate(dom_serializer.AID_STATE_JS, [list(t) for t in targets])
+                _register_aids(page, [aid for _, _, aid in state["targets"]])
+    else:
+        if sink.wants("raw"):
+            with spans.span("content"):
+                html_content = await page.content()
+            with spans.span("write"):
+                sink.write("raw", f"{save_prefix}_raw.html", html_content)
+        with spans.span("serialize"):
+            result: Dict[str, Any] = await page.evaluate(
+                dom_serializer.SERIALIZE_JS,
+                dom_serializer.serialize_args(max_depth, incremental is not None, True, visibility),
+            )
+        summary = result["summary"]
+        if incremental is not None:
+            summary = _incremental_result(page, summary, bool(result["incremental"]), incremental)
+        _register_aids(page, [f"aid-{i}" for i in range(1, result["aids"] + 1)])
+
+    if page_cache is not None and not cache_hit:
+        with spans.span("page_cache"):
+            page_cache.put(
+                cache_key, page.url, page_cache_module.make_entry(summary, state["targets"], state["values"])
+            )
+
+    with spans.span("budget"):
+        summary = fit_summary(summary, token_budget, max_chars, goal)
+    with spans.span("write"):
+        summary_file_path = sink.write("summary", f"{save_prefix}_summary.txt", summary)
+    return summary, summary_file_path
+
+
+async def current_alerts(page: Page) -> Dict[int, str]:
+    """browser_module.current_alerts의 async 버전입니다."""
+    pairs: List[List[Any]] = await page.evaluate(dom_serializer.ALERTS_JS, _ALERT_SELECTORS)
+    return {alert_id: text for alert_id, text in pairs}
+
+
+async def _run_batch(page: Page, actions: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    before = await current_alerts(page)
+    start_url = page.url
+    report: Dict[str, Any] = {"total": len(actions), "done": 0}
+    for index, (name, params) in enumerate(actions, 1):
+        try:
+            await act(page, {"name": name, "params": params})
+        except Exception as e:
+            raise _batch_error(report, name, e) from e
+        report["done"] = index
+        if name == "click":
+            await wait_for_settle(page, max_ms=BATCH_CLICK_SETTLE_MS)
+            if page.url != start_url:
+                report["stopped"] = "navigation"
+                break
+        current = await current_alerts(page)
+        alerts = _new_alerts(current, before)
+        before = current
+        if alerts:
+            report["stopped"] = "alert"
+            report["alerts"] = alerts
+            break
+    return report
+
+
+async def act(page: Page, command: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """browser_module.act의 async 버전입니다. (batch 액션이면 실행 결과를 돌려줌)"""
+    name, params = _parse_command(command)
+
+    if name == "batch":
+        return await _run_batch(page, _batch_actions(params))
+    elif name == "goto":
+        url = params.get("url")
+        if not url:
+            raise ValueError("goto 액션에는 'url'이 필요합니다.")
+        await page.goto(url)
+        await page.wait_for_load_state("domcontentloaded")
+    elif name == "click":
+        locator = _find_locator(page, params)
+        await locator.click()
+    elif name == "fill":
+        locator = _find_locator(page, params)
+        value = params.get("value", "")
+        await locator.fill(value)
+    elif name == "wait":
+        timeout_ms = params.get("timeout", 1000)
+        await wait_for_settle(page, max_ms=timeout_ms)
+    elif name == "wait_for_load":
+        await page.wait_for_load_state("domcontentloaded")
+        await wait_for_settle(page)
+    elif name == "scroll":
+        if _has_target(params):
+            await _find_locator(page, params).scroll_into_view_if_needed()
+        else:
+            await page.evaluate(SCROLL_JS, _scroll_sign(params))
+    else:
+        raise ValueError(f"지원하지 않는 액션입니다: {name}")
+    return None
@@ -0,0 +1,239 @@
+import asyncio
+import datetime
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+from playwright.async_api import BrowserContext
+
+from . import async_browser_module
+from . import fast_path
+from . import think_module
+from .artifact_sink import BackgroundArtifactSink
+from .browser_pool import BrowserPool
+from .page_cache import PageCache
+from .run_recorder import RunRecorder
+from .spans import SpanRecorder, add_think_metrics
+from .main import (
+    HIGH_LEVEL_GOAL, START_URL, MAX_STEPS,
+    OBSERVE_PARSER, OBSERVE_REVEAL_LAZY, OBSERVE_TOKEN_BUDGET, OBSERVE_PAGE_CACHE, BLOCK_RESOURCES, BLOCK_ALLOW,
+    NETWORK_MODE, HAR_PATH, ARTIFACT_LEVEL, THINK_MODE, FAST_PATH, batch_history, observe_settings,
+)
+
+# --- main.main의 asyncio 버전 ---
+# 브라우저를 공유하고 세션(BrowserContext)마다 에이전트 루프를 하나씩 돌립니다.
+# 컨텍스트는 BrowserPool에서 빌려 쓰고, 끝나면 초기화되어 풀로 돌아갑니다.
+# think()는 블로킹 OpenAI 호출이므로 asyncio.to_thread로 넘겨, 한 세션이 LLM을 기다리는 동안
+# 다른 세션의 observe/act(브라우저 I/O)가 진행되도록 합니다. bs4 엔진 관찰의 파싱/순회도 같은 이유로 스레드에서 돕니다.
+# to_thread는 루프의 기본 executor(min(32, CPU + 4) 스레드)를 쓰므로, 세션이 그보다 많으면 LLM 호출이 줄을 서서
+# 동시 실행 수가 조용히 깎입니다. 세션 수만큼 스레드가 있는 executor를 set_session_executor로 깔아 둡니다.
+
+CONCURRENT_SESSIONS = 3
+# 세션 수 외에 산출물 큐 닫기 등 가끔 쓰는 to_thread 몫
+EXECUTOR_HEADROOM = 4
+
+
+def set_session_executor(sessions: int) -> ThreadPoolExecutor:
+    """실행 중인 루프의 기본 executor를 세션 수에 맞춘 스레드 풀로 바꿉니다. (asyncio.run이 끝날 때 함께 정리됨)"""
+    executor = ThreadPoolExecutor(max_workers=sessions + EXECUTOR_HEADROOM, thread_name_prefix="uxagent-session")
+    asyncio.get_running_loop().set_default_executor(executor)
+    return executor
+
+
+async def run_agent(
+    context: BrowserContext,
+    goal: str,
+    start_url: str = START_URL,
+    run_id: Optional[str] = None,
+    max_steps: int = MAX_STEPS,
+    log_dir: str = "logs",
+    page_cache: Optional[PageCache] = None,
+    artifact_dir: str = "artifacts"
+) -> Dict[str, Any]:
+    """
+    주어진 BrowserContext에서 에이전트 세션 하나를 끝까지 실행하고 결과 요약을 돌려줍니다.
+    로그 형식은 main.main과 같은 JSONL입니다. ({log_dir}/run_{run_id}.jsonl)
+    관찰 산출물은 {artifact_dir}/run_{run_id}에 저장합니다.
+    page_cache는 세션끼리 함께 씁니다. (주면 bs4 엔진으로 관찰, main.observe_settings 참고)
+    """
+    run_id = run_id or datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    os.makedirs(log_dir, exist_ok=True)
+    log_file_path = os.path.join(log_dir, f"run_{run_id}.jsonl")
+
+    recorder = RunRecorder(log_file_path)
+
+    def now() -> str:
+        return datetime.datetime.now().isoformat()
+
+    recorder.log({"type": "run_start", "timestamp": now(), "run_id": run_id, "goal": goal})
+    artifact_sink = BackgroundArtifactSink(
+        os.path.join(artifact_dir, f"run_{run_id}"), level=ARTIFACT_LEVEL
+    )
+
+    result: Dict[str, Any] = {"run_id": run_id, "log_file": log_file_path, "result": "max_steps", "steps": 0}
+    history: List[Dict[str, str]] = []
+    spans = SpanRecorder()
+    page = None
+
+    try:
+        page = await async_browser_module.open_page(context, start_url)
+
+        for step in range(1, max_steps + 1):
+            result["steps"] = step
+            obs_file_path = ""
+            obs_hash = None
+            settle: Dict[str, Any] = {}
+            fast_path_info: Dict[str, Any] = {}
+
+            # --- 1. 관찰 (Observe) ---
+            try:
+                with spans.span("settle"):
+                    settle = await async_browser_module.wait_for_settle(page)
+                with spans.span("observe"):
+                    obs_summary, obs_file_path = await async_browser_module.observe(
+                        page,
+                        max_depth=14,
+                        max_chars=None,
+                        save_prefix=f"observe_{step}",
+                        parser=OBSERVE_PARSER,
+                        token_budget=OBSERVE_TOKEN_BUDGET,
+                        goal=goal,
+                        reveal_lazy=OBSERVE_REVEAL_LAZY,
+                        page_cache=page_cache,
+                        **observe_settings(page_cache is not None),
+                        sink=artifact_sink,
+                        spans=spans
+                    )
+            except Exception as e:
+                print(f"--- ❌ [{run_id}] 관찰(Observe) 실패 ---: {e}")
+                history.append({"role": "system", "content": f"관찰 실패: {e}"})
+                recorder.log({
+                    "type": "step_error", "step": step, "phase": "observe",
+                    "timestamp": now(), "error": str(e), "spans": spans.take()
+                })
+                continue
+            obs_hash = recorder.observation(obs_summary)
+
+            # --- 2. 사고 (Think) ---
+            try:
+                decision = None
+                if FAST_PATH:
+                    decision, fast_path_info = fast_path.decide(obs_summary, goal, history)
+                if decision is None:
+                    with spans.span("think"):
+                        decision = await asyncio.to_thread(
+                            think_module.think, obs_summary, goal, history, THINK_MODE, run_id
+                        )
+                thought = decision.get("thought", "[Thought 없음]")
+                action_command = decision.get("action", {})
+                think_metrics = decision.get("metrics", {})
+                add_think_metrics(spans, think_metrics)
+            except Exception as e:
+                print(f"--- ❌ [{run_id}] 사고(Think) 모듈 실패 ---: {e}")
+                recorder.log({
+                    "type": "step_error", "step": step, "phase": "think",
+                    "timestamp": now(), "error": str(e),
+                    "observation_file": obs_file_path, "observation": obs_hash, "spans": spans.take()
+                })
+                result["result"] = "error"
+                break
+
+            if not action_command or not action_command.get("name"):
+                print(f"--- ❌ [{run_id}] 유효하지 않은 Action ---")
+                result["result"] = "error"
+                break
+
+            # --- 3. 행동 (Act) ---
+            if action_command["name"] == "finish":
+                print(f"🎉 [{run_id}] 작업 완료: {action_command.get('params', {}).get('reason')}")
+                recorder.log({
+                    "type": "step", "step": step, "phase": "act",
+                    "timestamp": now(), "observation_file": obs_file_path, "observation": obs_hash,
+                    "thought": thought, "think_metrics": think_metrics, "fast_path": fast_path_info, "settle": settle, "spans": spans.take(), "action": action_command, "result": "finish"
+                })
+                result["result"] = "finish"
+                break
+
+            try:
+                with spans.span("act"):
+                    batch = await async_browser_module.act(page, action_command)
+                recorder.log({
+                    "type": "step", "step": step, "phase": "act",
+                    "timestamp": now(), "observation_file": obs_file_path, "observation": obs_hash,
+                    "thought": thought, "think_metrics": think_metrics, "fast_path": fast_path_info, "settle": settle, "spans": spans.take(), "action": action_command, "result": "success",
+                    "batch": batch
+                })
+                history.append({"role": "system", "content": f"--- 나의 이전 생각 (Step {step}) ---\n{thought}"})
+                history.append({"role": "system", "content": f"--- 나의 이전 행동 (Step {step}) ---\n{json.dumps(action_command, ensure_ascii=False)}"})
+                note = batch_history(step, batch)
+                if note:
+                    history.append({"role": "system", "content": note})
+            except Exception as e:
+                print(f"--- ❌ [{run_id}] 행동(Act) 실패 ---: {e}")
+                recorder.log({
+                    "type": "step", "step": step, "phase": "act",
+                    "timestamp": now(), "observation_file": obs_file_path, "observation": obs_hash,
+                    "thought": thought, "think_metrics": think_metrics, "fast_path": fast_path_info, "settle": settle, "spans": spans.take(), "action": action_command,
+                    "result": "error", "error_message": str(e),
+                    "batch": getattr(e, "batch", None)
+                })
+                history.append({"role": "system", "content": f"--- 행동 실패 (Step {step}) ---\nAction: {action_command['name']}\nError: {e}"})
+
+    except Exception as e:
+        print(f"\n--- ❌ [{run_id}] 치명적인 에러 발생 ---: {e}")
+        recorder.log({"type": "run_error", "timestamp": now(), "error": str(e)})
+        result["result"] = "error"
+        result["error"] = str(e)
+
+    finally:
+        blocker = getattr(context, "uxagent_blocker", None)
+        recorder.log({
+            "type": "run_end", "timestamp": now(), "result": result["result"],
+            "blocked_requests": blocker.stats() if blocker else None
+        })
+        try:
+            if page is not None:
+                try:
+                    await page.screenshot(path=os.path.join(log_dir, f"final_{run_id}.png"))
+                except Exception as e:
+                    print(f"--- ⚠️ [{run_id}] 스크린샷 실패 ---: {e}")
+                await page.close()
+        finally:
+            # 페이지 정리 중 에러/취소가 나도 산출물 큐와 로그는 닫음 (쓰기 스레드가 daemon이라 안 닫으면 유실)
+            try:
+                await asyncio.to_thread(artifact_sink.close)
+            finally:
+                recorder.close()
+
+    return result
+
+
+async def run_leased(pool: BrowserPool, goal: str, **kwargs: Any) -> Dict[str, Any]:
+    """풀에서 컨텍스트를 빌려 run_agent를 실행합니다. 빈 컨텍스트가 없으면 반납될 때까지 기다립니다."""
+    async with pool.lease() as context:
+        return await run_agent(context, goal, **kwargs)
+
+
+async def main(sessions: int = CONCURRENT_SESSIONS):
+    set_session_executor(sessions)
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    page_cache = PageCache(OBSERVE_PAGE_CACHE) if OBSERVE_PAGE_CACHE else None
+    # HAR 기록은 단일 세션(main.py)으로만 하고, 여기서는 live 또는 replay
+    network = "live" if NETWORK_MODE == "record" else NETWORK_MODE
+    async with BrowserPool(
+        size=sessions, block=BLOCK_RESOURCES, allow=BLOCK_ALLOW, network=network, har_path=HAR_PATH
+    ) as pool:
+        results = await asyncio.gather(*(
+            run_leased(pool, HIGH_LEVEL_GOAL, run_id=f"{stamp}_s{i}", page_cache=page_cache)
+            for i in range(1, sessions + 1)
+        ))
+    if page_cache is not None:
+        page_cache.close()
+
+    for r in results:
+        print(f"{r['run_id']}: {r['result']} ({r['steps']} steps) -> {r['log_file']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
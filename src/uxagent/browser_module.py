@@ -1,70 +1,151 @@
 from typing import Tuple, Dict, Any, List, Optional
+import difflib
 import re
-
-from playwright.sync_api import sync_playwright, Browser, Page
-from bs4 import BeautifulSoup, Tag
+import time
+
+from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page, Route
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from bs4.builder import ParserRejectedMarkup
+
+try:
+    import lxml  # 선택 의존성: 있으면 parser="lxml" (C 파서) 사용 가능
+except ImportError:
+    lxml = None
+
+from . import dom_serializer
+from . import network_archive
+from . import page_settle
+from . import page_cache as page_cache_module
+from .artifact_sink import ArtifactSink, FileArtifactSink
+from .page_cache import PageCache
+from .resource_blocking import ResourceBlocker, is_main_document
+from .spans import NO_SPANS, SpanRecorder
+from .summary_budget import fit_summary
 
 # --- setup_browser, close_browser는 동일 (생략) ---
-def setup_browser(initial_url: str) -> Tuple[Page, Browser]:
+def setup_browser(
+    initial_url: str,
+    block: str = "off",
+    allow: Tuple[str, ...] = (),
+    network: str = "live",
+    har_path: str = network_archive.DEFAULT_HAR_PATH
+) -> Tuple[Page, Browser]:
+    """
+    block/allow: 리소스 차단 정책과 항상 통과시킬 패턴 (resource_blocking 참고)
+    차단 통계는 page.context.uxagent_blocker.stats()로 볼 수 있습니다.
+    network/har_path: "live", "record" (har_path에 기록), "replay" (har_path에서만 응답) (network_archive 참고)
+    """
+    har_args = network_archive.har_route_args(network, har_path)
     playwright = sync_playwright().start()
     browser = playwright.chromium.launch(headless=False)
     context = browser.new_context()
+    if har_args is not None:
+        context.route_from_har(har_path, **har_args)
+    blocker = ResourceBlocker(block, allow)
+    blocker.add_first_party(initial_url)
+    install_resource_blocking(context, blocker)
     page = context.new_page()
+    page_settle.install_settle_tracking(page)
     page.goto(initial_url)
     page.wait_for_load_state("domcontentloaded")
     browser.playwright_instance = playwright  # type: ignore[attr-defined]
     return page, browser
 
+def install_resource_blocking(context: BrowserContext, blocker: ResourceBlocker) -> None:
+    """컨텍스트의 모든 요청에 blocker를 적용합니다. (정책이 "off"면 route를 걸지 않음)"""
+    context.uxagent_blocker = blocker  # type: ignore[attr-defined]
+    if not blocker.enabled:
+        return
+
+    def handle(route: Route) -> None:
+        request = route.request
+        if blocker.check(request.url, request.resource_type, is_main_document(request)):
+            route.abort("blockedbyclient")
+        else:
+            route.fallback()
+
+    context.route("**/*", handle)
+
 def close_browser(browser: Browser) -> None:
     playwright = getattr(browser, "playwright_instance", None)
+    # record 모드의 HAR는 컨텍스트를 닫을 때 저장되므로 컨텍스트부터 닫음
+    for context in browser.contexts:
+        context.close()
     browser.close()
     if playwright is not None:
         playwright.stop()
 # --- (생략 끝) ---
 
-def _pre_process_actionable(soup: BeautifulSoup) -> Dict[Tag, str]:
-    actionable_map: Dict[Tag, str] = {}
-    aid_counter = 1
-    
-    selectors = [
-        "a[href]", "button", "input", "textarea", "select",
-        "label[for]", "[data-testid]", "[role='button']", "[role='link']",
-        "[role='tab']", "[role='checkbox']"
-    ]
-    
-    elements_to_process = set()
-    for selector in selectors:
-        elements_to_process.update(soup.select(selector))
-
-    for el in elements_to_process:
-        if not isinstance(el, Tag) or el in actionable_map:
-            continue
-        ax_id = f"aid-{aid_counter}"
-        actionable_map[el] = ax_id
-        aid_counter += 1
-        
-    return actionable_map
+# 실행 가능(actionable) 요소 판별 규칙. 아래 CSS 셀렉터 목록과 같은 의미입니다.
+#   a[href], button, input, textarea, select, label[for], [data-testid],
+#   [role='button'], [role='link'], [role='tab'], [role='checkbox']
+# 셀렉터마다 soup.select()로 트리를 훑는 대신, walk 중에 노드별로 한 번만 판별합니다.
+_ACTIONABLE_TAGS = {"button", "input", "textarea", "select"}
+_ACTIONABLE_ROLES = {"button", "link", "tab", "checkbox"}
+
+def _is_actionable(node: Tag) -> bool:
+    name = node.name
+    attrs = node.attrs
+    if name in _ACTIONABLE_TAGS:
+        return True
+    if name == "a" and "href" in attrs:
+        return True
+    if name == "label" and "for" in attrs:
+        return True
+    return "data-testid" in attrs or attrs.get("role") in _ACTIONABLE_ROLES
 
 # --- [신규] 알림(Alert)을 먼저 추출하는 헬퍼 함수 ---
-def _extract_alerts(soup: BeautifulSoup) -> List[str]:
+# 알림으로 보는 요소. soup.select()를 셀렉터마다 돌리면 트리 전체를 5번 훑으므로,
+# summarize_html의 순회 중에 _alert_hits로 같은 규칙을 노드별로 한 번만 판별합니다.
+_ALERT_SELECTORS = [
+    'div[class*="fixed"][class*="bg-red-"]',
+    'div[class*="absolute"][class*="bg-red-"]',
+    
+    # --- [수정] ---
+    'ol[class*="fixed top-0"] li',
+    'ul[class*="fixed top-0"] li', # ⬅️ 'class**=' 에서 '*' 하나 제거
+    'div[data-sonner-toast]'
+    # --- [수정 완료] ---
+]
+
+
+def _class_string(attrs: Dict[str, Any]) -> Optional[str]:
+    """[class*=...] 비교용 class 값 (bs4는 class를 리스트로 나눠 두므로 공백으로 다시 이음)"""
+    classes = attrs.get("class")
+    if classes is None:
+        return None
+    return classes if isinstance(classes, str) else " ".join(classes)
+
+
+def _alert_hits(name: str, attrs: Dict[str, Any], in_fixed_ol: bool, in_fixed_ul: bool) -> List[int]:
+    """노드가 맞는 _ALERT_SELECTORS의 인덱스 목록. in_fixed_ol/ul: 조상 중에 class*="fixed top-0"인 ol/ul이 있는지"""
+    hits: List[int] = []
+    if name == "div":
+        cls = _class_string(attrs)
+        if cls is not None and "bg-red-" in cls:
+            if "fixed" in cls:
+                hits.append(0)
+            if "absolute" in cls:
+                hits.append(1)
+        if "data-sonner-toast" in attrs:
+            hits.append(4)
+    elif name == "li":
+        if in_fixed_ol:
+            hits.append(2)
+        if in_fixed_ul:
+            hits.append(3)
+    return hits
+
+
+def _extract_alerts(alerts_by_selector: List[List[Tag]]) -> List[str]:
+    """셀렉터 순서대로, 각 셀렉터 안에서는 문서 순서대로 알림 줄을 만듭니다."""
     alert_lines: List[str] = []
     alerts_found_texts = set() # 중복 알림 텍스트 방지
 
-    alert_selectors = [
-        'div[class*="fixed"][class*="bg-red-"]',
-        'div[class*="absolute"][class*="bg-red-"]',
-        
-        # --- [수정] ---
-        'ol[class*="fixed top-0"] li',
-        'ul[class*="fixed top-0"] li', # ⬅️ 'class**=' 에서 '*' 하나 제거
-        'div[data-sonner-toast]'
-        # --- [수정 완료] ---
-    ]
-
-    for selector in alert_selectors:
-        for alert in soup.select(selector):
+    for alerts in alerts_by_selector:
+        for alert in alerts:
             text = " ".join(alert.stripped_strings)
-            text = re.sub(r"\s+", " ", text)
+            text = _WHITESPACE.sub(" ", text)
             if text and text not in alerts_found_texts:
                 alert_lines.append(f"  <alert> {text}")
                 alerts_found_texts.add(text)
@@ -75,204 +156,691 @@ def _extract_alerts(soup: BeautifulSoup) -> List[str]:
         
     return alert_lines
 
-def observe(
-    page: Page,
-    max_depth: int = 20,
-    max_chars: Optional[int] = 4000,
-    save_prefix: str = "observe"
-) -> tuple[str, str]:
-    
-    html_content = page.content()
-    with open(f"{save_prefix}_raw.html", "w", encoding="utf-8") as f:
-        f.write(html_content)
+# --- HTML 파서 백엔드 (bs4 엔진) ---
+#   - "html.parser": 파이썬 표준 파서. 파싱 후 노이즈 태그를 find_all + decompose로 제거 (기존 방식)
+#   - "lxml":        libxml2(C) 파서. 파싱 이벤트 단계에서 노이즈 태그 하위 트리를 아예 만들지 않음
+# lxml이 설치되어 있지 않거나 lxml이 문서를 거부하면 html.parser로 대신 파싱합니다.
+HTML_PARSERS = ("html.parser", "lxml")
+_NOISE_TAGS = ("script", "style", "link", "meta", "noscript", "svg", "path")
+_NOISE_TAG_SET = frozenset(_NOISE_TAGS)
+
+
+class _NoiseStrippingSoup(BeautifulSoup):
+    """
+    lxml 트리 빌더는 start/end 이벤트의 짝이 항상 맞으므로(빈 요소 포함), 깊이만 세면서
+    노이즈 태그와 그 하위 요소/텍스트를 트리에 넣지 않고 건너뜁니다.
+    (html.parser 빌더는 빈 요소의 end 이벤트가 없을 수 있어 이 방식을 쓰지 않습니다.)
+    """
+
+    def reset(self) -> None:
+        super().reset()
+        self._noise_depth = 0
+
+    def handle_starttag(self, name, namespace, nsprefix, attrs, *args, **kwargs):
+        if self._noise_depth or name in _NOISE_TAG_SET:
+            if not self._noise_depth:
+                # 노이즈 앞뒤 텍스트가 한 문자열로 합쳐지지 않도록 (decompose 후와 같은 모양)
+                self.endData()
+            self._noise_depth += 1
+            return None
+        return super().handle_starttag(name, namespace, nsprefix, attrs, *args, **kwargs)
+
+    def handle_endtag(self, name, nsprefix=None):
+        if self._noise_depth:
+            self._noise_depth -= 1
+            return
+        super().handle_endtag(name, nsprefix)
 
-    soup = BeautifulSoup(html_content, "html.parser")
+    def handle_data(self, data):
+        if not self._noise_depth:
+            super().handle_data(data)
 
-    for tag_name in ["script", "style", "link", "meta", "noscript", "svg", "path"]:
-        for t in soup.find_all(tag_name):
-            t.decompose()
 
-    with open(f"{save_prefix}_clean.html", "w", encoding="utf-8") as f:
-        f.write(soup.prettify())
+_warned_no_lxml = False
 
-    body = soup.body or soup
-    actionable_map = _pre_process_actionable(body)
-    
-    lines: List[str] = _extract_alerts(soup)
-
-    # [수정] interesting_tags에서 'a' 제거. 'a'는 actionable_map이 처리함.
-    interesting_tags = {
-        "header", "nav", "main", "section", "article", "footer",
-        "div", "ul", "ol", "li",
-        "h1", "h2", "h3", "h4", "p", "span",
-        "button", "img", # button은 ax_id에도 있지만 중복되어도 괜찮음
-        "input", "textarea", "select", "label"
-    }
 
-    # --- [수정] node_to_text 함수 (이전 버전으로 복원) ---
-    def node_to_text(node: Tag) -> str:
-        name = node.name
+def parse_html(html_content: str, parser: str = "html.parser") -> BeautifulSoup:
+    """노이즈 태그(_NOISE_TAGS)가 제거된 BeautifulSoup 트리를 돌려줍니다."""
+    global _warned_no_lxml
+    if parser not in HTML_PARSERS:
+        raise ValueError(f"지원하지 않는 HTML 파서입니다: {parser} (가능: {HTML_PARSERS})")
 
-        # '콘텐츠' 태그는 자식 텍스트를 모두 가져옴 (stripped_strings)
-        if name in ("label", "button", "h1", "h2", "h3", "h4", "p", "span", "a"):
-            text = " ".join(node.stripped_strings)
-        else:
-            # 'div', 'section' 등 '컨테이너' 태그는 '직접 텍스트'만 가져옴
-            direct_texts = [
-                t.strip()
-                for t in node.find_all(string=True, recursive=False)
-                if t.strip()
-            ]
-            text = " ".join(direct_texts)
-        
-        text = re.sub(r"\s+", " ", text)
-        return text[:120]
-    # --- [수정 완료] ---
+    if parser == "lxml":
+        if lxml is not None:
+            try:
+                return _NoiseStrippingSoup(html_content, "lxml")
+            except ParserRejectedMarkup as e:
+                print(f"--- ⚠️ lxml 파싱 실패, html.parser로 다시 파싱 ---: {e}")
+        elif not _warned_no_lxml:
+            print("--- ⚠️ lxml이 설치되어 있지 않아 html.parser를 사용합니다. (pip install lxml) ---")
+            _warned_no_lxml = True
 
-    def walk(node: Tag, depth: int = 0):
-        if not isinstance(node, Tag):
-            return
+    soup = BeautifulSoup(html_content, "html.parser")
+    for tag_name in _NOISE_TAGS:
+        for t in soup.find_all(tag_name):
+            t.decompose()
+    return soup
 
-        name = node.name
-        # 폼/액션 관련 태그는 깊어도 무조건 본다
-        force_deep = name in ("label", "input", "textarea", "select", "button")
 
-        if depth > max_depth and not force_deep:
-            return
+OBSERVE_ENGINES = ("bs4", "dom")
+INCREMENTAL_MODES = ("full", "delta")
+_DEFAULT_SINK = FileArtifactSink(".", level="full")
+
+def observe(
+    page: Page,
+    max_depth: int = 20,
+    max_chars: Optional[int] = 4000,
+    save_prefix: str = "observe",
+    engine: str = "bs4",
+    incremental: Optional[str] = None,
+    sink: Optional[ArtifactSink] = None,
+    spans: Optional[SpanRecorder] = None,
+    parser: str = "html.parser",
+    token_budget: Optional[int] = None,
+    goal: str = "",
+    visibility: Optional[str] = None,
+    reveal_lazy: bool = False,
+    page_cache: Optional[PageCache] = None
+) -> tuple[str, str]:
+    """
+    현재 페이지를 LLM용 계층적 텍스트 요약본으로 변환합니다.
+
+    engine:
+      - "bs4": page.content()를 BeautifulSoup로 다시 파싱해서 순회 (raw/clean HTML도 저장)
+      - "dom": 브라우저 안에서 라이브 DOM을 한 번에 직렬화 (dom_serializer, 요약본만 저장)
+    incremental ("dom" 엔진 전용):
+      - None: 매번 전체를 새로 직렬화
+      - "full": MutationObserver로 바뀐 하위 트리만 다시 직렬화하고, 합쳐진 전체 요약본을 반환
+      - "delta": "full"과 같이 갱신하되, 이전 관찰 대비 바뀐 줄만 담은 delta 블록을 반환
+        (첫 관찰, 페이지 이동 직후, delta가 더 긴 경우에는 전체 요약본을 반환)
+        → delta 모드는 직전 전체 요약본을 프롬프트에 유지하는 호출 측에서만 사용하세요.
+    parser ("bs4" 엔진 전용):
+      HTML 파서 백엔드. "html.parser"(기본) 또는 "lxml" (HTML_PARSERS 참고)
+    visibility ("dom" 엔진 전용):
+      - None: 정적 HTML처럼 숨겨진 모달/요소까지 모두 직렬화
+      - "rendered": 실제로 렌더링된 요소만 (숨겨진 요소는 ax-id도 받지 않으므로 클릭 대상이 되지 않음)
+      - "viewport": rendered + 뷰포트 근처 요소만. 화면 밖 요소 수는 마지막 줄에 적힙니다. (incremental과 함께 못 씀)
+    reveal_lazy:
+      True면 관찰 전에 페이지를 끝까지 스크롤해 lazy 섹션을 불러옵니다. (URL마다 한 번, page_settle 참고)
+    page_cache:
+      주면 페이지 지문으로 실행 간 캐시를 먼저 찾고, 적중하면 page.content()/파싱/순회 없이 캐시된 요약본에
+      현재 input 값만 채워 씁니다. (engine="bs4" 전용, 적중 시 raw/clean HTML은 저장하지 않음, page_cache 참고)
+    sink:
+      산출물(raw/clean HTML, 요약본)을 어디에 얼마나 남길지 결정합니다. (artifact_sink 참고)
+      None이면 기존처럼 현재 디렉터리에 {save_prefix}_*.html/txt를 동기적으로 씁니다.
+      반환값의 두 번째 값은 요약본이 저장될 경로이며, 저장하지 않으면 ""입니다.
+    max_chars / token_budget:
+      요약본이 글자 수(max_chars) 또는 추정 토큰 수(token_budget, 우선)를 넘으면 앞에서부터 자르지 않고,
+      반복 구조를 접고 goal과 관련 높은 ax-id 요소 위주로 남겨 예산에 맞춥니다. (summary_budget 참고)
+    spans:
+      주면 세부 단계(lazy, content, parse, walk, serialize, stamp, budget, write)의 소요 시간을 기록합니다.
+      호출 측에서 span("observe") 안에서 부르면 "observe/parse" 같은 경로로 남습니다.
+
+    관찰할 때마다 요약본의 각 ax-id를 라이브 요소에 data-uxagent-aid 속성으로 찍고,
+    page.uxagent_aid_registry (ax-id -> 셀렉터)에 등록합니다. act()는 {"aid": "aid-12"}로 바로 찾습니다.
+    """
+    if sink is None:
+        sink = _DEFAULT_SINK
+    if spans is None:
+        spans = NO_SPANS
+    _check_observe_args(engine, incremental, visibility, page_cache is not None)
+
+    if reveal_lazy:
+        with spans.span("lazy"):
+            page_settle.reveal_lazy_sections(page)
+
+    summary: Optional[str] = None
+    cache_key = ""
+    cache_hit = False
+    if page_cache is not None:
+        with spans.span("fingerprint"):
+            fingerprint: str = page.evaluate(dom_serializer.FINGERPRINT_JS, {"visibility": None})
+            cache_key = page_cache_module.cache_key(page.url, fingerprint, engine, max_depth, None, parser)
+        with spans.span("page_cache"):
+            summary = _cached_summary(page, page_cache, cache_key)
+        cache_hit = summary is not None
+
+    # 미적중이면 ax-id를 찍는 호출에서 캐시 항목에 넣을 input 값도 함께 읽음
+    cache_state: Optional[Dict[str, Any]] = {} if page_cache is not None else None
+    if cache_hit:
+        pass  # ax-id 찍기/등록까지 _cached_summary에서 끝남
+    elif engine == "bs4":
+        summary = _observe_bs4(
+            page, max_depth, save_prefix, sink, spans=spans, parser=parser, cache_state=cache_state
+        )
+    else:
+        if sink.wants("raw"):
+            with spans.span("content"):
+                html_content = page.content()
+            with spans.span("write"):
+                sink.write("raw", f"{save_prefix}_raw.html", html_content)
+        with spans.span("serialize"):
+            if incremental is None:
+                summary, aid_count = dom_serializer.serialize_dom(page, max_depth, visibility=visibility)
+            else:
+                summary, aid_count = _observe_dom_incremental(page, max_depth, incremental, visibility)
+        _register_aids(page, [f"aid-{i}" for i in range(1, aid_count + 1)])
+
+    if page_cache is not None and not cache_hit:
+        assert cache_state is not None
+        with spans.span("page_cache"):
+            page_cache.put(
+                cache_key, page.url,
+                page_cache_module.make_entry(summary, cache_state["targets"], cache_state["values"])
+            )
+
+    with spans.span("budget"):
+        summary = fit_summary(summary, token_budget, max_chars, goal)
+    with spans.span("write"):
+        summary_file_path = sink.write("summary", f"{save_prefix}_summary.txt", summary)
+    return summary, summary_file_path
 
-        ax_id = actionable_map.get(node)
-
-        if name in interesting_tags or ax_id or force_deep:
-            text_part = node_to_text(node)
-
-            # 컨테이너인데 텍스트 없으면 자기 자신은 안 찍고 자식만
-            if not text_part and name in ("div", "span", "li") and not force_deep:
-                for child in node.children:
-                    walk(child, depth + 1)
-                return
-
-            indent = "  " * depth
-            extra = ""
-            if ax_id:
-                extra += f" ax-id={ax_id}"
-            if node.get("href"):
-                extra += f" href={node.get('href')}"
-            if name == "img" and node.get("alt"):
-                extra += f" alt={node.get('alt')}"
-            if name == "input":
-                if node.get("type"): extra += f" type={node.get('type')}"
-                if node.get("id"): extra += f" id={node.get('id')}"
-                if node.get("placeholder"): extra += f" placeholder={node.get('placeholder')}"
-                if node.get("value"):
-                    extra += f" value=\"{node.get('value')}\""
-            if name == "label" and node.get("for"):
-                extra += f" for={node.get('for')}"
-            if node.get("data-testid"):
-                extra += f" data-testid={node.get('data-testid')}"
-
-            line = f"{indent}<{name}{extra}> {text_part}".rstrip()
-            lines.append(line)
-
-            for child in node.children:
-                walk(child, depth + 1)
-        else:
-            # 중요 태그 아니면 자식만
-            for child in node.children:
-                walk(child, depth + 1)
 
+def _check_observe_args(
+    engine: str, incremental: Optional[str], visibility: Optional[str] = None, cached: bool = False
+) -> None:
+    if engine not in OBSERVE_ENGINES:
+        raise ValueError(f"지원하지 않는 observe 엔진입니다: {engine} (가능: {OBSERVE_ENGINES})")
+    if incremental is not None and incremental not in INCREMENTAL_MODES:
+        raise ValueError(f"지원하지 않는 incremental 모드입니다: {incremental} (가능: {INCREMENTAL_MODES})")
+    if engine == "bs4" and incremental is not None:
+        raise ValueError("incremental 모드는 engine=\"dom\"에서만 사용할 수 있습니다.")
+    if visibility is not None:
+        if visibility not in dom_serializer.VISIBILITY_MODES:
+            raise ValueError(
+                f"지원하지 않는 visibility 모드입니다: {visibility} (가능: {dom_serializer.VISIBILITY_MODES})"
+            )
+        if engine == "bs4":
+            raise ValueError("visibility 옵션은 라이브 DOM이 필요하므로 engine=\"dom\"에서만 사용할 수 있습니다.")
+        if visibility == "viewport" and incremental is not None:
+            # 스크롤은 DOM 변경이 아니어서 증분 캐시가 무효화되지 않음
+            raise ValueError("visibility=\"viewport\"는 incremental 모드와 함께 사용할 수 없습니다.")
+    if cached and engine != "bs4":
+        # dom 엔진은 직렬화 자체가 페이지 안 순회 한 번이라, 지문 + 적중 확인(순회 두 번)이 오히려 느림
+        raise ValueError("page_cache는 engine=\"bs4\"에서만 사용할 수 있습니다.")
+
+
+def _register_aids(page: Any, aids: List[str]) -> None:
+    page.uxagent_aid_registry = {  # type: ignore[attr-defined]
+        aid: dom_serializer.aid_selector(aid) for aid in aids
+    }
 
-    walk(body, 0)
-    summary = "\n".join(lines)
 
-    if max_chars is not None and len(summary) > max_chars:
-        summary = summary[:max_chars] + "\n... (truncated)"
+def _cached_summary(page: Page, page_cache: PageCache, key: str) -> Optional[str]:
+    """캐시 적중이면 ax-id를 다시 찍고 현재 input 값을 채운 요약본을, 아니면 None을 돌려줍니다."""
+    entry = page_cache.get(key)
+    if entry is None:
+        return None
+    state: Dict[str, Any] = page.evaluate(dom_serializer.AID_STATE_JS, entry["targets"])
+    return _restore_cached(page, entry, state)
+
+
+def _restore_cached(page: Any, entry: Dict[str, Any], state: Dict[str, Any]) -> Optional[str]:
+    if len(state["targets"]) != len(entry["targets"]):
+        return None  # 지문을 뜬 뒤에 DOM이 바뀜 → 새로 요약
+    _register_aids(page, [aid for _, _, aid in state["targets"]])
+    return page_cache_module.fill_summary(entry, state["values"])
+
+
+def _observe_dom_incremental(
+    page: Page, max_depth: int, mode: str, visibility: Optional[str] = None
+) -> Tuple[str, int]:
+    full_summary, reused, aid_count = dom_serializer.serialize_dom_incremental(
+        page, max_depth, visibility=visibility
+    )
+    return _incremental_result(page, full_summary, reused, mode), aid_count
+
+
+def _incremental_result(page: Any, full_summary: str, reused: bool, mode: str) -> str:
+    previous = getattr(page, "uxagent_last_summary", None)
+    page.uxagent_last_summary = full_summary  # type: ignore[attr-defined]
+
+    if mode == "full" or not reused or previous is None:
+        return full_summary
+    delta = dom_serializer.summary_delta(previous, full_summary)
+    return delta if delta is not None else full_summary
+
+
+def compare_engines(page: Page, max_depth: int = 20) -> Dict[str, Any]:
+    """
+    같은 페이지를 두 엔진으로 관찰해서 소요 시간과 요약본 차이를 돌려줍니다. (디버깅/벤치마크용)
+    """
+    t0 = time.perf_counter()
+    bs4_summary = _observe_bs4(
+        page, max_depth, "compare_bs4", ArtifactSink(level="none"), stamp=False
+    )
+    t1 = time.perf_counter()
+    dom_summary, _ = dom_serializer.serialize_dom(page, max_depth, stamp=False)
+    t2 = time.perf_counter()
+
+    diff = list(difflib.unified_diff(
+        bs4_summary.splitlines(), dom_summary.splitlines(), "bs4", "dom", lineterm=""
+    ))
+    return {
+        "bs4_ms": (t1 - t0) * 1000,
+        "dom_ms": (t2 - t1) * 1000,
+        "identical": not diff,
+        "diff": diff,
+    }
 
-    summary_file_path = f"{save_prefix}_summary.txt"
-    with open(summary_file_path, "w", encoding="utf-8") as f:
-        f.write(summary)
 
-    return summary, summary_file_path
+def _observe_bs4(
+    page: Page,
+    max_depth: int,
+    save_prefix: str,
+    sink: ArtifactSink,
+    stamp: bool = True,
+    spans: SpanRecorder = NO_SPANS,
+    parser: str = "html.parser",
+    cache_state: Optional[Dict[str, Any]] = None
+) -> str:
+    """cache_state를 주면 AID_STATE_JS로 찍으면서 page_cache 항목용 targets/values를 그 dict에 채웁니다."""
+    with spans.span("content"):
+        html_content = page.content()
+    with spans.span("write"):
+        sink.write("raw", f"{save_prefix}_raw.html", html_content)
+
+    summary, targets = summarize_html(
+        html_content, max_depth, sink, save_prefix, stamp_targets=stamp, spans=spans, parser=parser
+    )
+    if stamp:
+        with spans.span("stamp"):
+            if cache_state is None:
+                _register_aids(page, dom_serializer.stamp_aids(page, targets))
+            else:
+                cache_state.update(page.evaluate(dom_serializer.AID_STATE_JS, [list(t) for t in targets]))
+                _register_aids(page, [aid for _, _, aid in cache_state["targets"]])
+    return summary
+
+
+# 요약본에 찍히는 태그 (a는 _is_actionable이 처리)
+_INTERESTING_TAGS = frozenset({
+    "header", "nav", "main", "section", "article", "footer",
+    "div", "ul", "ol", "li",
+    "h1", "h2", "h3", "h4", "p", "span",
+    "button", "img", # button은 ax_id에도 있지만 중복되어도 괜찮음
+    "input", "textarea", "select", "label"
+})
+# '콘텐츠' 태그는 하위 텍스트 전체(stripped_strings), 나머지 '컨테이너' 태그는 직접 텍스트만 씀
+_CONTENT_TAGS = frozenset({"label", "button", "h1", "h2", "h3", "h4", "p", "span", "a"})
+# 폼/액션 관련 태그는 max_depth보다 깊어도 무조건 본다
+_FORCE_DEEP_TAGS = frozenset({"label", "input", "textarea", "select", "button"})
+# 텍스트가 없으면 자기 줄은 생략하고 자식만 보는 래퍼 태그
+_SKIP_EMPTY_TAGS = frozenset({"div", "span", "li"})
+TEXT_LIMIT = 120
+_WHITESPACE = re.compile(r"\s+")
+# stripped_strings가 세는 문자열 타입 (주석, script/template 문자열 등은 제외)
+_MAIN_STRING_TYPES = (NavigableString, CData)
+
+
+def _subtree_texts(preorder: List[Tag]) -> Dict[int, str]:
+    """
+    각 요소의 " ".join(stripped_strings)를 공백 정리 후 앞 TEXT_LIMIT자만 구해 {id(요소): 텍스트}로 돌려줍니다.
+    전위 순서를 거꾸로(자식 먼저) 돌면서 자식의 결과를 부모가 그대로 이어 붙이므로,
+    중첩된 콘텐츠 태그라도 텍스트를 한 번씩만 모읍니다. (조각마다 앞뒤 공백이 없으니 조각별 정리 = 전체 정리)
+    """
+    texts: Dict[int, str] = {}
+    for node in reversed(preorder):
+        parts: List[str] = []
+        size = 0
+        for child in node.contents:
+            if type(child) in _MAIN_STRING_TYPES:
+                piece = child.strip()
+                if not piece:
+                    continue
+                piece = _WHITESPACE.sub(" ", piece)
+            elif isinstance(child, Tag):
+                piece = texts[id(child)]
+                if not piece:
+                    continue
+            else:
+                continue
+            parts.append(piece)
+            size += len(piece) + 1
+            if size > TEXT_LIMIT:
+                break
+        texts[id(node)] = " ".join(parts)[:TEXT_LIMIT]
+    return texts
+
+
+def _direct_text(node: Tag) -> str:
+    """컨테이너 태그의 직접 텍스트 (find_all(string=True, recursive=False)와 같이 주석도 포함)"""
+    parts = []
+    for child in node.contents:
+        if isinstance(child, NavigableString):
+            piece = child.strip()
+            if piece:
+                parts.append(piece)
+    return _WHITESPACE.sub(" ", " ".join(parts))[:TEXT_LIMIT]
+
+
+def summarize_html(
+    html_content: str,
+    max_depth: int = 20,
+    sink: Optional[ArtifactSink] = None,
+    save_prefix: str = "observe",
+    stamp_targets: bool = False,
+    spans: SpanRecorder = NO_SPANS,
+    parser: str = "html.parser"
+) -> Tuple[str, List[Tuple[int, str, str]]]:
+    """
+    브라우저 없이 HTML 문자열만으로 요약본을 만듭니다. (observe의 bs4 엔진 본체)
+    sink가 있으면 노이즈 제거 후 HTML(clean)을 남깁니다.
+    stamp_targets=True면 라이브 요소에 ax-id를 찍기 위한 (요소 순번, 태그 이름, ax-id) 목록도 돌려줍니다.
+    parser는 HTML 파서 백엔드입니다. (parse_html 참고)
+    """
+    with spans.span("parse"):
+        soup = parse_html(html_content, parser)
+
+    # prettify()는 파싱만큼 비싸므로, 필요할 때만 (백그라운드 sink라면 writer 스레드에서) 실행
+    if sink is not None:
+        with spans.span("write"):
+            sink.write("clean", f"{save_prefix}_clean.html", soup.prettify)
+
+    body = soup.body or soup
+    lines: List[str] = []
+
+    with spans.span("walk"):
+        # 1) 문서 전체를 전위 순서로 한 번 훑으면서 (재귀 대신 명시적 스택) 알림 요소도 함께 찾음
+        alerts_by_selector: List[List[Tag]] = [[] for _ in _ALERT_SELECTORS]
+        everything: List[Tag] = []
+        body_start = body_end = 0
+        body_depth = -1
+        stack: List[Tuple[Tag, int, bool, bool]] = [(soup, 0, False, False)]
+        while stack:
+            node, depth, in_fixed_ol, in_fixed_ul = stack.pop()
+            if body_depth >= 0 and not body_end and depth <= body_depth:
+                body_end = len(everything)
+            if node is body:
+                body_start, body_depth = len(everything), depth
+            everything.append(node)
+
+            name = node.name
+            attrs = node.attrs
+            for hit in _alert_hits(name, attrs, in_fixed_ol, in_fixed_ul):
+                alerts_by_selector[hit].append(node)
+            if name == "ol" or name == "ul":
+                cls = _class_string(attrs)
+                if cls is not None and "fixed top-0" in cls:
+                    in_fixed_ol = in_fixed_ol or name == "ol"
+                    in_fixed_ul = in_fixed_ul or name == "ul"
+            stack.extend(
+                (child, depth + 1, in_fixed_ol, in_fixed_ul)
+                for child in reversed(node.contents) if isinstance(child, Tag)
+            )
+        # body 하위 트리는 전위 순서에서 연속 구간
+        preorder = everything[body_start:body_end or len(everything)]
+
+        lines.extend(_extract_alerts(alerts_by_selector))
+        subtree_text = _subtree_texts(preorder)
+
+        # 2) 요약본 줄 만들기. ax-id는 요약본에 찍히는 순서(= 문서 순서)대로 매기므로 같은 페이지면 매번 같은 번호
+        aid_count = 0
+        aid_nodes: List[Tuple[str, Tag]] = []
+        walk_stack: List[Tuple[Tag, int]] = [(body, 0)]
+        while walk_stack:
+            node, depth = walk_stack.pop()
+            name = node.name
+            force_deep = name in _FORCE_DEEP_TAGS
+            if depth > max_depth and not force_deep:
+                continue
+
+            actionable = _is_actionable(node)
+            if name in _INTERESTING_TAGS or actionable or force_deep:
+                text_part = subtree_text[id(node)] if name in _CONTENT_TAGS else _direct_text(node)
+
+                # 컨테이너인데 텍스트 없으면 자기 자신은 안 찍고 자식만
+                if text_part or name not in _SKIP_EMPTY_TAGS or force_deep:
+                    attrs = node.attrs
+                    parts = ["  " * depth, "<", name]
+                    if actionable:
+                        aid_count += 1
+                        ax_id = f"aid-{aid_count}"
+                        aid_nodes.append((ax_id, node))
+                        parts += (" ax-id=", ax_id)
+                    if attrs.get("href"):
+                        parts += (" href=", str(attrs["href"]))
+                    if name == "img" and attrs.get("alt"):
+                        parts += (" alt=", str(attrs["alt"]))
+                    if name == "input":
+                        for key in ("type", "id", "placeholder"):
+                            if attrs.get(key):
+                                parts += (" ", key, "=", str(attrs[key]))
+                        if attrs.get("value"):
+                            parts += (' value="', str(attrs["value"]), '"')
+                    if name == "label" and attrs.get("for"):
+                        parts += (" for=", str(attrs["for"]))
+                    if attrs.get("data-testid"):
+                        parts += (" data-testid=", str(attrs["data-testid"]))
+                    parts += ("> ", text_part)
+                    lines.append("".join(parts).rstrip())
+
+            # 자식은 문서 순서대로 꺼내지도록 거꾸로 넣음
+            child_depth = depth + 1
+            walk_stack.extend(
+                (child, child_depth) for child in reversed(node.contents) if isinstance(child, Tag)
+            )
+
+    targets: List[Tuple[int, str, str]] = []
+    if stamp_targets and aid_nodes:
+        # 파싱된 트리의 노드를 라이브 요소와 잇기 위해 '노이즈 제거 후 body 하위 요소 순번'을 넘김
+        # (preorder[0]은 body 자신이므로 body.find_all(True)의 순서와 같음)
+        ordinals = {id(el): i for i, el in enumerate(preorder[1:])}
+        targets = [(ordinals[id(node)], node.name, ax_id) for ax_id, node in aid_nodes]
+
+    return "\n".join(lines), targets
 
 
 # ---------- 여기부터 act ----------
 def _normalize_text(s: str) -> str:
-    return re.sub(r"\s+", " ", s).strip()
-
-def act(page: Page, command: Dict[str, Any]) -> None:
+    return _WHITESPACE.sub(" ", s).strip()
+
+def _find_locator(page: Any, p: Dict[str, Any]) -> Any:
+    # sync/async Page 모두 Locator 생성은 동기 API이므로 두 엔진이 함께 사용합니다.
+    # 0) ax-id: observe가 라이브 요소에 찍어 둔 data-uxagent-aid로 바로 찾음
+    aid = p.get("aid") or p.get("ax-id")
+    if aid:
+        registry = getattr(page, "uxagent_aid_registry", {})
+        if aid not in registry:
+            raise ValueError(f"마지막 관찰에 없는 ax-id입니다: {aid} (다시 observe 하세요)")
+        return page.locator(registry[aid])
+
+    # 1) data-testid가 있으면 그걸로
+    testid = p.get("testid") or p.get("data-testid")
+    if testid:
+        return page.get_by_test_id(testid)
+
+    # 2) label
+    label = p.get("label")
+    if label:
+        label = _normalize_text(label)
+        if label == "결제하기":
+            return page.get_by_test_id("button-payment")
+        if label == "카드 간편결제":
+            # shadcn radio 유사 구조
+            try:
+                return page.get_by_label(label)
+            except:
+                return page.get_by_role("radio", name=label)
+        if label == "무통장입금":
+            try:
+                return page.get_by_label(label)
+            except:
+                return page.get_by_role("radio", name=label)
+        return page.get_by_label(label)
+
+    # 3) text
+    text = p.get("text")
+    if text:
+        text = _normalize_text(text)
+        if text == "결제하기":
+            return page.get_by_test_id("button-payment")
+        if text == "5% 신규가입 쿠폰 적용하기":
+            return page.get_by_test_id("button-apply-coupon")
+        return page.get_by_text(text).first
+
+    # 4) role
+    role = p.get("role")
+    role_name = p.get("name_text")
+    if role and role_name:
+        role_name = _normalize_text(role_name)
+        return page.get_by_role(role, name=role_name)
+
+    # 5) selector
+    selector = p.get("selector")
+    if selector:
+        return page.locator(selector)
+
+    raise ValueError(f"적절한 Locator를 찾을 수 없습니다: {p}")
+
+# scroll 액션: 뷰포트 높이의 80%만큼 이동 (직전 화면의 아래쪽 일부가 다음 화면에도 보이도록)
+SCROLL_JS = "(sign) => window.scrollBy(0, sign * window.innerHeight * 0.8)"
+# _find_locator가 대상을 찾을 때 쓰는 키
+_LOCATOR_KEYS = ("aid", "ax-id", "testid", "data-testid", "label", "text", "role", "selector")
+
+
+def _has_target(params: Dict[str, Any]) -> bool:
+    return any(params.get(key) for key in _LOCATOR_KEYS)
+
+
+def _scroll_sign(params: Dict[str, Any]) -> int:
+    direction = params.get("direction", "down")
+    if direction not in ("down", "up"):
+        raise ValueError(f"scroll 액션의 direction은 'down' 또는 'up'이어야 합니다: {direction}")
+    return 1 if direction == "down" else -1
+
+
+def _parse_command(command: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
     name = command.get("action", {}).get("name") or command.get("name")
     params = command.get("action", {}).get("params") or command.get("params") or {}
     if not name:
         raise ValueError("command.action.name 이 비어 있습니다.")
-
-    def _find_locator(p: Dict[str, Any]):
-        # 1) data-testid가 있으면 그걸로
-        testid = p.get("testid") or p.get("data-testid")
-        if testid:
-            return page.get_by_test_id(testid)
-
-        # 2) label
-        label = p.get("label")
-        if label:
-            label = _normalize_text(label)
-            if label == "결제하기":
-                return page.get_by_test_id("button-payment")
-            if label == "카드 간편결제":
-                # shadcn radio 유사 구조
-                try:
-                    return page.get_by_label(label)
-                except:
-                    return page.get_by_role("radio", name=label)
-            if label == "무통장입금":
-                try:
-                    return page.get_by_label(label)
-                except:
-                    return page.get_by_role("radio", name=label)
-            return page.get_by_label(label)
-
-        # 3) text
-        text = p.get("text")
-        if text:
-            text = _normalize_text(text)
-            if text == "결제하기":
-                return page.get_by_test_id("button-payment")
-            if text == "5% 신규가입 쿠폰 적용하기":
-                return page.get_by_test_id("button-apply-coupon")
-            return page.get_by_text(text).first
-
-        # 4) role
-        role = p.get("role")
-        role_name = p.get("name_text")
-        if role and role_name:
-            role_name = _normalize_text(role_name)
-            return page.get_by_role(role, name=role_name)
-
-        # 5) selector
-        selector = p.get("selector")
-        if selector:
-            return page.locator(selector)
-
-        raise ValueError(f"적절한 Locator를 찾을 수 없습니다: {p}")
-
-    if name == "goto":
+    return name, params
+
+# --- batch 액션 ---
+# 같은 페이지의 폼 입력처럼 중간에 다시 관찰할 필요가 없는 액션들을 한 번의 think/act로 실행합니다.
+#   {"name": "batch", "params": {"actions": [{"name": "fill", "params": {...}}, {"name": "click", ...}]}}
+# 실행 전에 모든 액션을 검사하고, 액션 사이마다 새 알림(_ALERT_SELECTORS 기준)이 뜨거나 click으로
+# 페이지가 이동하면 남은 액션은 건너뜁니다. (다음 관찰에서 전략가가 알림을 보고 다시 계획)
+# 새 알림은 텍스트가 아니라 알림 요소로 판단합니다. 직전 확인 때 없던 요소면 새 알림이라, 계속 떠 있는 알림은
+# 무시하고 같은 문구로 다시 뜬 알림은 잡습니다.
+# 중간 액션이 실패하면 ValueError의 batch 속성에 실행 결과(done = 이미 실행한 개수)를 담아 스텝 로그에 남깁니다.
+BATCH_ACTIONS = ("click", "fill", "scroll", "wait")
+MAX_BATCH_ACTIONS = 8
+# 배치 안의 click 뒤에 알림(토스트)이 뜰 때까지 최대 이만큼(ms) 기다림
+BATCH_CLICK_SETTLE_MS = 500
+
+
+def _batch_actions(params: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """batch의 액션 목록을 (name, params)로 풀면서 하나씩 검사합니다. 하나라도 잘못되면 아무것도 실행하지 않습니다."""
+    actions = params.get("actions")
+    if not isinstance(actions, list) or not actions:
+        raise ValueError("batch 액션에는 비어 있지 않은 'actions' 목록이 필요합니다.")
+    if len(actions) > MAX_BATCH_ACTIONS:
+        raise ValueError(f"batch 액션은 최대 {MAX_BATCH_ACTIONS}개까지입니다: {len(actions)}개")
+
+    parsed: List[Tuple[str, Dict[str, Any]]] = []
+    for index, action in enumerate(actions, 1):
+        if not isinstance(action, dict):
+            raise ValueError(f"batch {index}번째 액션이 JSON 객체가 아닙니다: {action}")
+        name, action_params = _parse_command(action)
+        if name not in BATCH_ACTIONS:
+            raise ValueError(f"batch 안에서는 {BATCH_ACTIONS} 액션만 쓸 수 있습니다: {index}번째 '{name}'")
+        if name in ("click", "fill") and not _has_target(action_params):
+            raise ValueError(f"batch {index}번째 {name} 액션에 대상(aid, label 등)이 없습니다: {action_params}")
+        if name == "fill" and "value" not in action_params:
+            raise ValueError(f"batch {index}번째 fill 액션에 'value'가 없습니다: {action_params}")
+        if name == "scroll" and not _has_target(action_params):
+            _scroll_sign(action_params)
+        parsed.append((name, action_params))
+    return parsed
+
+
+def _batch_error(report: Dict[str, Any], name: str, e: Exception) -> ValueError:
+    """실패한 액션 정보를 report에 채우고, 이미 실행한 개수(done)를 알리는 ValueError를 만듭니다."""
+    report["stopped"] = "error"
+    report["error"] = str(e)
+    error = ValueError(
+        f"batch {report['done'] + 1}/{report['total']}번째 액션({name}) 실패: {e} "
+        f"(앞의 {report['done']}개는 이미 실행됨. 폼이 일부 채워졌을 수 있음)"
+    )
+    error.batch = report
+    return error
+
+
+def _new_alerts(alerts: Dict[int, str], before: Dict[int, str]) -> List[str]:
+    return [text for alert_id, text in alerts.items() if alert_id not in before]
+
+
+def current_alerts(page: Page) -> Dict[int, str]:
+    """지금 떠 있는 알림 {요소 번호: 텍스트} (observe의 [!] CURRENT ALERTS와 같은 셀렉터, ALERTS_JS 참고)"""
+    pairs: List[List[Any]] = page.evaluate(dom_serializer.ALERTS_JS, _ALERT_SELECTORS)
+    return {alert_id: text for alert_id, text in pairs}
+
+
+def _run_batch(page: Page, actions: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    before = current_alerts(page)
+    start_url = page.url
+    report: Dict[str, Any] = {"total": len(actions), "done": 0}
+    for index, (name, params) in enumerate(actions, 1):
+        try:
+            act(page, {"name": name, "params": params})
+        except Exception as e:
+            raise _batch_error(report, name, e) from e
+        report["done"] = index
+        if name == "click":
+            page_settle.wait_for_settle(page, max_ms=BATCH_CLICK_SETTLE_MS)
+            if page.url != start_url:
+                report["stopped"] = "navigation"
+                break
+        current = current_alerts(page)
+        alerts = _new_alerts(current, before)
+        before = current
+        if alerts:
+            report["stopped"] = "alert"
+            report["alerts"] = alerts
+            break
+    return report
+
+
+def act(page: Page, command: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    액션 하나를 실행합니다. batch 액션이면 실행 결과 {"total", "done", "stopped"?, "alerts"?}를 돌려주고,
+    나머지 액션은 None을 돌려줍니다.
+    """
+    name, params = _parse_command(command)
+
+    if name == "batch":
+        return _run_batch(page, _batch_actions(params))
+    elif name == "goto":
         url = params.get("url")
         if not url:
             raise ValueError("goto 액션에는 'url'이 필요합니다.")
         page.goto(url)
         page.wait_for_load_state("domcontentloaded")
     elif name == "click":
-        locator = _find_locator(params)
+        locator = _find_locator(page, params)
         locator.click()
     elif name == "fill":
-        locator = _find_locator(params)
+        locator = _find_locator(page, params)
         value = params.get("value", "")
         locator.fill(value)
     elif name == "wait":
+        # timeout은 최대 대기 시간. 페이지가 먼저 안정되면 바로 돌아옵니다.
         timeout_ms = params.get("timeout", 1000)
-        page.wait_for_timeout(timeout_ms)
+        page_settle.wait_for_settle(page, max_ms=timeout_ms)
     elif name == "wait_for_load":
         page.wait_for_load_state("domcontentloaded")
+        page_settle.wait_for_settle(page)
+    elif name == "scroll":
+        # 대상 요소가 있으면 그 요소까지, 없으면 direction으로 한 화면(SCROLL_JS)씩
+        if _has_target(params):
+            _find_locator(page, params).scroll_into_view_if_needed()
+        else:
+            page.evaluate(SCROLL_JS, _scroll_sign(params))
     else:
         raise ValueError(f"지원하지 않는 액션입니다: {name}")
+    return None
 # ---------- act 끝 ----------
 
 
@@ -0,0 +1,146 @@
+import asyncio
+import contextlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from playwright.async_api import Browser, BrowserContext, Playwright
+
+from . import async_browser_module
+from . import network_archive
+from .resource_blocking import ResourceBlocker
+
+# --- 배치 실행용 브라우저/컨텍스트 풀 ---
+# 헤드리스 Chromium을 미리 띄워 두고 BrowserContext도 미리 만들어 둡니다.
+# 에이전트 실행 하나가 컨텍스트 하나를 빌려(lease) 쓰고, 반납하면 컨텍스트를 초기화해서 다시 풀에 넣습니다.
+# size가 동시에 빌려줄 수 있는 컨텍스트 수(= 동시 세션 수)의 상한이라 메모리 사용량도 여기서 묶입니다.
+# 컨텍스트 재생성이 (한 번 다시 시도해도) 실패하면 풀이 하나 줄어들고, 살아 있는 컨텍스트가 0개가 되면
+# 기다리던 lease()까지 모두 RuntimeError로 끝냅니다. (배치가 에러 없이 멈춰 있지 않도록)
+
+
+class BrowserPool:
+    """
+    size: 풀 전체의 컨텍스트 수 (동시 세션 상한)
+    contexts_per_browser: 브라우저 프로세스 하나에 올릴 컨텍스트 수
+                          (size / contexts_per_browser 만큼 브라우저를 띄움)
+    block / allow: 컨텍스트마다 거는 리소스 차단 정책과 통과 패턴 (resource_blocking 참고)
+                   자사 호스트는 첫 문서 요청에서 정해지고, 통계는 context.uxagent_blocker에 있습니다.
+    network / har_path: "live" 또는 "replay" (모든 컨텍스트가 같은 HAR에서 응답, network_archive 참고)
+                        "record"는 컨텍스트마다 같은 파일을 덮어쓰므로 단일 세션(setup_browser)에서만 씁니다.
+
+    반납 시 초기화는 '컨텍스트 교체'로 합니다. 빌려 간 컨텍스트를 닫고 같은 브라우저에 새 컨텍스트를
+    만들어 넣으므로 쿠키, localStorage/sessionStorage, IndexedDB, 캐시, 권한이 모두 비워집니다.
+    (Playwright에는 컨텍스트의 스토리지만 지우는 API가 없고, 컨텍스트 생성은 수 ms 수준입니다.)
+    """
+
+    def __init__(
+        self,
+        size: int = 4,
+        contexts_per_browser: int = 4,
+        headless: bool = True,
+        context_options: Optional[Dict[str, Any]] = None,
+        block: str = "off",
+        allow: Tuple[str, ...] = (),
+        network: str = "live",
+        har_path: str = network_archive.DEFAULT_HAR_PATH
+    ):
+        if size < 1 or contexts_per_browser < 1:
+            raise ValueError("size와 contexts_per_browser는 1 이상이어야 합니다.")
+        self.size = size
+        self.contexts_per_browser = contexts_per_browser
+        self.headless = headless
+        self.context_options = context_options or {}
+        self.block = block
+        self.allow = allow
+        ResourceBlocker(block, allow)  # 정책 이름을 미리 검사
+        if network == "record":
+            raise ValueError("BrowserPool에서는 network=\"record\"를 쓸 수 없습니다. (단일 세션으로 기록하세요)")
+        self.har_path = har_path
+        self._har_args = network_archive.har_route_args(network, har_path)
+
+        self._playwright: Optional[Playwright] = None
+        self._browsers: List[Browser] = []
+        self._idle: "asyncio.Queue[Optional[Tuple[int, BrowserContext]]]" = asyncio.Queue()
+        self._live = 0  # 풀에 있거나 빌려 간 컨텍스트 수
+        self._started = False
+
+    async def start(self) -> "BrowserPool":
+        if self._started:
+            return self
+        self._playwright, first = await async_browser_module.launch_browser(headless=self.headless)
+        browser_count = -(-self.size // self.contexts_per_browser)  # 올림
+        self._browsers = [first] + [
+            await self._playwright.chromium.launch(headless=self.headless)
+            for _ in range(browser_count - 1)
+        ]
+        contexts = await asyncio.gather(*(
+            self._new_context(i // self.contexts_per_browser) for i in range(self.size)
+        ))
+        for item in contexts:
+            self._idle.put_nowait(item)
+        self._live = len(contexts)
+        self._started = True
+        return self
+
+    async def close(self) -> None:
+        for browser in self._browsers:
+            with contextlib.suppress(Exception):
+                await browser.close()
+        self._browsers = []
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        self._started = False
+
+    async def __aenter__(self) -> "BrowserPool":
+        return await self.start()
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def _new_context(self, browser_index: int) -> Tuple[int, BrowserContext]:
+        browser = self._browsers[browser_index]
+        if not browser.is_connected():
+            # 브라우저가 죽었으면 그 자리만 다시 띄움
+            assert self._playwright is not None
+            browser = await self._playwright.chromium.launch(headless=self.headless)
+            self._browsers[browser_index] = browser
+        context = await browser.new_context(**self.context_options)
+        if self._har_args is not None:
+            await context.route_from_har(self.har_path, **self._har_args)
+        await async_browser_module.install_resource_blocking(context, ResourceBlocker(self.block, self.allow))
+        return browser_index, context
+
+    async def _reset(self, browser_index: int, context: BrowserContext) -> None:
+        with contextlib.suppress(Exception):
+            await context.close()
+        for attempt in (1, 2):
+            try:
+                self._idle.put_nowait(await self._new_context(browser_index))
+                return
+            except Exception as e:
+                print(f"--- ❌ BrowserPool 컨텍스트 재생성 실패 ({attempt}/2) ---: {e}")
+        self._live -= 1
+        print(f"--- ❌ BrowserPool 크기 감소: 남은 컨텍스트 {self._live}개 ---")
+        if self._live == 0:
+            self._idle.put_nowait(None)  # 기다리던 lease()를 깨움 (lease가 다음 대기자에게 넘김)
+
+    @contextlib.asynccontextmanager
+    async def lease(self) -> AsyncIterator[BrowserContext]:
+        """
+        초기화된 컨텍스트를 하나 빌려줍니다. 남은 컨텍스트가 없으면 반납될 때까지 기다립니다.
+        재생성 실패로 살아 있는 컨텍스트가 하나도 없으면 RuntimeError를 던집니다.
+            async with pool.lease() as context:
+                page = await async_browser_module.open_page(context, url)
+        """
+        if not self._started:
+            raise RuntimeError("BrowserPool.start()를 먼저 호출하세요.")
+        if self._live == 0:
+            raise RuntimeError("BrowserPool에 남은 컨텍스트가 없습니다. (컨텍스트 재생성이 모두 실패)")
+        item = await self._idle.get()
+        if item is None:
+            self._idle.put_nowait(None)
+            raise RuntimeError("BrowserPool에 남은 컨텍스트가 없습니다. (컨텍스트 재생성이 모두 실패)")
+        browser_index, context = item
+        try:
+            yield context
+        finally:
+            await self._reset(browser_index, context)
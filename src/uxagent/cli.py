@@ -0,0 +1,249 @@
+import argparse
+import asyncio
+import csv
+import datetime
+import json
+import os
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from . import llm_provider
+from . import observe_bench
+from . import profile_report
+from . import run_recorder
+from . import think_module
+from .async_main import run_leased, set_session_executor
+from .browser_module import HTML_PARSERS
+from .browser_pool import BrowserPool
+from .page_cache import DEFAULT_PAGE_CACHE_PATH, PageCache
+from .main import HIGH_LEVEL_GOAL, START_URL, MAX_STEPS, BLOCK_RESOURCES, BLOCK_ALLOW, HAR_PATH
+from .resource_blocking import BLOCK_POLICIES
+
+# --- uxagent 콘솔 스크립트 ---
+#   uxagent batch goals.jsonl --concurrency 8
+#   uxagent batch goals.jsonl --concurrency 32 --llm mock --mock-latency-ms 800   (API 키 없이 부하 테스트)
+#   uxagent batch goals.jsonl --page-cache  (같은 구조의 페이지는 이전 실행의 요약본 재사용)
+#   uxagent batch goals.jsonl --network replay --llm mock   (기록해 둔 HAR로 네트워크 없이 실행)
+#   uxagent report                          (logs/run_*.jsonl의 구간별 p50/p95와 flame 형태 요약)
+#   uxagent bench                           (저장된 observe_*_raw.html로 observe 오프라인 벤치마크)
+#   uxagent export --out runs.parquet       (실행 로그의 스텝들을 Parquet/Arrow 파일 하나로)
+#   python -m uxagent.main                  (단일 세션 실행, async_main도 같은 방식. 설치하지 않았다면 PYTHONPATH=src)
+# 목표/페르소나 파일의 항목마다 에이전트를 한 번씩 실행합니다.
+# 동시 실행 수는 BrowserPool 크기로 묶이고, 실행마다 JSONL 로그 하나와 전체 결과표(results.csv)를 남깁니다.
+# 로그, 관찰 산출물(artifacts/), 결과표는 모두 --out 디렉터리 아래에 모입니다.
+
+DEFAULT_REPORT_LOGS = ["logs/run_*.jsonl", "batches/*/logs/run_*.jsonl"]
+RESULT_COLUMNS = ["index", "id", "run_id", "result", "steps", "duration_s", "log_file", "error"]
+
+
+def load_goals(path: str) -> List[Dict[str, Any]]:
+    """
+    목표 파일을 읽습니다.
+      - .jsonl: 한 줄에 {"id": ..., "goal": ..., "persona": ..., "start_url": ...} (goal 외에는 선택)
+                goal이 없으면 main.HIGH_LEVEL_GOAL을 사용 (같은 목표를 여러 페르소나로 돌릴 때)
+      - 그 외:  '---' 한 줄로 구분된 목표 텍스트 블록
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read()
+
+    if path.endswith(".jsonl"):
+        entries = [json.loads(line) for line in raw.splitlines() if line.strip()]
+    else:
+        blocks = [b.strip() for b in raw.split("\n---\n")]
+        entries = [{"goal": b} for b in blocks if b]
+
+    goals: List[Dict[str, Any]] = []
+    for i, entry in enumerate(entries, start=1):
+        goal = entry.get("goal") or HIGH_LEVEL_GOAL
+        persona = entry.get("persona")
+        if persona:
+            goal = f"[페르소나]\n{persona}\n\n{goal}"
+        goals.append({
+            "index": i,
+            "id": str(entry.get("id", i)),
+            "goal": goal,
+            "start_url": entry.get("start_url") or START_URL,
+        })
+    return goals
+
+
+async def run_batch(
+    goals: List[Dict[str, Any]],
+    out_dir: str,
+    concurrency: int = 4,
+    contexts_per_browser: int = 4,
+    max_steps: int = MAX_STEPS,
+    page_cache: Optional[PageCache] = None,
+    block: str = BLOCK_RESOURCES,
+    allow: Tuple[str, ...] = BLOCK_ALLOW,
+    network: str = "live",
+    har_path: str = HAR_PATH
+) -> List[Dict[str, Any]]:
+    log_dir = os.path.join(out_dir, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    # think/bs4 파싱이 to_thread에서 줄 서지 않도록 동시 세션 수만큼 스레드 확보
+    set_session_executor(concurrency)
+
+    async def _one(pool: BrowserPool, item: Dict[str, Any]) -> Dict[str, Any]:
+        run_id = f"{stamp}_{item['index']:04d}"
+        started = time.perf_counter()
+        try:
+            result = await run_leased(
+                pool, item["goal"],
+                start_url=item["start_url"], run_id=run_id,
+                max_steps=max_steps, log_dir=log_dir, page_cache=page_cache,
+                artifact_dir=os.path.join(out_dir, "artifacts")
+            )
+        except Exception as e:
+            # 풀/브라우저 수준의 에러도 한 행으로 남기고 나머지 실행은 계속
+            result = {"run_id": run_id, "result": "error", "steps": 0, "error": str(e), "log_file": ""}
+        row = {
+            "index": item["index"],
+            "id": item["id"],
+            "duration_s": round(time.perf_counter() - started, 2),
+            **result,
+        }
+        print(f"[{row['index']}/{len(goals)}] {row['id']}: {row['result']} ({row['steps']} steps, {row['duration_s']}s)")
+        return row
+
+    async with BrowserPool(
+        size=concurrency, contexts_per_browser=contexts_per_browser, block=block, allow=allow,
+        network=network, har_path=har_path
+    ) as pool:
+        rows = await asyncio.gather(*(_one(pool, item) for item in goals))
+    return sorted(rows, key=lambda r: r["index"])
+
+
+def write_results(rows: List[Dict[str, Any]], out_dir: str) -> str:
+    path = os.path.join(out_dir, "results.csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: row.get(key, "") for key in RESULT_COLUMNS})
+    return path
+
+
+def _cmd_batch(args: argparse.Namespace) -> int:
+    goals = load_goals(args.goals)
+    if not goals:
+        print("실행할 목표가 없습니다.")
+        return 1
+    if args.llm == "mock":
+        think_module.set_provider(llm_provider.MockProvider(latency_s=args.mock_latency_ms / 1000))
+    elif args.llm == "openai":
+        # 환경변수 UXAGENT_LLM_PROVIDER=mock 이 있어도 --llm openai가 이김
+        think_module.set_provider(llm_provider.from_env("openai"))
+    out_dir = args.out or os.path.join(
+        "batches", datetime.datetime.now().strftime("batch_%Y%m%d_%H%M%S")
+    )
+    print(f"목표 {len(goals)}개, 동시 실행 {args.concurrency} -> {out_dir}")
+
+    page_cache = PageCache(args.page_cache) if args.page_cache else None
+    started = time.perf_counter()
+    try:
+        rows = asyncio.run(run_batch(
+            goals, out_dir,
+            concurrency=args.concurrency,
+            contexts_per_browser=args.contexts_per_browser,
+            max_steps=args.max_steps,
+            page_cache=page_cache,
+            block=args.block,
+            allow=tuple(args.allow or BLOCK_ALLOW),
+            network=args.network,
+            har_path=args.har,
+        ))
+    finally:
+        if page_cache is not None:
+            print(f"페이지 캐시: 적중 {page_cache.hits}, 미적중 {page_cache.misses} ({page_cache.path})")
+            page_cache.close()
+    results_path = write_results(rows, out_dir)
+
+    finished = sum(1 for r in rows if r["result"] == "finish")
+    print(f"\n완료: {finished}/{len(rows)} 성공, {time.perf_counter() - started:.1f}s -> {results_path}")
+    return 0
+
+
+def _cmd_report(args: argparse.Namespace) -> int:
+    rows = profile_report.load_spans(args.logs or DEFAULT_REPORT_LOGS)
+    print(profile_report.format_report(profile_report.summarize(rows), len(rows)))
+    if args.folded:
+        with open(args.folded, "w", encoding="utf-8") as f:
+            f.write("\n".join(profile_report.folded_stacks(rows)) + "\n")
+        print(f"\nfolded stack -> {args.folded}")
+    return 0 if rows else 1
+
+
+def _cmd_bench(args: argparse.Namespace) -> int:
+    return observe_bench.main(
+        args.dir, args.repeat, args.json, args.baseline,
+        parser=args.parser, compare_parsers=args.compare_parsers,
+    )
+
+
+def _cmd_export(args: argparse.Namespace) -> int:
+    out = args.out or f"runs.{args.format}"
+    try:
+        count = run_recorder.export_runs(args.logs or DEFAULT_REPORT_LOGS, out, args.format)
+    except ValueError as e:
+        print(f"--- ❌ 내보내기 실패 ---: {e}")
+        return 1
+    print(f"스텝 {count}개 -> {out}")
+    return 0 if count else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="uxagent")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    batch = sub.add_parser("batch", help="목표/페르소나 파일의 항목을 병렬로 실행")
+    batch.add_argument("goals", help=".jsonl 또는 '---'로 구분된 텍스트 파일")
+    batch.add_argument("--concurrency", type=int, default=4, help="동시 세션 수 (BrowserPool 크기)")
+    batch.add_argument("--contexts-per-browser", type=int, default=4)
+    batch.add_argument("--max-steps", type=int, default=MAX_STEPS)
+    batch.add_argument("--out", help="출력 디렉터리 (기본: batches/batch_<시각>)")
+    batch.add_argument("--llm", choices=["openai", "mock"], help="LLM provider (기본: UXAGENT_LLM_PROVIDER)")
+    batch.add_argument("--mock-latency-ms", type=float, default=500, help="--llm mock일 때 호출당 지연")
+    batch.add_argument(
+        "--block", choices=list(BLOCK_POLICIES), default=BLOCK_RESOURCES,
+        help="요청 차단 정책 (assets: 이미지/폰트/미디어, lean: assets + 제3자 도메인, 켜면 브라우저 HTTP 캐시가 꺼짐)"
+    )
+    batch.add_argument("--allow", action="append", help="차단하지 않을 호스트/URL 패턴 (여러 번 지정 가능)")
+    batch.add_argument(
+        "--network", choices=["live", "replay"], default="live",
+        help="replay: --har 파일에서만 응답 (기록은 main.py의 NETWORK_MODE=\"record\"로 단일 세션 실행)"
+    )
+    batch.add_argument("--har", default=HAR_PATH, help=f"재생할 HAR 파일 (기본: {HAR_PATH})")
+    batch.add_argument(
+        "--page-cache", nargs="?", const=DEFAULT_PAGE_CACHE_PATH,
+        help=f"실행 간 페이지 캐시 파일 (경로 생략 시 {DEFAULT_PAGE_CACHE_PATH}, bs4 엔진으로 관찰)"
+    )
+    batch.set_defaults(func=_cmd_batch)
+
+    report = sub.add_parser("report", help="실행 로그의 구간별 소요 시간(p50/p95) 집계")
+    report.add_argument("logs", nargs="*", help=f"로그 파일 또는 glob 패턴 (기본: {' '.join(DEFAULT_REPORT_LOGS)})")
+    report.add_argument("--folded", help="flamegraph.pl / speedscope용 folded stack 파일 경로")
+    report.set_defaults(func=_cmd_report)
+
+    bench = sub.add_parser("bench", help="저장된 HTML로 observe 요약 성능/골든 일치 확인 (브라우저 불필요)")
+    bench.add_argument("--dir", default=".", help="observe_N_raw.html / observe_N_summary.txt가 있는 디렉터리")
+    bench.add_argument("--repeat", type=int, default=observe_bench.DEFAULT_REPEAT)
+    bench.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    bench.add_argument("--baseline", help="이전 --json 결과와 비교해 느려졌으면 실패")
+    bench.add_argument("--parser", choices=list(HTML_PARSERS), default="html.parser", help="HTML 파서 백엔드")
+    bench.add_argument("--compare-parsers", action="store_true", help="html.parser와 lxml을 모두 돌려 속도 비교")
+    bench.set_defaults(func=_cmd_bench)
+
+    export = sub.add_parser("export", help="실행 로그의 스텝을 압축 컬럼형 파일(Parquet/Arrow) 하나로 내보내기")
+    export.add_argument("logs", nargs="*", help=f"로그 파일 또는 glob 패턴 (기본: {' '.join(DEFAULT_REPORT_LOGS)})")
+    export.add_argument("--out", help="출력 경로 (기본: runs.<format>)")
+    export.add_argument("--format", choices=list(run_recorder.EXPORT_FORMATS), default="parquet")
+    export.set_defaults(func=_cmd_export)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,595 @@
+from typing import Any, Dict, List, Optional, Tuple
+import difflib
+
+from playwright.sync_api import Page
+
+# --- 브라우저 내부(page.evaluate)에서 실행되는 DOM 직렬화기 ---
+# browser_module.observe의 BeautifulSoup 경로(_pre_process_actionable, _extract_alerts,
+# node_to_text, walk)와 같은 규칙으로 라이브 DOM을 순회해서 요약본 문자열을 바로 돌려줍니다.
+# page.content() -> html.parser 재파싱 -> decompose 왕복이 없어지는 것이 핵심입니다.
+#
+# bs4 경로와 맞추기 위해 신경 쓴 부분:
+#   * 노이즈 태그(script, style, svg ...)는 하위 트리째 건너뜀 (decompose와 동일)
+#   * 연속된 텍스트 노드는 하나로 합침 (page.content() 직렬화 후 재파싱하면 하나의 문자열이 됨)
+#   * 컨테이너 태그의 '직접 텍스트'에는 주석도 포함 (find_all(string=True, recursive=False)와 동일)
+#   * 120자 자르기는 UTF-16 단위가 아니라 코드 포인트 단위 (파이썬 슬라이싱과 동일)
+#
+# visibility 옵션은 라이브 DOM에서만 알 수 있는 정보라 bs4 경로에는 없습니다.
+#   * "rendered": 실제로 렌더링된 요소만 (display:none 모달, opacity:0, visibility:hidden 제외)
+#   * "viewport": rendered + 뷰포트 위아래 VIEWPORT_MARGIN_PX 안에 걸친 요소만 (좌우로 밀려난 캐러셀 항목 제외)
+# 가시성과 위치는 직렬화와 같은 page.evaluate 호출 안에서 요소마다 한 번씩만 확인합니다.
+SERIALIZE_JS = r"""
+({ maxDepth, incremental, stamp, visibility, margin }) => {
+  const NOISE = new Set(["script", "style", "link", "meta", "noscript", "svg", "path"]);
+  const INTERESTING = new Set([
+    "header", "nav", "main", "section", "article", "footer",
+    "div", "ul", "ol", "li",
+    "h1", "h2", "h3", "h4", "p", "span",
+    "button", "img",
+    "input", "textarea", "select", "label",
+  ]);
+  const CONTENT = new Set(["label", "button", "h1", "h2", "h3", "h4", "p", "span", "a"]);
+  const FORCE_DEEP = new Set(["label", "input", "textarea", "select", "button"]);
+  const COLLAPSIBLE = new Set(["div", "span", "li"]);
+  const ACTIONABLE_TAGS = new Set(["button", "input", "textarea", "select"]);
+  const ACTIONABLE_ROLES = new Set(["button", "link", "tab", "checkbox"]);
+  const ALERT_SELECTORS = [
+    'div[class*="fixed"][class*="bg-red-"]',
+    'div[class*="absolute"][class*="bg-red-"]',
+    'ol[class*="fixed top-0"] li',
+    'ul[class*="fixed top-0"] li',
+    'div[data-sonner-toast]',
+  ];
+  const NOISE_SELECTOR = Array.from(NOISE).join(",");
+  const WS = /\s+/g;
+  const ELEMENT = 1, TEXT = 3, CDATA = 4, COMMENT = 8;
+  const AID_ATTR = "data-uxagent-aid";
+  const VISIBILITY_ATTRS = /^(class|style|hidden|open|aria-.*|data-.*)$/;
+
+  const tagOf = (el) => el.nodeName.toLowerCase();
+  const isNoise = (node) => node.nodeType === ELEMENT && NOISE.has(tagOf(node));
+  const isText = (node) => node.nodeType === TEXT || node.nodeType === CDATA;
+
+  // --- 가시성 필터 (visibility: null | "rendered" | "viewport") ---
+  // isRendered(el): false면 하위 트리 전체가 안 보임 (display:none, content-visibility, opacity:0 - 조상 포함)
+  // lineShown(el): 자기 줄을 찍을지 (visibility:hidden은 자식이 다시 보일 수 있으므로 자기 줄만 뺌,
+  //                viewport 모드에서는 뷰포트 위아래 margin px 밖이거나 좌우로 벗어난 요소도 뺌)
+  // getBoundingClientRect는 첫 호출에서만 레이아웃을 계산하고, walk 중에는 DOM을 바꾸지 않으므로 나머지는 캐시된 값입니다.
+  const vw = window.innerWidth, vh = window.innerHeight;
+  const offscreen = { above: 0, below: 0, side: 0 };
+  const isRendered = !visibility ? () => true : (el) => el.checkVisibility
+    ? el.checkVisibility({ checkOpacity: true })
+    : getComputedStyle(el).display !== "none";
+  const lineShown = !visibility ? () => true : (el) => {
+    const shown = el.checkVisibility
+      ? el.checkVisibility({ checkVisibilityCSS: true })
+      : getComputedStyle(el).visibility === "visible";
+    if (!shown) return false;
+    if (visibility !== "viewport") return true;
+    const r = el.getBoundingClientRect();
+    if (r.bottom < -margin) offscreen.above++;
+    else if (r.top > vh + margin) offscreen.below++;
+    else if (r.right <= 0 || r.left >= vw) offscreen.side++;
+    else return true;
+    return false;
+  };
+
+  // node.stripped_strings 와 동일: 하위 텍스트를 (연속 텍스트 노드는 합쳐서) strip 후 수집
+  const collectStrings = (node, out) => {
+    let run = null;
+    for (const child of node.childNodes) {
+      if (isText(child)) {
+        run = run === null ? child.data : run + child.data;
+        continue;
+      }
+      if (run !== null) {
+        const s = run.trim();
+        if (s) out.push(s);
+        run = null;
+      }
+      if (child.nodeType === ELEMENT && !isNoise(child) && isRendered(child)) collectStrings(child, out);
+    }
+    if (run !== null) {
+      const s = run.trim();
+      if (s) out.push(s);
+    }
+    return out;
+  };
+
+  // node.find_all(string=True, recursive=False) 와 동일: 직접 자식 텍스트 + 주석
+  const directStrings = (node) => {
+    const out = [];
+    let run = null;
+    for (const child of node.childNodes) {
+      if (isText(child)) {
+        run = run === null ? child.data : run + child.data;
+        continue;
+      }
+      if (run !== null) {
+        const s = run.trim();
+        if (s) out.push(s);
+        run = null;
+      }
+      if (child.nodeType === COMMENT) {
+        const s = child.data.trim();
+        if (s) out.push(s);
+      }
+    }
+    if (run !== null) {
+      const s = run.trim();
+      if (s) out.push(s);
+    }
+    return out;
+  };
+
+  const clip = (s, n) => (s.length <= n ? s : Array.from(s).slice(0, n).join(""));
+
+  const nodeToText = (node, name) => {
+    const parts = CONTENT.has(name) ? collectStrings(node, []) : directStrings(node);
+    return clip(parts.join(" ").replace(WS, " "), 120);
+  };
+
+  // --- 알림(Alert) 추출 (_extract_alerts와 동일, 셀렉터 순서대로) ---
+  const lines = [];
+  const seenAlerts = new Set();
+  for (const selector of ALERT_SELECTORS) {
+    for (const alert of document.querySelectorAll(selector)) {
+      if (alert.closest(NOISE_SELECTOR) || !isRendered(alert)) continue;
+      const text = collectStrings(alert, []).join(" ").replace(WS, " ");
+      if (text && !seenAlerts.has(text)) {
+        lines.push(`  <alert> ${text}`);
+        seenAlerts.add(text);
+      }
+    }
+  }
+  if (lines.length) {
+    lines.unshift("[!] CURRENT ALERTS:");
+    lines.push("---");
+  }
+
+  const body = document.body || document.documentElement;
+
+  // --- 실행 가능 요소 판별 (browser_module._is_actionable과 동일) ---
+  const isActionable = (el, name) =>
+    ACTIONABLE_TAGS.has(name) ||
+    (name === "a" && el.hasAttribute("href")) ||
+    (name === "label" && el.hasAttribute("for")) ||
+    el.hasAttribute("data-testid") ||
+    ACTIONABLE_ROLES.has(el.getAttribute("role"));
+
+  // --- 증분 모드: 이전 스냅샷의 하위 트리 캐시 + MutationObserver ---
+  // 캐시 항목은 {gen, start, end, depth}: 해당 요소의 walk 결과가 어느 세대(gen)의 몇 번째 줄부터
+  // 몇 번째 줄까지인지만 기억합니다. 세대 배열은 불변이므로 하위 항목도 그대로 재사용할 수 있습니다.
+  // 변경이 생긴 노드는 자기 자신과 모든 조상의 캐시를 지웁니다.
+  // visibility 모드에서는 자손의 가시성이 CSS 선택자로 컨테이너 상태에 묶여 있을 수 있으므로
+  // (.menu:not(.open) li, Tailwind group-*/peer-*) 다음 경우엔 하위 트리 캐시를 통째로 버립니다.
+  //   * class/style/hidden/open/aria-*/data-* 속성이 바뀐 요소의 하위 트리
+  //   * change 이벤트(:checked 등 속성이 아닌 상태)가 난 요소의 부모 하위 트리 (~, + 형제 선택자 포함)
+  //   * transition/animation이 끝난 요소의 하위 트리 (변경 기록 없이 opacity 등이 바뀜)
+  //   * 창 크기 변경(media query)이면 캐시 전체
+  let state = window.__uxagentObserve;
+  const reusable = incremental && state && !state.stale &&
+    state.maxDepth === maxDepth && state.visibility === visibility;
+  if (incremental && !reusable) {
+    if (state) state.disconnect();
+    const subtreeCache = new WeakMap();
+    const dropSubtree = (el) => {
+      if (!el || el.nodeType !== ELEMENT) return;
+      subtreeCache.delete(el);
+      for (const d of el.querySelectorAll("*")) subtreeCache.delete(d);
+    };
+    const dropAncestors = (node) => {
+      for (let n = node; n; n = n.parentNode) subtreeCache.delete(n);
+    };
+    const invalidate = (records) => {
+      for (const record of records) {
+        if (record.type === "attributes" && record.attributeName === AID_ATTR) continue;
+        dropAncestors(record.target);
+        if (visibility && record.type === "attributes" && VISIBILITY_ATTRS.test(record.attributeName)) {
+          dropSubtree(record.target);
+        }
+        // 분리된 상태에서 바뀌었다가 다시 붙은 하위 트리는 기록이 안 남을 수 있으므로 통째로 버림
+        for (const added of record.addedNodes || []) dropSubtree(added);
+      }
+    };
+    const observer = new MutationObserver(invalidate);
+    observer.observe(document.documentElement, {
+      subtree: true, childList: true, attributes: true, characterData: true,
+    });
+    const listeners = [];
+    if (visibility) {
+      const onChange = (e) => { dropAncestors(e.target); dropSubtree(e.target.parentNode); };
+      const onStyleEnd = (e) => { dropAncestors(e.target); dropSubtree(e.target); };
+      const onResize = () => { state.stale = true; };
+      listeners.push(
+        [document, "change", onChange], [document, "transitionend", onStyleEnd],
+        [document, "animationend", onStyleEnd], [window, "resize", onResize],
+      );
+      for (const [target, type, fn] of listeners) target.addEventListener(type, fn, true);
+    }
+    const disconnect = () => {
+      observer.disconnect();
+      for (const [target, type, fn] of listeners) target.removeEventListener(type, fn, true);
+    };
+    state = window.__uxagentObserve = {
+      observer, disconnect, cache: subtreeCache, invalidate, maxDepth, visibility, stale: false,
+    };
+  }
+  if (reusable) state.invalidate(state.observer.takeRecords());
+  const cache = incremental ? state.cache : null;
+
+  // ax-id는 요약본에 찍히는 순서대로 매깁니다. 캐시된 줄을 재사용해도 번호가 맞도록
+  // 줄에는 자리표시자만 남기고, 요소는 aidEls에 따로 둔 뒤 마지막에 번호를 채웁니다.
+  const AID = "\u0000";
+  const gen = { text: [], aidEls: [] };
+  let reused = 0;
+  let rendered = 0;
+
+  const emitChildren = (node, depth) => {
+    for (const child of node.childNodes) walk(child, depth);
+  };
+
+  const walk = (node, depth) => {
+    if (node.nodeType !== ELEMENT) return;
+    const name = tagOf(node);
+    if (NOISE.has(name)) return;
+
+    const forceDeep = FORCE_DEEP.has(name);
+    if (depth > maxDepth && !forceDeep) return;
+    if (!isRendered(node)) return;
+
+    if (cache) {
+      const hit = cache.get(node);
+      if (hit && hit.depth === depth) {
+        for (let i = hit.start; i < hit.end; i++) {
+          gen.text.push(hit.gen.text[i]);
+          gen.aidEls.push(hit.gen.aidEls[i]);
+        }
+        reused += hit.end - hit.start;
+        return;
+      }
+    }
+    const start = gen.text.length;
+    render(node, name, depth, forceDeep);
+    if (cache) cache.set(node, { gen, start, end: gen.text.length, depth });
+  };
+
+  const render = (node, name, depth, forceDeep) => {
+    const axId = isActionable(node, name);
+
+    if ((INTERESTING.has(name) || axId || forceDeep) && lineShown(node)) {
+      const textPart = nodeToText(node, name);
+
+      if (!textPart && COLLAPSIBLE.has(name) && !forceDeep) {
+        emitChildren(node, depth + 1);
+        return;
+      }
+
+      const extra = [];
+      if (axId) extra.push(` ax-id=${AID}`);
+      const href = attr(node, "href");
+      if (href) extra.push(` href=${href}`);
+      if (name === "img") {
+        const alt = attr(node, "alt");
+        if (alt) extra.push(` alt=${alt}`);
+      }
+      if (name === "input") {
+        for (const key of ["type", "id", "placeholder"]) {
+          const v = attr(node, key);
+          if (v) extra.push(` ${key}=${v}`);
+        }
+        const value = attr(node, "value");
+        if (value) extra.push(` value="${value}"`);
+      }
+      if (name === "label") {
+        const forAttr = attr(node, "for");
+        if (forAttr) extra.push(` for=${forAttr}`);
+      }
+      const testid = attr(node, "data-testid");
+      if (testid) extra.push(` data-testid=${testid}`);
+
+      gen.text.push(`${"  ".repeat(depth)}<${name}${extra.join("")}> ${textPart}`.trimEnd());
+      gen.aidEls.push(axId ? node : null);
+      rendered++;
+
+      emitChildren(node, depth + 1);
+    } else {
+      emitChildren(node, depth + 1);
+    }
+  };
+
+  const attr = (el, key) => el.getAttribute(key);
+
+  walk(body, 0);
+
+  // stamp: 번호를 라이브 요소에 data-uxagent-aid로 찍어 act()가 바로 찾을 수 있게 함 (이전 도장은 제거)
+  if (stamp) {
+    for (const el of document.querySelectorAll(`[${AID_ATTR}]`)) el.removeAttribute(AID_ATTR);
+  }
+  let aidCounter = 1;
+  for (let i = 0; i < gen.text.length; i++) {
+    const el = gen.aidEls[i];
+    if (!el) {
+      lines.push(gen.text[i]);
+      continue;
+    }
+    const aid = `aid-${aidCounter++}`;
+    if (stamp) el.setAttribute(AID_ATTR, aid);
+    lines.push(gen.text[i].replace(AID, aid));
+  }
+  const hidden = offscreen.above + offscreen.below + offscreen.side;
+  if (hidden) {
+    lines.push(
+      `… (화면 밖 요소 ${hidden}개 생략: 위 ${offscreen.above}, 아래 ${offscreen.below}, 옆 ${offscreen.side}` +
+      ` — scroll 액션으로 이동하면 보입니다)`
+    );
+  }
+  return {
+    summary: lines.join("\n"),
+    incremental: Boolean(reusable),
+    aids: aidCounter - 1,
+    reused,
+    rendered,
+  };
+}
+"""
+
+
+# bs4 경로용 도장 찍기: 파이썬 쪽 트리에서 계산한 '노이즈 제거 후 body 하위 요소 순번'으로
+# 라이브 요소를 찾아 ax-id를 찍습니다. page.content()는 라이브 DOM의 직렬화이므로
+# 노이즈 하위 트리를 건너뛴 요소 순서는 soup.body.find_all(True)와 같습니다.
+# 태그 이름이 다르면(파서 차이) 그 ax-id는 건너뛰고, 실제로 찍힌 ax-id 목록을 돌려줍니다.
+STAMP_AIDS_JS = r"""
+(targets) => {
+  const NOISE = new Set(["script", "style", "link", "meta", "noscript", "svg", "path"]);
+  const AID_ATTR = "data-uxagent-aid";
+  const body = document.body || document.documentElement;
+
+  const elements = [];
+  const collect = (el) => {
+    for (const child of el.childNodes) {
+      if (child.nodeType !== 1 || NOISE.has(child.nodeName.toLowerCase())) continue;
+      elements.push(child);
+      collect(child);
+    }
+  };
+  collect(body);
+
+  for (const el of document.querySelectorAll(`[${AID_ATTR}]`)) el.removeAttribute(AID_ATTR);
+  const stamped = [];
+  for (const [index, name, aid] of targets) {
+    const el = elements[index];
+    if (!el || el.nodeName.toLowerCase() !== name) continue;
+    el.setAttribute(AID_ATTR, aid);
+    stamped.push(aid);
+  }
+  return stamped;
+}
+"""
+
+# --- act 배치 중 알림 확인 ---
+# observe 없이 지금 떠 있는 알림 요소만 빠르게 읽어 [요소 번호, 텍스트] 목록으로 돌려줍니다.
+# (셀렉터는 browser_module._ALERT_SELECTORS를 넘겨받음)
+# 요소 번호는 페이지 안 WeakMap에 요소마다 한 번 매기므로, 같은 문구로 다시 뜬 토스트(새 요소)와
+# 계속 떠 있는 알림(같은 요소)을 텍스트가 같아도 구분할 수 있습니다.
+# 텍스트를 만드는 규칙은 SERIALIZE_JS의 알림 추출과 같고, 렌더링되지 않은 알림(숨겨 둔 토스트 틀 등)은 뺍니다.
+ALERTS_JS = r"""
+(selectors) => {
+  const NOISE = new Set(["script", "style", "link", "meta", "noscript", "svg", "path"]);
+  const NOISE_SELECTOR = Array.from(NOISE).join(",");
+  const isRendered = (el) => el.checkVisibility
+    ? el.checkVisibility({ checkOpacity: true })
+    : getComputedStyle(el).display !== "none";
+  const collectStrings = (node, out) => {
+    let run = null;
+    for (const child of node.childNodes) {
+      if (child.nodeType === 3 || child.nodeType === 4) {
+        run = run === null ? child.data : run + child.data;
+        continue;
+      }
+      if (run !== null) {
+        const s = run.trim();
+        if (s) out.push(s);
+        run = null;
+      }
+      if (child.nodeType === 1 && !NOISE.has(child.nodeName.toLowerCase()) && isRendered(child)) {
+        collectStrings(child, out);
+      }
+    }
+    if (run !== null) {
+      const s = run.trim();
+      if (s) out.push(s);
+    }
+    return out;
+  };
+
+  const ids = window.__uxagentAlertIds || (window.__uxagentAlertIds = { map: new WeakMap(), next: 1 });
+  const seen = new Set();
+  const alerts = [];
+  for (const selector of selectors) {
+    for (const alert of document.querySelectorAll(selector)) {
+      if (seen.has(alert) || alert.closest(NOISE_SELECTOR) || !isRendered(alert)) continue;
+      seen.add(alert);
+      const text = collectStrings(alert, []).join(" ").replace(/\s+/g, " ");
+      if (!text) continue;
+      if (!ids.map.has(alert)) ids.map.set(alert, ids.next++);
+      alerts.push([ids.map.get(alert), text]);
+    }
+  }
+  return alerts;
+}
+"""
+
+# --- 페이지 지문 (page_cache) ---
+# 요약본에 영향을 주는 것만 해시합니다: 노이즈 제외 요소의 태그/구조, 요약에 찍히거나 ax-id/알림 판별에 쓰이는 속성,
+# 텍스트/주석, (visibility가 있으면) 요소별 가시성. input의 value는 빼고 적중 시 AID_STATE_JS로 채웁니다.
+# 문자열을 파이썬으로 넘기지 않도록 페이지 안에서 32비트 해시 두 개(64비트)로 줄입니다.
+FINGERPRINT_JS = r"""
+({ visibility }) => {
+  const NOISE = new Set(["script", "style", "link", "meta", "noscript", "svg", "path"]);
+  const ATTRS = ["id", "class", "role", "for", "href", "alt", "type", "placeholder", "data-testid", "data-sonner-toast"];
+  let h1 = 0x811c9dc5, h2 = 0x9e3779b9;
+  const feed = (s) => {
+    for (let i = 0; i < s.length; i++) {
+      const c = s.charCodeAt(i);
+      h1 = Math.imul(h1 ^ c, 16777619);
+      h2 = Math.imul(h2 ^ c, 0x5bd1e995);
+      h2 ^= h2 >>> 15;
+    }
+    h1 = Math.imul(h1 ^ 0xffff, 16777619);
+  };
+  const visit = (el) => {
+    const name = el.nodeName.toLowerCase();
+    feed("<" + name);
+    for (const key of ATTRS) {
+      const v = el.getAttribute(key);
+      if (v !== null) feed(` ${key}=${v}`);
+    }
+    if (visibility && el.checkVisibility) {
+      if (!el.checkVisibility({ checkOpacity: true })) {
+        feed("!hidden>");
+        return;
+      }
+      feed(el.checkVisibility({ checkVisibilityCSS: true }) ? "" : "!invisible");
+    }
+    for (const child of el.childNodes) {
+      if (child.nodeType === 1) {
+        if (!NOISE.has(child.nodeName.toLowerCase())) visit(child);
+      } else if (child.nodeType === 3 || child.nodeType === 4 || child.nodeType === 8) {
+        const t = child.data.trim();
+        if (t) feed((child.nodeType === 8 ? "#" : '"') + t);
+      }
+    }
+    feed(">");
+  };
+  visit(document.body || document.documentElement);
+  const hex = (h) => (h >>> 0).toString(16).padStart(8, "0");
+  return hex(h1) + hex(h2);
+}
+"""
+
+# 캐시 적중 시 targets([요소 순번, 태그, ax-id])대로 ax-id를 다시 찍고(STAMP_AIDS_JS와 같은 순번),
+# targets가 null이면 지금 찍혀 있는 ax-id의 순번만 읽습니다. 둘 다 input의 현재 value 속성을 함께 돌려줍니다.
+AID_STATE_JS = r"""
+(targets) => {
+  const NOISE = new Set(["script", "style", "link", "meta", "noscript", "svg", "path"]);
+  const AID_ATTR = "data-uxagent-aid";
+  const body = document.body || document.documentElement;
+
+  const elements = [];
+  const collect = (el) => {
+    for (const child of el.childNodes) {
+      if (child.nodeType !== 1 || NOISE.has(child.nodeName.toLowerCase())) continue;
+      elements.push(child);
+      collect(child);
+    }
+  };
+  collect(body);
+
+  if (targets) {
+    for (const el of document.querySelectorAll(`[${AID_ATTR}]`)) el.removeAttribute(AID_ATTR);
+    for (const [index, name, aid] of targets) {
+      const el = elements[index];
+      if (el && el.nodeName.toLowerCase() === name) el.setAttribute(AID_ATTR, aid);
+    }
+  }
+  const stamped = [];
+  const values = {};
+  elements.forEach((el, index) => {
+    const aid = el.getAttribute(AID_ATTR);
+    if (aid === null) return;
+    const name = el.nodeName.toLowerCase();
+    stamped.push([index, name, aid]);
+    if (name === "input") values[aid] = el.getAttribute("value") || "";
+  });
+  return { targets: stamped, values };
+}
+"""
+
+AID_ATTRIBUTE = "data-uxagent-aid"
+VISIBILITY_MODES = ("rendered", "viewport")
+# viewport 모드에서 뷰포트 위아래로 이만큼(px)까지는 보이는 것으로 칩니다.
+VIEWPORT_MARGIN_PX = 400
+
+
+def aid_selector(aid: str) -> str:
+    """ax-id가 찍힌 라이브 요소를 가리키는 CSS 셀렉터"""
+    return f'[{AID_ATTRIBUTE}="{aid}"]'
+
+
+def serialize_args(
+    max_depth: int, incremental: bool, stamp: bool, visibility: Optional[str] = None
+) -> Dict[str, Any]:
+    """SERIALIZE_JS 인자 (sync/async 모듈 공용)"""
+    return {
+        "maxDepth": max_depth,
+        "incremental": incremental,
+        "stamp": stamp,
+        "visibility": visibility,
+        "margin": VIEWPORT_MARGIN_PX,
+    }
+
+
+def serialize_dom(
+    page: Page, max_depth: int = 20, stamp: bool = True, visibility: Optional[str] = None
+) -> Tuple[str, int]:
+    """
+    라이브 DOM을 한 번의 page.evaluate 호출로 요약본 문자열로 직렬화합니다.
+    출력 형식은 browser_module.observe(engine="bs4")와 같습니다.
+    stamp=True면 각 ax-id를 해당 요소의 data-uxagent-aid 속성으로 찍습니다.
+    visibility는 None(전체), "rendered", "viewport" 중 하나입니다. (VISIBILITY_MODES 참고)
+    반환값: (요약본, 찍힌 ax-id 개수 = aid-1 ~ aid-N)
+    """
+    result: Dict[str, Any] = page.evaluate(
+        SERIALIZE_JS, serialize_args(max_depth, False, stamp, visibility)
+    )
+    return result["summary"], result["aids"]
+
+
+def serialize_dom_incremental(
+    page: Page, max_depth: int = 20, stamp: bool = True, visibility: Optional[str] = None
+) -> Tuple[str, bool, int]:
+    """
+    serialize_dom의 증분 버전입니다.
+    첫 호출에서 전체 스냅샷을 만들고 MutationObserver를 설치하며,
+    이후 호출에서는 바뀐 하위 트리만 다시 직렬화하고 나머지는 이전 결과를 재사용합니다.
+    반환값: (요약본, 이전 스냅샷 재사용 여부 (페이지 이동 후에는 False), ax-id 개수)
+    """
+    result: Dict[str, Any] = page.evaluate(
+        SERIALIZE_JS, serialize_args(max_depth, True, stamp, visibility)
+    )
+    return result["summary"], bool(result["incremental"]), result["aids"]
+
+
+def stamp_aids(page: Page, targets: List[Tuple[int, str, str]]) -> List[str]:
+    """(노이즈 제거 후 요소 순번, 태그 이름, ax-id) 목록대로 라이브 요소에 ax-id를 찍습니다."""
+    stamped: List[str] = page.evaluate(STAMP_AIDS_JS, [list(t) for t in targets])
+    return stamped
+
+
+def summary_delta(previous: str, current: str) -> Optional[str]:
+    """
+    두 요약본의 차이를 짧은 'delta' 블록으로 만듭니다.
+    바뀐 구간마다 바로 앞의 변하지 않은 줄을 위치 힌트(@@)로 붙입니다.
+    변경이 없으면 빈 블록을, delta가 전체 요약본보다 길면 None을 돌려줍니다. (호출 측에서 전체 요약본 사용)
+    """
+    prev_lines = previous.splitlines()
+    curr_lines = current.splitlines()
+    matcher = difflib.SequenceMatcher(None, prev_lines, curr_lines, autojunk=False)
+
+    out: List[str] = []
+    changed = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        anchor = prev_lines[i1 - 1].strip() if i1 > 0 else "(맨 위)"
+        out.append(f"@@ {anchor}")
+        out.extend(f"- {line}" for line in prev_lines[i1:i2])
+        out.extend(f"+ {line}" for line in curr_lines[j1:j2])
+        changed += max(i2 - i1, j2 - j1)
+
+    header = f"[Δ] CHANGES SINCE LAST OBSERVE: {changed}줄 변경, 전체 {len(curr_lines)}줄"
+    delta = "\n".join([header, *out, "---"])
+    if len(delta) >= len(current):
+        return None
+    return delta
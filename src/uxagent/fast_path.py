@@ -0,0 +1,228 @@
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# --- think() 앞의 규칙 기반 빠른 경로(fast path) ---
+# 관찰 요약본과 목표만 보고도 다음 행동이 분명한 상태(필수 정보 입력, 결제 버튼, 성공 페이지)는
+# LLM 두 번 호출 없이 여기서 바로 action을 만듭니다. 조건이 하나라도 불확실하면 None을 돌려주고 think()로 넘깁니다.
+# 규칙은 RULES에 (이름, 조건 목록, 액션)으로 적고, 조건/액션의 실제 판별은 _CONDITIONS/_ACTIONS가 맡습니다.
+#   - goal_reached:       [성공 조건]의 '메시지'가 관찰에 보이면 finish
+#   - fill_required_info: [필수 정보] 항목과 label이 맞는 입력칸 중 값이 다른 칸을 한 번에 fill (batch)
+#                         항목 하나에 똑같이 잘 맞는 label이 여럿이면('주소' ↔ '이메일 주소', '배송 주소') 건너뜀
+#   - submit_payment:     필수 정보가 다 채워졌고 직전 행동이 결제 수단 선택이었으면 결제 버튼 click
+# 어느 규칙이 맞았는지(hit), 각 규칙이 어떤 조건에서 빠졌는지(miss)는 decide()의 info로 돌려주고 스텝 로그에 남깁니다.
+
+# _find_locator의 하드코딩과 같은 결제 화면 값들
+PAYMENT_TESTID = "button-payment"
+PAYMENT_METHOD_LABELS = ("카드 간편결제", "무통장입금")
+
+RULES: List[Dict[str, Any]] = [
+    {"name": "goal_reached", "when": ("full_summary", "success_text"), "action": "finish"},
+    {
+        "name": "fill_required_info",
+        "when": ("full_summary", "no_alerts", "unambiguous", "fields_to_fill"),
+        "action": "fill_required",
+    },
+    {
+        "name": "submit_payment",
+        "when": ("full_summary", "no_alerts", "unambiguous", "required_filled", "payment_chosen", "payment_button"),
+        "action": "click_payment",
+    },
+]
+
+_LABEL = re.compile(r"<label(?: ax-id=(aid-\d+))? for=(\S+?)>\s*(.*)$")
+_INPUT = re.compile(r"<input ax-id=(aid-\d+)(.*?)>$")
+_INPUT_ID = re.compile(r" id=(\S+)")
+_INPUT_VALUE = re.compile(r' value="(.*)"$')
+_REQUIRED_ITEM = re.compile(r"^\s*-\s*([^:]+):\s*(\S.*)$")
+_QUOTED = re.compile(r"'([^']+)'")
+_PREVIOUS_ACTION = "--- 나의 이전 행동"
+
+
+def goal_required_info(goal: str) -> Dict[str, str]:
+    """목표의 [필수 정보] 블록에서 '항목: 값' 목록을 뽑습니다. (값이 없는 '배송 정보:' 같은 머리줄은 제외)"""
+    items: Dict[str, str] = {}
+    in_block = False
+    for line in goal.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("["):
+            in_block = stripped == "[필수 정보]"
+            continue
+        match = _REQUIRED_ITEM.match(line) if in_block else None
+        if match:
+            items[match.group(1).strip()] = match.group(2).strip()
+    return items
+
+
+def goal_success_text(goal: str) -> Optional[str]:
+    """목표의 [성공 조건]에서 따옴표로 감싼 첫 문구(성공 메시지)를 찾습니다."""
+    _, found, rest = goal.partition("[성공 조건]")
+    match = _QUOTED.search(rest) if found else None
+    return match.group(1) if match else None
+
+
+def _form_fields(observation: str) -> Dict[str, Dict[str, Any]]:
+    """<label for=X> 텍스트 와 <input ax-id=.. id=X value=".."> 를 이어 {label 텍스트: {aid, value}}를 만듭니다."""
+    labels: Dict[str, str] = {}
+    inputs: Dict[str, Dict[str, Any]] = {}
+    for line in observation.splitlines():
+        stripped = line.strip()
+        label = _LABEL.match(stripped)
+        if label and label.group(3):
+            labels.setdefault(label.group(2), label.group(3))
+            continue
+        field = _INPUT.match(stripped)
+        if field:
+            input_id = _INPUT_ID.search(field.group(2))
+            value = _INPUT_VALUE.search(field.group(2))
+            if input_id:
+                inputs[input_id.group(1)] = {"aid": field.group(1), "value": value.group(1) if value else ""}
+    return {text: inputs[for_id] for for_id, text in labels.items() if for_id in inputs}
+
+
+def _match_required(
+    required: Dict[str, str], fields: Dict[str, Dict[str, Any]]
+) -> Tuple[List[Tuple[str, str, Dict[str, Any]]], List[str]]:
+    """
+    필수 정보 항목마다 입력칸을 짝짓습니다. label이 같은 칸이 먼저이고, 없으면 서로 포함되는 label 중
+    겹치는 부분이 가장 긴 칸입니다. (예: '주소' ↔ '배송 주소')
+    반환값: (짝지은 (항목, 값, 입력칸) 목록, 가장 잘 맞는 label이 여럿이라 정하지 못한 항목 목록)
+    """
+    matched: List[Tuple[str, str, Dict[str, Any]]] = []
+    ambiguous: List[str] = []
+    for key, value in required.items():
+        if key in fields:
+            matched.append((key, value, fields[key]))
+            continue
+        overlaps = {
+            label: min(len(key), len(label)) for label in fields if key in label or label in key
+        }
+        if not overlaps:
+            continue
+        best = max(overlaps.values())
+        labels = [label for label, size in overlaps.items() if size == best]
+        if len(labels) > 1:
+            ambiguous.append(key)
+            continue
+        matched.append((key, value, fields[labels[0]]))
+    return matched, ambiguous
+
+
+def _last_action(history: List[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+    for entry in reversed(history):
+        head, _, body = entry.get("content", "").partition("\n")
+        if head.startswith(_PREVIOUS_ACTION):
+            try:
+                return json.loads(body)
+            except json.JSONDecodeError:
+                return None
+    return None
+
+
+def _line_with_aid(observation: str, aid: str) -> str:
+    marker = f" ax-id={aid}"
+    lines = observation.splitlines()
+    for index, line in enumerate(lines):
+        if line.endswith(marker) or f"{marker} " in line or f"{marker}>" in line:
+            # 텍스트 없는 라디오 버튼이면 바로 다음 줄(label)까지 봄
+            return line + (lines[index + 1] if index + 1 < len(lines) else "")
+    return ""
+
+
+def _chose_payment(action: Optional[Dict[str, Any]], observation: str) -> bool:
+    """직전 행동이 결제 수단(PAYMENT_METHOD_LABELS) 클릭이었는지. batch면 마지막 액션을 봅니다."""
+    if action and action.get("name") == "batch":
+        actions = action.get("params", {}).get("actions") or [{}]
+        action = actions[-1]
+    if not action or action.get("name") != "click":
+        return False
+    params = action.get("params", {})
+    target = params.get("label") or params.get("text") or ""
+    if not target and params.get("aid"):
+        target = _line_with_aid(observation, params["aid"])
+    return any(label in target for label in PAYMENT_METHOD_LABELS)
+
+
+def _payment_aid(observation: str) -> Optional[str]:
+    for line in observation.splitlines():
+        if f"data-testid={PAYMENT_TESTID}" in line:
+            match = re.search(r"ax-id=(aid-\d+)", line)
+            return match.group(1) if match else None
+    return None
+
+
+def _state(observation: str, goal: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
+    required, ambiguous = _match_required(goal_required_info(goal), _form_fields(observation))
+    return {
+        "observation": observation,
+        "success_text": goal_success_text(goal),
+        "required": required,
+        "ambiguous": ambiguous,
+        "to_fill": [(key, value, field) for key, value, field in required if field["value"] != value],
+        "last_action": _last_action(history),
+    }
+
+
+_CONDITIONS: Dict[str, Callable[[Dict[str, Any]], bool]] = {
+    # delta 블록([Δ])은 바뀐 줄만 있으므로 폼 전체 상태를 알 수 없음
+    "full_summary": lambda s: not s["observation"].startswith("[Δ]"),
+    "success_text": lambda s: bool(s["success_text"]) and s["success_text"] in s["observation"],
+    # 알림이 떠 있으면 이전 행동이 실패했을 수 있으므로 전략가에게 맡김
+    "no_alerts": lambda s: not s["observation"].startswith("[!]"),
+    # 어느 입력칸인지 확실하지 않은 항목이 있으면 LLM이 고르게 함
+    "unambiguous": lambda s: not s["ambiguous"],
+    "fields_to_fill": lambda s: bool(s["to_fill"]),
+    "required_filled": lambda s: bool(s["required"]) and not s["to_fill"],
+    "payment_chosen": lambda s: _chose_payment(s["last_action"], s["observation"]),
+    "payment_button": lambda s: _payment_aid(s["observation"]) is not None,
+}
+
+
+def _fill_required(s: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    fills = [
+        {"name": "fill", "params": {"aid": field["aid"], "value": value}}
+        for _, value, field in s["to_fill"]
+    ]
+    keys = ", ".join(f"'{key}'" for key, _, _ in s["to_fill"])
+    thought = f"[빠른 경로] 필수 정보 {keys}을(를) 목표에 적힌 값으로 입력합니다."
+    if len(fills) == 1:
+        return thought, fills[0]
+    return thought, {"name": "batch", "params": {"actions": fills}}
+
+
+_ACTIONS: Dict[str, Callable[[Dict[str, Any]], Tuple[str, Dict[str, Any]]]] = {
+    "finish": lambda s: (
+        f"[빠른 경로] '{s['success_text']}' 메시지가 보이므로 목표를 달성했습니다.",
+        {"name": "finish", "params": {"reason": f"'{s['success_text']}' 확인"}},
+    ),
+    "fill_required": _fill_required,
+    "click_payment": lambda s: (
+        "[빠른 경로] 필수 정보와 결제 수단 선택이 끝났으므로 '결제하기' 버튼을 누릅니다.",
+        {"name": "click", "params": {"aid": _payment_aid(s["observation"])}},
+    ),
+}
+
+
+def decide(
+    observation: str, goal: str, history: List[Dict[str, str]]
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    RULES를 순서대로 검사해서 처음 맞는 규칙의 결정을 think()와 같은 모양({"thought", "action", "metrics"})으로 돌려줍니다.
+    맞는 규칙이 없으면 (None, info). info: {"rule": 맞은 규칙 이름 또는 None, "misses": {규칙: 처음 실패한 조건}}
+    """
+    state = _state(observation, goal, history)
+    misses: Dict[str, str] = {}
+    for rule in RULES:
+        failed = next((c for c in rule["when"] if not _CONDITIONS[c](state)), None)
+        if failed:
+            misses[rule["name"]] = failed
+            continue
+        thought, action = _ACTIONS[rule["action"]](state)
+        if action == state["last_action"]:
+            # 같은 행동을 그대로 반복하려 하면 효과가 없었다는 뜻이므로 LLM에게 넘김
+            misses[rule["name"]] = "repeat"
+            continue
+        print(f"⚡ 빠른 경로 ({rule['name']}): {thought}")
+        decision = {"thought": thought, "action": action, "metrics": {"mode": "fast_path", "rule": rule["name"]}}
+        return decision, {"rule": rule["name"], "misses": misses}
+    return None, {"rule": None, "misses": misses}
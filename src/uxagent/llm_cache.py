@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# --- LLM 응답 캐시 / 기록-재생(record-replay) ---
+# (provider, 모델, 메시지, 호출 파라미터)의 해시를 키로 응답 텍스트를 SQLite에 저장합니다.
+# 같은 관찰/히스토리로 다시 돌리면 OpenAI를 부르지 않고 저장된 응답을 씁니다.
+# provider 이름이 키에 들어가므로 mock 응답이 같은 모델 이름의 실제 응답으로 재생되지 않습니다.
+#
+# 모드 (환경변수 UXAGENT_LLM_CACHE 또는 LLMCache(mode=...)):
+#   - "off":    캐시 사용 안 함 (기본값)
+#   - "rw":     캐시에 있으면 사용, 없으면 호출 후 저장
+#   - "replay": 캐시에 있는 응답만 사용, 없으면 ReplayMiss (네트워크/API 키 없이 회귀 실행)
+CACHE_MODES = ("off", "rw", "replay")
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_cache.sqlite3")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ReplayMiss(LookupError):
+    """replay 모드에서 기록되지 않은 요청이 들어온 경우"""
+
+
+def make_key(provider: str, model: str, messages: List[Dict[str, str]], **params: Any) -> str:
+    payload = json.dumps(
+        {"provider": provider, "model": model, "messages": messages, "params": params},
+        ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    SQLite 기반 내용 주소(content-addressed) 캐시입니다.
+    max_bytes를 넘으면 가장 오래 안 쓰인 항목부터 지웁니다. (LRU, 90%까지)
+    여러 스레드(asyncio.to_thread)에서 함께 쓰므로 연결 하나를 락으로 보호합니다.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, mode: str = "rw", max_bytes: int = DEFAULT_MAX_BYTES):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"지원하지 않는 캐시 모드입니다: {mode} (가능: {CACHE_MODES})")
+        self.mode = mode
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if mode != "off":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT, response TEXT, size INTEGER,"
+                " created REAL, last_used REAL, hits INTEGER DEFAULT 0)"
+            )
+            self._conn.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def replay(self) -> bool:
+        return self.mode == "replay"
+
+    def get(self, key: str) -> Optional[str]:
+        """저장된 응답을 돌려줍니다. replay 모드에서 없으면 ReplayMiss를 던집니다."""
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+                )
+                self._conn.commit()
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+        if self.replay:
+            raise ReplayMiss(f"replay 모드인데 기록된 LLM 응답이 없습니다: {key[:12]}")
+        return None
+
+    def put(self, key: str, model: str, response: str) -> None:
+        if self._conn is None or self.replay:
+            return
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created, last_used, hits)"
+                " VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, model, response, size, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        assert self._conn is not None
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_used ASC"
+        ).fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def from_env() -> LLMCache:
+    """UXAGENT_LLM_CACHE / UXAGENT_LLM_CACHE_PATH / UXAGENT_LLM_CACHE_MAX_MB 환경변수로 캐시를 만듭니다."""
+    return LLMCache(
+        path=os.environ.get("UXAGENT_LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+        mode=os.environ.get("UXAGENT_LLM_CACHE", "off"),
+        max_bytes=int(os.environ.get("UXAGENT_LLM_CACHE_MAX_MB", DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024,
+    )
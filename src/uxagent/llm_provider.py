@@ -0,0 +1,235 @@
+import json
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import httpx  # openai 패키지의 전송 계층 (연결 풀 크기 지정용)
+except ImportError:
+    httpx = None
+
+# --- LLM provider 추상화 ---
+# think_module은 provider.complete() / provider.stream()만 부르고, 어떤 백엔드인지는 신경 쓰지 않습니다.
+#   - OpenAIProvider: 실제 OpenAI (또는 base_url로 지정한 OpenAI 호환 서버)
+#   - MockProvider:   네트워크/API 키 없이 정해진 thought/action을 돌려주는 대역 (지연 시간 조절 가능)
+# role은 "strategist" / "translator" 중 하나이고, 역할별 모델은 ROLE_MODELS(환경변수)로 정합니다.
+# session은 호출한 실행(run_id)입니다. provider 하나를 여러 세션이 함께 쓰므로, 세션별 상태(MockProvider의
+# 시나리오 위치 등)는 이 값으로 나눕니다. (OpenAIProvider는 쓰지 않음, 캐시 키에도 들어가지 않음)
+
+PROVIDERS = ("openai", "mock")
+ROLES = ("strategist", "translator")
+ROLE_MODELS: Dict[str, str] = {
+    "strategist": os.environ.get("UXAGENT_STRATEGIST_MODEL", "gpt-4o"),
+    "translator": os.environ.get("UXAGENT_TRANSLATOR_MODEL", "gpt-4o"),
+}
+
+
+class LLMProvider(ABC):
+    name = "base"
+
+    def ready(self) -> bool:
+        """호출할 준비가 되었는지 (예: API 키가 있는지)"""
+        return True
+
+    @abstractmethod
+    def complete(
+        self, model: str, messages: List[Dict[str, str]], role: str, session: Optional[str] = None, **params: Any
+    ) -> str:
+        """응답 텍스트 전체를 돌려줍니다."""
+
+    @abstractmethod
+    def stream(
+        self, model: str, messages: List[Dict[str, str]], role: str, session: Optional[str] = None, **params: Any
+    ) -> Iterator[str]:
+        """
+        응답 텍스트 조각(delta)을 차례로 내보내는 generator를 돌려줍니다.
+        중간에 끊으려면 generator의 close()를 호출하세요. (밑단 연결도 함께 닫힘)
+        """
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    OpenAI 클라이언트는 처음 호출할 때 하나만 만들고, 모든 스레드가 그 연결 풀(keep-alive)을 공유합니다.
+    (import 시점에 클라이언트를 만들지 않으므로 API 키가 없어도 모듈 import는 됩니다.)
+    timeout: 요청 하나의 제한 시간(초)
+    max_connections: 동시 연결 상한 (배치 실행의 동시 세션 수 이상으로, httpx가 있을 때만 적용)
+    """
+    name = "openai"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: float = 60.0,
+        max_retries: int = 2,
+        max_connections: int = 32
+    ):
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        self.base_url = base_url or os.environ.get("OPENAI_BASE_URL")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self._client = None
+        self._lock = threading.Lock()
+
+    def ready(self) -> bool:
+        return bool(self.api_key)
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI
+
+                if not self.api_key:
+                    raise ValueError(
+                        "OpenAI API 키가 설정되지 않았습니다. "
+                        "터미널에서 'export OPENAI_API_KEY=your_api_key_here'를 실행하세요."
+                    )
+                options: Dict[str, Any] = {}
+                if httpx is not None:
+                    options["http_client"] = httpx.Client(
+                        timeout=self.timeout,
+                        limits=httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_connections,
+                        ),
+                    )
+                self._client = OpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    timeout=self.timeout,
+                    max_retries=self.max_retries,
+                    **options,
+                )
+            return self._client
+
+    def complete(
+        self, model: str, messages: List[Dict[str, str]], role: str, session: Optional[str] = None, **params: Any
+    ) -> str:
+        response = self._get_client().chat.completions.create(model=model, messages=messages, **params)
+        return response.choices[0].message.content or ""
+
+    def stream(
+        self, model: str, messages: List[Dict[str, str]], role: str, session: Optional[str] = None, **params: Any
+    ) -> Iterator[str]:
+        stream = self._get_client().chat.completions.create(
+            model=model, messages=messages, stream=True, **params
+        )
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        finally:
+            stream.close()
+
+
+# MockProvider의 기본 시나리오: 매 스텝 잠깐 기다리기만 하므로 어떤 페이지에서도 실패하지 않습니다.
+DEFAULT_MOCK_SCRIPT: List[Dict[str, Any]] = [
+    {"thought": "(mock) 현재 페이지를 확인하고 잠시 기다립니다.", "action": {"name": "wait", "params": {"timeout": 200}}},
+]
+
+
+class MockProvider(LLMProvider):
+    """
+    정해진 시나리오(script)대로 답하는 로컬 대역입니다. 부하 테스트용으로 지연 시간을 흉내 냅니다.
+      script:     [{"thought": "...", "action": {"name": ..., "params": {...}}}, ...]
+                  전략가 호출마다 다음 항목으로 넘어가고, 끝나면 처음부터 반복합니다. (loop=False면 finish)
+                  위치는 세션(session)마다 따로 세므로 동시 실행에서도 실행마다 같은 순서로 답합니다.
+      latency_s:  호출 하나의 전체 지연 (jitter_s만큼 무작위로 흔들림)
+      ttft_s:     stream에서 첫 조각이 나오기까지의 지연
+    번역가 호출은 전달받은 thought와 같은 항목의 action을 돌려줍니다.
+    단일 호출 모드(전략가 + JSON 출력)는 {"thought", "action"}을 함께 돌려줍니다.
+    """
+    name = "mock"
+
+    def __init__(
+        self,
+        script: Optional[List[Dict[str, Any]]] = None,
+        latency_s: float = 0.5,
+        jitter_s: float = 0.0,
+        ttft_s: Optional[float] = None,
+        loop: bool = True
+    ):
+        self.script = script or DEFAULT_MOCK_SCRIPT
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.ttft_s = latency_s / 4 if ttft_s is None else ttft_s
+        self.loop = loop
+        self.calls = 0
+        self._positions: Dict[Optional[str], int] = {}
+        self._lock = threading.Lock()
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency_s + random.uniform(-self.jitter_s, self.jitter_s))
+
+    def _next_entry(self, session: Optional[str]) -> Dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+            index = self._positions.get(session, 0)
+            if index >= len(self.script):
+                if not self.loop:
+                    return {"thought": "(mock) 시나리오가 끝났습니다.", "action": {"name": "finish", "params": {"reason": "mock script end"}}}
+                index = 0
+            self._positions[session] = index + 1
+            return self.script[index]
+
+    def _action_for(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+        text = messages[-1]["content"]
+        for entry in self.script:
+            if entry["thought"] in text:
+                return entry["action"]
+        return {"name": "finish", "params": {"reason": "mock: 알 수 없는 thought"}}
+
+    def _respond(
+        self, messages: List[Dict[str, str]], role: str, session: Optional[str], params: Dict[str, Any]
+    ) -> str:
+        if role == "translator":
+            return json.dumps(self._action_for(messages), ensure_ascii=False)
+        entry = self._next_entry(session)
+        if params.get("response_format"):
+            return json.dumps(entry, ensure_ascii=False)
+        return entry["thought"]
+
+    def complete(
+        self, model: str, messages: List[Dict[str, str]], role: str, session: Optional[str] = None, **params: Any
+    ) -> str:
+        time.sleep(self._delay())
+        return self._respond(messages, role, session, params)
+
+    def stream(
+        self, model: str, messages: List[Dict[str, str]], role: str, session: Optional[str] = None, **params: Any
+    ) -> Iterator[str]:
+        total = self._delay()
+        time.sleep(min(self.ttft_s, total))
+        text = self._respond(messages, role, session, params)
+        words = text.split(" ")
+        rest = max(0.0, total - self.ttft_s) / max(1, len(words))
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(rest)
+            yield word if i == 0 else " " + word
+
+
+def from_env(name: Optional[str] = None) -> LLMProvider:
+    """
+    UXAGENT_LLM_PROVIDER=openai|mock 으로 provider를 고릅니다. (name을 주면 환경변수 대신 그 provider)
+      openai: UXAGENT_LLM_TIMEOUT(초), UXAGENT_LLM_MAX_CONNECTIONS, OPENAI_BASE_URL
+      mock:   UXAGENT_MOCK_LATENCY_MS
+    """
+    name = name or os.environ.get("UXAGENT_LLM_PROVIDER", "openai")
+    if name == "openai":
+        return OpenAIProvider(
+            timeout=float(os.environ.get("UXAGENT_LLM_TIMEOUT", 60)),
+            max_connections=int(os.environ.get("UXAGENT_LLM_MAX_CONNECTIONS", 32)),
+        )
+    if name == "mock":
+        return MockProvider(latency_s=float(os.environ.get("UXAGENT_MOCK_LATENCY_MS", 500)) / 1000)
+    raise ValueError(f"지원하지 않는 LLM provider입니다: {name} (가능: {PROVIDERS})")
@@ -1,10 +1,17 @@
-import browser_module
-import think_module
+from . import browser_module
+from . import fast_path
+from . import network_archive
+from . import page_settle
+from . import think_module
+from .artifact_sink import BackgroundArtifactSink
+from .page_cache import PageCache
+from .run_recorder import RunRecorder
+from .spans import SpanRecorder, add_think_metrics
 import time
 import json
 import os # <--- [추가]
 import datetime # <--- [추가]
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 # --- 1. 에이전트의 최종 목표 설정 (수정) ---
 HIGH_LEVEL_GOAL = """
@@ -23,7 +30,35 @@ HIGH_LEVEL_GOAL = """
 '구매해주셔서 감사합니다!' 메시지가 나오는 '주문완료' 페이지에 도달하면 성공입니다.
 """
 
+START_URL = "https://note-pick.replit.app/"
 MAX_STEPS = 20
+OBSERVE_ENGINE = "dom" # "bs4" (page.content() + BeautifulSoup) 또는 "dom" (브라우저 내 직렬화)
+OBSERVE_INCREMENTAL = "full" # None, "full" (바뀐 부분만 재직렬화), "delta" (바뀐 줄만 반환)
+OBSERVE_PARSER = "lxml" # bs4 엔진의 HTML 파서: "html.parser" 또는 "lxml" (미설치 시 html.parser로 대체, pip install 'uxagent[lxml]'). OBSERVE_ENGINE="dom"이면 쓰이지 않음
+OBSERVE_VISIBILITY = "rendered" # "dom" 엔진 전용: None (숨겨진 요소 포함), "rendered" (보이는 요소만), "viewport" (화면 근처만, incremental=None 필요)
+OBSERVE_REVEAL_LAZY = True # 새 URL을 처음 관찰할 때 끝까지 스크롤해 lazy 섹션을 불러옴
+OBSERVE_PAGE_CACHE = None # 실행 간 페이지 캐시 파일 (예: ".cache/page_cache.sqlite3"). 켜면 bs4 엔진으로 관찰 (observe_settings)
+OBSERVE_TOKEN_BUDGET = 3000 # 요약본 추정 토큰 예산. 넘으면 반복 구조를 접고 목표와 관련 높은 요소 위주로 줄임 (None: 제한 없음)
+BLOCK_RESOURCES = "off" # 요청 차단 정책: "off", "assets" (이미지/폰트/미디어), "lean" (assets + 제3자 도메인). route를 걸면 HTTP 캐시가 꺼지므로 재 보고 켜기 (resource_blocking 참고)
+BLOCK_ALLOW = () # 차단 정책과 상관없이 통과시킬 호스트/URL 패턴 (예: ("*.gstatic.com",))
+NETWORK_MODE = "live" # "live", "record" (HAR_PATH에 사이트 트래픽 기록), "replay" (HAR_PATH에서만 응답, 네트워크 불필요)
+HAR_PATH = network_archive.DEFAULT_HAR_PATH
+ARTIFACT_LEVEL = "summary" # "none", "summary", "full" (raw/clean HTML까지 저장)
+THINK_MODE = "stream" # "two_call", "stream" (전략가 스트리밍 + 즉시 번역), "single" (1회 호출)
+FAST_PATH = True # 필수 정보 입력/결제 버튼/성공 페이지처럼 분명한 상태는 LLM 없이 규칙(fast_path.RULES)으로 결정
+
+def observe_settings(cached: bool) -> Dict[str, Any]:
+    """observe의 engine/incremental/visibility. page_cache는 bs4 엔진 전용이라 캐시를 쓰면 bs4로 바꿉니다."""
+    if cached:
+        return {"engine": "bs4", "incremental": None, "visibility": None}
+    return {"engine": OBSERVE_ENGINE, "incremental": OBSERVE_INCREMENTAL, "visibility": OBSERVE_VISIBILITY}
+
+def batch_history(step: int, batch: Optional[Dict[str, Any]]) -> Optional[str]:
+    """batch 액션이 중간에 멈췄으면 히스토리에 남길 문구를 만듭니다. (다 실행했거나 batch가 아니면 None)"""
+    if not batch or not batch.get("stopped"):
+        return None
+    reason = "새 알림: " + " / ".join(batch.get("alerts", [])) if batch["stopped"] == "alert" else "페이지 이동"
+    return f"--- batch 중단 (Step {step}) ---\n{batch['total']}개 중 {batch['done']}개 실행 후 멈춤 ({reason})"
 
 def main():
     # --- [신규] Logger 셋업 ---
@@ -32,18 +67,18 @@ def main():
     os.makedirs(log_dir, exist_ok=True)
     log_file_path = os.path.join(log_dir, f"run_{run_id}.jsonl")
 
-    # .jsonl 파일에 한 줄씩 로그를 추가하는 헬퍼 함수
-    def log_to_file(data: Dict[str, Any]):
-        try:
-            with open(log_file_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(data, ensure_ascii=False) + "\n")
-        except Exception as e:
-            print(f"--- ❌ Logger 에러 ---: {e}")
+    # 실행 내내 파일 핸들 하나를 열어 두고 버퍼링 (관찰 요약본도 해시로 중복 없이 같은 로그에 남김)
+    recorder = RunRecorder(log_file_path)
 
     print(f"Logging to: {log_file_path}")
+
+    # 관찰 산출물은 실행별 디렉터리에 백그라운드 스레드가 압축해서 저장
+    artifact_sink = BackgroundArtifactSink(
+        os.path.join("artifacts", f"run_{run_id}"), level=ARTIFACT_LEVEL
+    )
     
     # [신규] 1. 실행 시작 로그 (목표 기록)
-    log_to_file({
+    recorder.log({
         "type": "run_start",
         "timestamp": datetime.datetime.now().isoformat(),
         "run_id": run_id,
@@ -51,10 +86,15 @@ def main():
     })
     # --- [신규] Logger 셋업 완료 ---
 
-    start_url = "https://note-pick.replit.app/"
-    page, browser = browser_module.setup_browser(start_url)
+    page, browser = browser_module.setup_browser(
+        START_URL, block=BLOCK_RESOURCES, allow=BLOCK_ALLOW, network=NETWORK_MODE, har_path=HAR_PATH
+    )
+    # 같은 구조의 페이지(지문 일치)는 이전 실행의 요약본을 재사용
+    page_cache = PageCache(OBSERVE_PAGE_CACHE) if OBSERVE_PAGE_CACHE else None
     
     history: List[Dict[str, str]] = []
+    # 스텝마다 구간별 소요 시간(ms)을 모아 로그의 "spans"로 남김 (uxagent report로 집계)
+    spans = SpanRecorder()
     
     try:
         for step in range(1, MAX_STEPS + 1):
@@ -63,21 +103,37 @@ def main():
             # [신규] 로그 기록을 위한 변수 초기화
             obs_summary = ""
             obs_file_path = f"observe_{step}_summary.txt" # 기본값
+            obs_hash = None
             thought = ""
             action_command = {}
+            think_metrics = {}
+            fast_path_info = {}
+            settle = {}
 
             # --- 1. 관찰 (Observe) ---
             print("👀 현재 페이지 관찰 중...")
             try:
-                page.wait_for_load_state("domcontentloaded", timeout=10000) 
+                # 고정 sleep 대신 네트워크/fetch/DOM 변경이 잦아들 때까지만 기다림 (최대 SETTLE_MAX_MS)
+                with spans.span("settle"):
+                    settle = page_settle.wait_for_settle(page)
                 
                 # [수정] 2개 값을 반환받음
-                obs_summary, obs_file_path = browser_module.observe(
-                    page, 
-                    max_depth=14, 
-                    max_chars=None, 
-                    save_prefix=f"observe_{step}"
-                )
+                with spans.span("observe"):
+                    obs_summary, obs_file_path = browser_module.observe(
+                        page, 
+                        max_depth=14, 
+                        max_chars=None, 
+                        save_prefix=f"observe_{step}",
+                        parser=OBSERVE_PARSER,
+                        token_budget=OBSERVE_TOKEN_BUDGET,
+                        goal=HIGH_LEVEL_GOAL,
+                        reveal_lazy=OBSERVE_REVEAL_LAZY,
+                        page_cache=page_cache,
+                        **observe_settings(page_cache is not None),
+                        sink=artifact_sink,
+                        spans=spans
+                    )
+                obs_hash = recorder.observation(obs_summary)
                 print(f"📄 관찰 요약본 생성 완료. ({obs_file_path})")
                 
             except Exception as e:
@@ -86,28 +142,36 @@ def main():
                 history.append({"role": "system", "content": f"관찰 실패: {e}"})
                 
                 # [신규] 2. 관찰 실패 로그
-                log_to_file({
+                recorder.log({
                     "type": "step_error", "step": step, "phase": "observe",
-                    "timestamp": datetime.datetime.now().isoformat(), "error": str(e)
+                    "timestamp": datetime.datetime.now().isoformat(), "error": str(e),
+                    "spans": spans.take()
                 })
-                time.sleep(2) 
                 continue
 
             # --- 2. 사고 (Think) ---
             print("🧠 목표 기반 행동 결정 중... (LLM 2-Call)")
             try:
-                decision = think_module.think(obs_summary, HIGH_LEVEL_GOAL, history)
+                decision = None
+                if FAST_PATH:
+                    # 규칙이 확실히 맞을 때만 결정이 나오고, 아니면 None (어느 규칙이 왜 빠졌는지는 info에)
+                    decision, fast_path_info = fast_path.decide(obs_summary, HIGH_LEVEL_GOAL, history)
+                if decision is None:
+                    with spans.span("think"):
+                        decision = think_module.think(obs_summary, HIGH_LEVEL_GOAL, history, mode=THINK_MODE)
                 thought = decision.get("thought", "[Thought 없음]") # [신규] 변수에 저장
                 action_command = decision.get("action", {})
+                think_metrics = decision.get("metrics", {})
+                add_think_metrics(spans, think_metrics)
             except Exception as e:
                 print(f"--- ❌ 사고(Think) 모듈 실패 ---")
                 print(f"에러: {e}")
                 
                 # [신규] 3. 사고 실패 로그
-                log_to_file({
+                recorder.log({
                     "type": "step_error", "step": step, "phase": "think",
                     "timestamp": datetime.datetime.now().isoformat(), "error": str(e),
-                    "observation_file": obs_file_path
+                    "observation_file": obs_file_path, "observation": obs_hash, "spans": spans.take()
                 })
                 break
             
@@ -123,29 +187,35 @@ def main():
                 print(f"🎉 [SUCCESS] 에이전트가 '{action_command.get('params', {}).get('reason')}' 이유로 작업을 완료했습니다.")
                 
                 # [신규] 4. 작업 완료 로그
-                log_to_file({
+                recorder.log({
                     "type": "step", "step": step, "phase": "act",
                     "timestamp": datetime.datetime.now().isoformat(),
-                    "observation_file": obs_file_path,
-                    "thought": thought, "action": action_command, "result": "finish"
+                    "observation_file": obs_file_path, "observation": obs_hash,
+                    "thought": thought, "think_metrics": think_metrics, "fast_path": fast_path_info, "settle": settle, "spans": spans.take(), "action": action_command, "result": "finish"
                 })
                 break
             
             # 3-2. "act" 명령 수행
             print(f"🏃‍♂️ 실행 Action: {json.dumps(action_command, ensure_ascii=False)}")
             try:
-                browser_module.act(page, action_command)
+                with spans.span("act"):
+                    # batch 액션이면 몇 개를 실행했는지, 알림 때문에 멈췄는지가 돌아옴
+                    batch = browser_module.act(page, action_command)
                 
                 # [신규] 5. 행동 성공 로그
-                log_to_file({
+                recorder.log({
                     "type": "step", "step": step, "phase": "act",
                     "timestamp": datetime.datetime.now().isoformat(),
-                    "observation_file": obs_file_path,
-                    "thought": thought, "action": action_command, "result": "success"
+                    "observation_file": obs_file_path, "observation": obs_hash,
+                    "thought": thought, "think_metrics": think_metrics, "fast_path": fast_path_info, "settle": settle, "spans": spans.take(), "action": action_command, "result": "success",
+                    "batch": batch
                 })
                 
                 history.append({"role": "system", "content": f"--- 나의 이전 생각 (Step {step}) ---\n{thought}"})
                 history.append({"role": "system", "content": f"--- 나의 이전 행동 (Step {step}) ---\n{json.dumps(action_command, ensure_ascii=False)}"})
+                note = batch_history(step, batch)
+                if note:
+                    history.append({"role": "system", "content": note})
                 
             except Exception as e:
                 print(f"--- ❌ 행동(Act) 실패 ---")
@@ -153,42 +223,54 @@ def main():
                 print(f"에러: {e}")
                 
                 # [신규] 6. 행동 실패 로그
-                log_to_file({
+                recorder.log({
                     "type": "step", "step": step, "phase": "act",
                     "timestamp": datetime.datetime.now().isoformat(),
-                    "observation_file": obs_file_path,
-                    "thought": thought, "action": action_command, 
-                    "result": "error", "error_message": str(e)
+                    "observation_file": obs_file_path, "observation": obs_hash,
+                    "thought": thought, "think_metrics": think_metrics, "fast_path": fast_path_info, "settle": settle, "spans": spans.take(), "action": action_command, 
+                    "result": "error", "error_message": str(e),
+                    "batch": getattr(e, "batch", None)  # batch 중간 실패면 이미 실행한 개수(done) 포함
                 })
                 
                 history.append({"role": "system", "content": f"--- 행동 실패 (Step {step}) ---\nAction: {action_command['name']}\nError: {e}"})
 
-            time.sleep(1)
-
     except Exception as e:
         print(f"\n--- ❌ [MAIN LOOP] 치명적인 에러 발생 ---")
         print(f"에러: {e}")
         # [신규] 7. 메인 루프 에러 로그
-        log_to_file({
+        recorder.log({
             "type": "run_error",
             "timestamp": datetime.datetime.now().isoformat(),
             "error": str(e)
         })
     
     finally:
-        print(f"\n--- 🏁 [종료] {MAX_STEPS} 스텝 도달 또는 작업 완료 ---")
-        print("최종 페이지의 스크린샷을 'final_screenshot.png'로 저장합니다.")
-        page.screenshot(path="final_screenshot.png")
-        
-        # [신규] 8. 실행 종료 로그
-        log_to_file({
-            "type": "run_end",
-            "timestamp": datetime.datetime.now().isoformat()
-        })
-        
-        print("5초 후 브라우저를 닫습니다.")
-        time.sleep(5)
-        browser_module.close_browser(browser)
+        try:
+            print(f"\n--- 🏁 [종료] {MAX_STEPS} 스텝 도달 또는 작업 완료 ---")
+            # [신규] 8. 실행 종료 로그 (스크린샷/브라우저 정리가 실패해도 남도록 먼저)
+            recorder.log({
+                "type": "run_end",
+                "timestamp": datetime.datetime.now().isoformat(),
+                "blocked_requests": page.context.uxagent_blocker.stats()
+            })
+
+            print("최종 페이지의 스크린샷을 'final_screenshot.png'로 저장합니다.")
+            try:
+                page.screenshot(path="final_screenshot.png")
+            except Exception as e:
+                print(f"--- ⚠️ 최종 스크린샷 실패 (페이지가 닫혔거나 죽음) ---: {e}")
+
+            print("5초 후 브라우저를 닫습니다.")
+            time.sleep(5)
+            browser_module.close_browser(browser)
+        finally:
+            # 쓰기 스레드가 daemon이라, 여기서 닫지 않으면 큐에 남은 산출물이 종료 때 사라짐
+            try:
+                artifact_sink.close()
+            finally:
+                recorder.close()
+            if page_cache is not None:
+                page_cache.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
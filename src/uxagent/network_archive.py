@@ -0,0 +1,31 @@
+import os
+from typing import Any, Dict, Optional
+
+# --- HAR 기록/재생 ---
+# 회귀/벤치마크 실행이 느리고 가끔 내려가는 라이브 사이트에 묶이지 않도록, 사이트 트래픽을 HAR 파일로 떠 두고
+# 그 파일에서만 응답하도록 돌립니다. (Playwright BrowserContext.route_from_har)
+#   - "live":   평소처럼 네트워크 사용
+#   - "record": 라이브 사이트로 한 번 실행하면서 오간 요청/응답을 har_path에 기록 (컨텍스트를 닫을 때 저장)
+#   - "replay": har_path에 있는 응답만 사용. 기록에 없는 요청은 abort 하므로 네트워크 없이 결정적으로 돌고,
+#               mock LLM(--llm mock)과 함께 쓰면 CI에서도 에이전트 루프 전체를 벤치마크할 수 있습니다.
+# .zip 경로면 응답 본문을 HAR 안에 넣지 않고 zip 항목으로 따로 저장합니다.
+# HAR route는 리소스 차단(resource_blocking)보다 먼저 겁니다. 차단 핸들러가 먼저 판단하고 통과한 요청만 HAR로 넘어가므로
+# 막힌 이미지 등은 기록되지도, 재생 시 찾지도 않습니다.
+NETWORK_MODES = ("live", "record", "replay")
+DEFAULT_HAR_PATH = os.path.join("har", "notepick.har.zip")
+
+
+def har_route_args(mode: str, har_path: str = DEFAULT_HAR_PATH) -> Optional[Dict[str, Any]]:
+    """route_from_har에 넘길 인자. live 모드면 None (route를 걸지 않음)"""
+    if mode not in NETWORK_MODES:
+        raise ValueError(f"지원하지 않는 네트워크 모드입니다: {mode} (가능: {NETWORK_MODES})")
+    if mode == "live":
+        return None
+    if mode == "record":
+        directory = os.path.dirname(har_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return {"update": True, "update_mode": "minimal"}
+    if not os.path.exists(har_path):
+        raise ValueError(f"재생할 HAR 파일이 없습니다: {har_path} (먼저 record 모드로 실행하세요)")
+    return {"update": False, "not_found": "abort"}
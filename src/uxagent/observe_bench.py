@@ -0,0 +1,270 @@
+import difflib
+import glob
+import hashlib
+import json
+import os
+import re
+import statistics
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import page_cache
+from .browser_module import summarize_html
+from .spans import SpanRecorder
+
+# --- observe 오프라인 벤치마크 ---
+# 브라우저 없이 저장된 observe_N_raw.html을 summarize_html(bs4 엔진 본체)에 넣어
+#   - 단계별(parse / walk) 시간과 전체 시간 (repeat번 중 중앙값)
+#   - tracemalloc 기준 최대 메모리
+#   - observe_N_summary.txt(골든)와의 출력 일치 여부
+#   - 페이지 캐시 적중 시 파이썬 쪽 비용 (cache hit: 캐시된 요약본에 input 값 채우기)
+#     적중하면 page.content()와 parse/walk 대신 페이지 안 호출 두 번(지문, ax-id 다시 찍기)이 드는데,
+#     이 부분은 브라우저가 있어야 잴 수 있으므로 여기에는 들어 있지 않습니다.
+# 를 잽니다. 10k+ 노드의 합성 페이지도 함께 돌려서 walk/node_to_text 성능 회귀를 미리 잡습니다.
+#   uxagent bench                       (현재 디렉터리의 observe_*_raw.html)
+#   uxagent bench --json bench.json     (결과 저장)
+#   uxagent bench --baseline bench.json (저장된 결과보다 느려지면 실패)
+#   uxagent bench --compare-parsers     (html.parser 대비 lxml 파서 속도 비교)
+
+# 골든 요약본은 main.py와 같은 max_depth=14로 만들어졌습니다.
+GOLDEN_MAX_DEPTH = 14
+SYNTHETIC_SIZES = (10_000, 50_000)
+DEFAULT_REPEAT = 3
+# --baseline 비교 시 허용하는 중앙값 증가 비율
+REGRESSION_TOLERANCE = 1.2
+
+_AID_PATTERN = re.compile(r"aid-\d+")
+_INPUT_VALUE = re.compile(r'<input ax-id=(aid-\d+).*? value="(.*)"')
+
+
+def normalize_summary(summary: str) -> str:
+    """ax-id 번호 매기는 방식이 바뀌어도 비교할 수 있도록 번호를 지웁니다."""
+    return _AID_PATTERN.sub("aid-N", summary).rstrip("\n")
+
+
+def synthetic_page(target_nodes: int) -> str:
+    """
+    상품 목록 + 주문 폼 형태의 큰 페이지를 만듭니다. (카드 하나에 요소 약 20개)
+    script/style/svg 같은 노이즈 태그와 텍스트 없는 래퍼 div도 섞어 실제 페이지와 비슷하게 만듭니다.
+    """
+    cards: List[str] = []
+    per_card = 20
+    for i in range(max(1, target_nodes // per_card)):
+        cards.append(
+            f'<li class="card"><div class="wrap"><div>'
+            f'<a href="/product/{i}"><img src="/img/{i}.png" alt="노트북 {i}">'
+            f'<h3>NotePick 노트북 모델 {i}</h3></a>'
+            f'<p><span>{1_000_000 + i * 1000:,}원</span> <span>무료배송</span></p>'
+            f'<svg viewBox="0 0 10 10"><path d="M0 0L10 10"/></svg>'
+            f'<div><label for="qty-{i}">수량</label>'
+            f'<input id="qty-{i}" type="number" value="1" placeholder="수량">'
+            f'<button data-testid="button-cart-{i}">장바구니 담기</button></div>'
+            f'<ul><li>CPU i7</li><li>RAM 16GB</li><li>SSD 512GB</li></ul>'
+            f'<script>window.__card{i} = {i};</script>'
+            f'</div></div></li>'
+        )
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>synthetic</title>"
+        "<style>.card{display:block}</style><link rel=\"stylesheet\" href=\"/a.css\"></head>"
+        "<body><header><nav><a href=\"/\">홈</a><a href=\"/products\">전체</a></nav></header>"
+        "<main><section><h2>전체 상품</h2><ul>" + "".join(cards) + "</ul></section>"
+        "<section><h2>주문 정보</h2><form>"
+        "<label for=\"name\">이름</label><input id=\"name\" type=\"text\" placeholder=\"이름\">"
+        "<label for=\"phone\">연락처</label><input id=\"phone\" type=\"tel\" placeholder=\"연락처\">"
+        "<button data-testid=\"button-payment\">결제하기</button></form></section></main>"
+        "<footer><p>NotePick</p></footer></body></html>"
+    )
+
+
+def measure(
+    html_content: str, max_depth: int, repeat: int = DEFAULT_REPEAT, parser: str = "html.parser"
+) -> Tuple[str, Dict[str, Any]]:
+    """summarize_html을 repeat번 돌려 단계별 중앙값(ms)과 최대 메모리(KiB)를 돌려줍니다."""
+    spans = SpanRecorder()
+    samples: Dict[str, List[float]] = {}
+    summary = ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        summary, _ = summarize_html(html_content, max_depth, spans=spans, parser=parser)
+        run = spans.take()
+        run["total"] = (time.perf_counter() - started) * 1000
+        for key, ms in run.items():
+            samples.setdefault(key, []).append(ms)
+
+    # 메모리는 시간 측정과 따로 (tracemalloc이 켜져 있으면 느려지므로)
+    tracemalloc.start()
+    summarize_html(html_content, max_depth, parser=parser)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result: Dict[str, Any] = {key: round(statistics.median(v), 2) for key, v in samples.items()}
+    result["peak_kib"] = round(peak / 1024, 1)
+    result["html_kib"] = round(len(html_content.encode("utf-8")) / 1024, 1)
+    result["lines"] = summary.count("\n") + 1 if summary else 0
+    result["cache_hit"] = _measure_cache_hit(summary, repeat)
+    return summary, result
+
+
+def _measure_cache_hit(summary: str, repeat: int) -> float:
+    """page_cache 적중 시 파이썬 쪽 비용: 캐시 항목(JSON) 읽기 + input 값 채우기 (중앙값 ms)"""
+    values = dict(_INPUT_VALUE.findall(summary))
+    stored = json.dumps(page_cache.make_entry(summary, [], values), ensure_ascii=False)
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        page_cache.fill_summary(json.loads(stored), values)
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def output_digests(html_content: str, max_depth: int, parser: str) -> Dict[str, str]:
+    """요약본(ax-id 번호 정규화)과 ax-id 찍기 대상(요소 순번, 태그, ax-id)의 해시 (파서 간 출력 비교용)"""
+    summary, targets = summarize_html(html_content, max_depth, stamp_targets=True, parser=parser)
+    digest = lambda text: hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+    return {
+        "summary_digest": digest(normalize_summary(summary)),
+        "targets_digest": digest(json.dumps(targets, ensure_ascii=False)),
+    }
+
+
+def run_bench(
+    directory: str = ".",
+    repeat: int = DEFAULT_REPEAT,
+    synthetic_sizes: Tuple[int, ...] = SYNTHETIC_SIZES,
+    parser: str = "html.parser",
+    digests: bool = False
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    결과 행 목록과 골든 불일치 메시지 목록을 돌려줍니다.
+    digests=True면 행마다 output_digests도 넣습니다. (시간 측정과는 따로 한 번 더 돌림)
+    """
+    rows: List[Dict[str, Any]] = []
+    failures: List[str] = []
+
+    def sort_key(path: str) -> Tuple[int, str]:
+        match = re.search(r"observe_(\d+)_raw\.html$", path)
+        return (int(match.group(1)) if match else 0, path)
+
+    for raw_path in sorted(glob.glob(os.path.join(directory, "observe_*_raw.html")), key=sort_key):
+        name = os.path.basename(raw_path)[: -len("_raw.html")]
+        with open(raw_path, "r", encoding="utf-8") as f:
+            html_content = f.read()
+        summary, result = measure(html_content, GOLDEN_MAX_DEPTH, repeat, parser)
+
+        golden_path = os.path.join(directory, f"{name}_summary.txt")
+        if os.path.exists(golden_path):
+            with open(golden_path, "r", encoding="utf-8") as f:
+                golden = f.read()
+            result["golden"] = normalize_summary(summary) == normalize_summary(golden)
+            if not result["golden"]:
+                diff = difflib.unified_diff(
+                    normalize_summary(golden).splitlines(), normalize_summary(summary).splitlines(),
+                    "golden", "current", lineterm="", n=1
+                )
+                failures.append(f"{name}: 골든 요약본과 다릅니다.\n" + "\n".join(list(diff)[:20]))
+        if digests:
+            result.update(output_digests(html_content, GOLDEN_MAX_DEPTH, parser))
+        rows.append({"page": name, **result})
+
+    for size in synthetic_sizes:
+        html_content = synthetic_page(size)
+        summary, result = measure(html_content, GOLDEN_MAX_DEPTH, repeat, parser)
+        again, _ = summarize_html(html_content, GOLDEN_MAX_DEPTH, parser=parser)
+        if again != summary:
+            failures.append(f"synthetic_{size}: 같은 입력인데 출력이 달라졌습니다. (비결정적 출력)")
+        if digests:
+            result.update(output_digests(html_content, GOLDEN_MAX_DEPTH, parser))
+        rows.append({"page": f"synthetic_{size}", **result})
+
+    return rows, failures
+
+
+def compare_baseline(rows: List[Dict[str, Any]], baseline: List[Dict[str, Any]]) -> List[str]:
+    """이전 결과(--json으로 저장한 것)보다 total 중앙값이 REGRESSION_TOLERANCE배 넘게 느려진 페이지를 찾습니다."""
+    previous = {row["page"]: row for row in baseline}
+    regressions: List[str] = []
+    for row in rows:
+        before = previous.get(row["page"])
+        if before and before.get("total") and row["total"] > before["total"] * REGRESSION_TOLERANCE:
+            regressions.append(
+                f"{row['page']}: {before['total']:.1f}ms -> {row['total']:.1f}ms "
+                f"(x{row['total'] / before['total']:.2f})"
+            )
+    return regressions
+
+
+def format_rows(rows: List[Dict[str, Any]]) -> str:
+    header = (
+        f"{'page':<20} {'html KiB':>9} {'lines':>6} {'parse':>9} {'walk':>9} {'total':>9} "
+        f"{'cache hit':>10} {'peak KiB':>10} {'golden':>7}"
+    )
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        golden = {True: "ok", False: "FAIL"}.get(row.get("golden"), "-")
+        lines.append(
+            f"{row['page']:<20} {row['html_kib']:>9.1f} {row['lines']:>6} {row.get('parse', 0):>9.2f} "
+            f"{row.get('walk', 0):>9.2f} {row['total']:>9.2f} {row.get('cache_hit', 0):>10.3f} "
+            f"{row['peak_kib']:>10.1f} {golden:>7}"
+        )
+    lines.append("(시간은 ms, repeat번 중 중앙값)")
+    return "\n".join(lines)
+
+
+def _same_output(a: Dict[str, Any], b: Dict[str, Any]) -> str:
+    different = [
+        name for name, key in (("summary", "summary_digest"), ("targets", "targets_digest"))
+        if a.get(key) != b.get(key)
+    ]
+    return "DIFF:" + "+".join(different) if different else "ok"
+
+
+def format_parser_comparison(base: List[Dict[str, Any]], fast: List[Dict[str, Any]]) -> str:
+    header = f"{'page':<20} {'parse x':>8} {'total x':>8} {'html.parser ms':>15} {'lxml ms':>9} {'same':>21}"
+    lines = [header, "-" * len(header)]
+    for a, b in zip(base, fast):
+        lines.append(
+            f"{a['page']:<20} {a.get('parse', 0) / max(b.get('parse', 0), 0.01):>8.2f} "
+            f"{a['total'] / max(b['total'], 0.01):>8.2f} {a['total']:>15.2f} {b['total']:>9.2f} "
+            f"{_same_output(a, b):>21}"
+        )
+    return "\n".join(lines)
+
+
+def main(
+    directory: str = ".",
+    repeat: int = DEFAULT_REPEAT,
+    json_path: Optional[str] = None,
+    baseline_path: Optional[str] = None,
+    parser: str = "html.parser",
+    compare_parsers: bool = False
+) -> int:
+    if compare_parsers:
+        base, failures = run_bench(directory, repeat, parser="html.parser", digests=True)
+        fast, fast_failures = run_bench(directory, repeat, parser="lxml", digests=True)
+        print(format_parser_comparison(base, fast))
+        print("(x: html.parser 시간 / lxml 시간, same: 요약본 텍스트(ax-id 번호 제외)와 ax-id 찍기 대상 일치)")
+        for message in failures + fast_failures:
+            print(f"\n--- ❌ {message}")
+        return 1 if failures or fast_failures else 0
+
+    rows, failures = run_bench(directory, repeat, parser=parser)
+    print(format_rows(rows))
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장 -> {json_path}")
+
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            regressions = compare_baseline(rows, json.load(f))
+        failures.extend(f"성능 회귀: {message}" for message in regressions)
+
+    for message in failures:
+        print(f"\n--- ❌ {message}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+# --- 실행 간 페이지 상태 캐시 ---
+# 배치 실행은 NotePick의 몇 안 되는 페이지(홈, 상품, 주문, 주문완료)를 계속 다시 방문합니다.
+# 관찰할 때 먼저 페이지 '지문(fingerprint)'을 만들고, 예전에 같은 지문으로 만든 요약본이 있으면 그것을 씁니다.
+#   지문 = URL 템플릿(/product/2 -> /product/:n) + dom_serializer.FINGERPRINT_JS 해시
+#          (노이즈 제외 요소의 태그/구조 속성/텍스트/가시성, input의 value는 제외) + 요약 옵션
+# 캐시 항목에는 요약본, ax-id를 다시 찍을 위치(targets), input 줄의 value 자리가 들어 있고,
+# 적중하면 ax-id를 찍고 현재 input 값만 채워 넣습니다. (page.content() / 재파싱 / 순회를 건너뜀)
+# input 값 말고는 바뀌는 부분이 있으면 지문이 달라지므로 그대로 새로 요약하고 캐시에 넣습니다.
+# bs4 엔진 전용입니다. 적중해도 페이지 안 순회가 두 번(지문, ax-id 다시 찍기) 들므로,
+# 순회 한 번으로 끝나는 dom 엔진(SERIALIZE_JS)보다는 빠를 수 없습니다.
+# 미적중 때는 ax-id 찍는 호출이 캐시 항목용 input 값도 함께 읽으므로 캐시 없는 bs4 대비 지문 호출 하나만 늘어납니다.
+DEFAULT_PAGE_CACHE_PATH = os.path.join(".cache", "page_cache.sqlite3")
+DEFAULT_MAX_ENTRIES = 2000
+
+_NUMBER_SEGMENT = re.compile(r"^\d+$")
+
+
+def url_template(url: str) -> str:
+    """숫자로만 된 경로 조각을 :n으로 바꾼 host + path (쿼리/해시는 버림, 내용 차이는 지문이 잡음)"""
+    parts = urlsplit(url)
+    segments = [":n" if _NUMBER_SEGMENT.match(s) else s for s in parts.path.split("/")]
+    return parts.netloc + "/".join(segments)
+
+
+def cache_key(
+    url: str, fingerprint: str, engine: str, max_depth: int, visibility: Optional[str], parser: str
+) -> str:
+    payload = json.dumps(
+        [url_template(url), fingerprint, engine, max_depth, visibility, parser if engine == "bs4" else None],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _aid_line(lines: List[str], aid: str) -> int:
+    marker = f" ax-id={aid}"
+    for index, line in enumerate(lines):
+        at = line.find(marker)
+        if at >= 0 and line[at + len(marker):at + len(marker) + 1] in (" ", ">"):
+            return index
+    return -1
+
+
+def make_entry(summary: str, targets: List[List[Any]], values: Dict[str, str]) -> Dict[str, Any]:
+    """
+    캐시에 넣을 항목을 만듭니다. values는 input 요소의 {ax-id: value 속성} (dom_serializer.AID_STATE_JS)
+    각 input 줄을 value 앞/뒤 조각으로 나눠 두어, 적중했을 때 현재 값으로 다시 채울 수 있게 합니다.
+    """
+    lines = summary.split("\n")
+    inputs: Dict[str, List[Any]] = {}
+    for aid, value in values.items():
+        index = _aid_line(lines, aid)
+        if index < 0:
+            continue
+        line = lines[index]
+        segment = f' value="{value}"'
+        if value and segment in line:
+            at = line.index(segment)
+            inputs[aid] = [index, line[:at], line[at + len(segment):]]
+        elif not value and line.endswith(">"):
+            # 값이 없으면 data-testid 앞(없으면 맨 끝 '>' 앞)이 value 자리 (요약 줄의 속성 순서)
+            at = line.find(" data-testid=")
+            at = at if at >= 0 else len(line) - 1
+            inputs[aid] = [index, line[:at], line[at:]]
+    return {"summary": summary, "targets": targets, "inputs": inputs}
+
+
+def fill_summary(entry: Dict[str, Any], values: Dict[str, str]) -> str:
+    """캐시된 요약본의 input 줄에 현재 value를 채워 넣습니다."""
+    lines = entry["summary"].split("\n")
+    for aid, (index, before, after) in entry["inputs"].items():
+        value = values.get(aid, "")
+        lines[index] = before + (f' value="{value}"' if value else "") + after
+    return "\n".join(lines)
+
+
+class PageCache:
+    """
+    지문 키 -> 캐시 항목(JSON)을 SQLite에 저장합니다. llm_cache.LLMCache처럼 연결 하나를 락으로 보호하고,
+    max_entries를 넘으면 가장 오래 안 쓰인 항목부터 지웁니다. (LRU, 90%까지)
+    """
+
+    def __init__(self, path: str = DEFAULT_PAGE_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn: Optional[sqlite3.Connection] = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY, url TEXT, entry TEXT, created REAL, last_used REAL, hits INTEGER DEFAULT 0)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT entry FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE pages SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        entry: Dict[str, Any] = json.loads(row[0])
+        return entry
+
+    def put(self, key: str, url: str, entry: Dict[str, Any]) -> None:
+        if self._conn is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (key, url, entry, created, last_used, hits)"
+                " VALUES (?, ?, ?, ?, ?, 0)",
+                (key, url, json.dumps(entry, ensure_ascii=False), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        assert self._conn is not None
+        total = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        if total <= self.max_entries:
+            return
+        self._conn.execute(
+            "DELETE FROM pages WHERE key IN (SELECT key FROM pages ORDER BY last_used ASC LIMIT ?)",
+            (total - int(self.max_entries * 0.9),),
+        )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
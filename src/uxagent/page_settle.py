@@ -0,0 +1,212 @@
+import time
+from typing import Any, Dict
+
+from playwright.sync_api import Error as PlaywrightError, Page
+
+# --- 페이지 안정화(settle) 감지 ---
+# 고정 sleep 대신, 아래 세 신호가 모두 조용해지면 바로 다음 단계로 넘어갑니다. (최대 max_ms까지만 대기)
+#   1) 네트워크: Playwright request/requestfinished/requestfailed 이벤트로 진행 중인 요청 수를 셉니다.
+#   2) fetch/XHR: 페이지 안에서 fetch와 XMLHttpRequest.send를 감싸 응답을 기다리는 호출 수를 셉니다.
+#   3) DOM: MutationObserver로 마지막 변경 시각을 기록하고, quiet_ms 동안 변경이 없어야 합니다.
+# SPA 라우트 변경처럼 domcontentloaded가 다시 오지 않는 경우에도 2), 3)으로 렌더링이 끝났는지 알 수 있습니다.
+
+SETTLE_QUIET_MS = 300
+SETTLE_MAX_MS = 5000
+NETWORK_POLL_MS = 50
+# 이보다 오래 열려 있는 요청(롱 폴링, 분석 비콘 등)은 안정화 판단에서 뺍니다.
+STALE_REQUEST_MS = 2000
+# 끝나지 않는 스트림 형태의 요청은 처음부터 세지 않습니다.
+_IGNORED_RESOURCE_TYPES = {"eventsource", "websocket", "media"}
+
+# 페이지 안 추적기 설치 코드. add_init_script로 문서마다 먼저 실행되고,
+# 설치 전에 열린 문서라면 SETTLE_WAIT_JS가 처음 호출될 때 설치합니다.
+_INSTALL_JS = r"""
+function __uxagentInstallSettle() {
+  if (window.__uxagentSettle) return window.__uxagentSettle;
+  const state = window.__uxagentSettle = { pending: 0, lastMutation: performance.now() };
+
+  const origFetch = window.fetch;
+  if (origFetch) {
+    window.fetch = function (...args) {
+      state.pending++;
+      let promise;
+      try {
+        promise = origFetch.apply(this, args);
+      } catch (e) {
+        state.pending--;
+        throw e;
+      }
+      return promise.finally(() => { state.pending--; });
+    };
+  }
+
+  const origSend = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function (...args) {
+    state.pending++;
+    this.addEventListener("loadend", () => { state.pending--; }, { once: true });
+    try {
+      return origSend.apply(this, args);
+    } catch (e) {
+      state.pending--;
+      throw e;
+    }
+  };
+
+  // observe()가 붙이는 data-uxagent-aid 속성 변경은 페이지 변화로 보지 않습니다.
+  new MutationObserver((records) => {
+    for (const r of records) {
+      if (r.type !== "attributes" || r.attributeName !== "data-uxagent-aid") {
+        state.lastMutation = performance.now();
+        return;
+      }
+    }
+  }).observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+  return state;
+}
+"""
+
+SETTLE_INIT_JS = _INSTALL_JS + "\n__uxagentInstallSettle();\n"
+
+SETTLE_WAIT_JS = "async ({quietMs, maxMs}) => {\n" + _INSTALL_JS + r"""
+  const state = __uxagentInstallSettle();
+  const start = performance.now();
+  while (true) {
+    const now = performance.now();
+    const quiet = now - state.lastMutation;
+    const ready = document.readyState !== "loading";
+    if (ready && state.pending <= 0 && quiet >= quietMs) {
+      return { settled: true, waited: now - start, pending: state.pending };
+    }
+    if (now - start >= maxMs) {
+      const reason = !ready ? "loading" : state.pending > 0 ? "fetch" : "dom";
+      return { settled: false, waited: now - start, pending: state.pending, reason };
+    }
+    await new Promise((r) => setTimeout(r, Math.min(50, Math.max(1, quietMs - quiet))));
+  }
+}
+"""
+
+# 스크롤에 반응해 뒤늦게 붙는(lazy) 섹션을 미리 불러오기: 한 화면씩 끝까지 내려가며 매번 fetch/DOM이
+# 잠잠해질 때까지(최대 stepMaxMs) 기다린 뒤, 원래 스크롤 위치로 돌아옵니다. 한 번의 evaluate 호출로 끝납니다.
+LAZY_MAX_STEPS = 10
+LAZY_QUIET_MS = 150
+LAZY_STEP_MAX_MS = 800
+
+LAZY_REVEAL_JS = "async ({quietMs, stepMaxMs, maxSteps}) => {\n" + _INSTALL_JS + r"""
+  const state = __uxagentInstallSettle();
+  const root = document.scrollingElement || document.documentElement;
+  const startX = window.scrollX, startY = window.scrollY;
+  const initialHeight = root.scrollHeight;
+  const settle = async () => {
+    const start = performance.now();
+    while (performance.now() - start < stepMaxMs) {
+      await new Promise((r) => setTimeout(r, 50));
+      if (state.pending <= 0 && performance.now() - state.lastMutation >= quietMs) return;
+    }
+  };
+  let steps = 0;
+  while (steps < maxSteps && window.scrollY + window.innerHeight < root.scrollHeight - 1) {
+    const before = window.scrollY;
+    window.scrollBy(0, window.innerHeight);
+    if (window.scrollY === before) break;  // body가 아닌 내부 컨테이너가 스크롤되는 페이지
+    steps++;
+    await settle();
+  }
+  window.scrollTo(startX, startY);
+  return { steps, grewPx: root.scrollHeight - initialHeight };
+}
+"""
+
+
+def lazy_reveal_args() -> Dict[str, int]:
+    return {"quietMs": LAZY_QUIET_MS, "stepMaxMs": LAZY_STEP_MAX_MS, "maxSteps": LAZY_MAX_STEPS}
+
+
+def _track_requests(page: Any) -> bool:
+    """
+    진행 중인 요청을 page.uxagent_inflight({request: 시작 시각})에 기록하도록 리스너를 답니다.
+    이미 달려 있으면 False를 돌려줍니다. (sync/async Page 모두 사용 가능)
+    """
+    if getattr(page, "uxagent_inflight", None) is not None:
+        return False
+    inflight: Dict[Any, float] = {}
+    page.uxagent_inflight = inflight  # type: ignore[attr-defined]
+
+    def on_request(request: Any) -> None:
+        if request.resource_type not in _IGNORED_RESOURCE_TYPES:
+            inflight[request] = time.perf_counter()
+
+    def on_done(request: Any) -> None:
+        inflight.pop(request, None)
+
+    page.on("request", on_request)
+    page.on("requestfinished", on_done)
+    page.on("requestfailed", on_done)
+    return True
+
+
+def _network_busy(page: Any) -> bool:
+    inflight: Dict[Any, float] = getattr(page, "uxagent_inflight", None) or {}
+    now = time.perf_counter()
+    return any((now - started) * 1000 < STALE_REQUEST_MS for started in list(inflight.values()))
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def install_settle_tracking(page: Page) -> None:
+    """setup_browser에서 첫 goto 전에 호출합니다. 이후 모든 문서에 추적기가 먼저 설치됩니다."""
+    if _track_requests(page):
+        page.add_init_script(SETTLE_INIT_JS)
+
+
+def wait_for_settle(page: Page, quiet_ms: int = SETTLE_QUIET_MS, max_ms: int = SETTLE_MAX_MS) -> Dict[str, Any]:
+    """
+    페이지가 안정될 때까지 기다립니다. 최대 max_ms까지만 기다리고, 시간 초과여도 예외를 던지지 않습니다.
+    페이지(또는 컨텍스트)가 닫혔으면 기다릴 것이 없으므로 PlaywrightError를 그대로 던집니다.
+    반환값: {"settled": bool, "waited_ms": float, "reason": "quiet" | "timeout:<원인>"}
+    """
+    started = time.perf_counter()
+    reason = "timeout"
+    while True:
+        remaining = max_ms - _elapsed_ms(started)
+        if remaining <= 0:
+            return {"settled": False, "waited_ms": _elapsed_ms(started), "reason": reason}
+        try:
+            state = page.evaluate(SETTLE_WAIT_JS, {"quietMs": quiet_ms, "maxMs": remaining})
+        except PlaywrightError:
+            # 닫힌 페이지에서는 evaluate/wait_for_load_state가 바로 실패하므로 다시 시도하면 max_ms까지 헛돎
+            if page.is_closed():
+                raise
+            # 기다리는 중에 페이지가 이동하면 실행 컨텍스트가 사라짐 → 새 문서가 뜨면 다시 확인
+            reason = "timeout:navigation"
+            try:
+                page.wait_for_load_state("domcontentloaded", timeout=max(remaining, 1))
+            except PlaywrightError:
+                if page.is_closed():
+                    raise
+            continue
+        if not state["settled"]:
+            return {"settled": False, "waited_ms": _elapsed_ms(started), "reason": f"timeout:{state['reason']}"}
+        if not _network_busy(page):
+            return {"settled": True, "waited_ms": _elapsed_ms(started), "reason": "quiet"}
+        reason = "timeout:network"
+        page.wait_for_timeout(NETWORK_POLL_MS)
+
+
+def reveal_lazy_sections(page: Page) -> Dict[str, Any]:
+    """
+    LAZY_REVEAL_JS로 스크롤 트리거 섹션을 불러옵니다. 같은 URL에서는 한 번만 실행합니다.
+    반환값: {"steps": 스크롤 횟수, "grewPx": 늘어난 문서 높이} (건너뛰면 {"steps": 0, "skipped": True})
+    """
+    if getattr(page, "uxagent_lazy_url", None) == page.url:
+        return {"steps": 0, "skipped": True}
+    try:
+        result: Dict[str, Any] = page.evaluate(LAZY_REVEAL_JS, lazy_reveal_args())
+    except PlaywrightError as e:
+        # 스크롤 중에 페이지가 이동한 경우 → 다음 관찰에서 새 URL 기준으로 다시 시도
+        print(f"--- ⚠️ lazy 섹션 스크롤 중단 ---: {e}")
+        return {"steps": 0, "error": str(e)}
+    page.uxagent_lazy_url = page.url  # type: ignore[attr-defined]
+    return result
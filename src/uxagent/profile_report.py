@@ -0,0 +1,157 @@
+import datetime
+import glob
+import json
+from typing import Any, Dict, List, Optional
+
+# --- 실행 로그 프로파일 리포트 ---
+# logs/run_*.jsonl 의 스텝 로그에 남은 "spans"(구간 경로 -> ms)를 모아
+#   1) 구간별 p50 / p95 / 평균 / 합계 표
+#   2) 합계 기준 flame 형태의 트리 (자식 구간은 들여쓰기, 막대는 전체 대비 비율)
+# 를 만듭니다. --folded 로 flamegraph.pl / speedscope가 읽는 folded stack 파일도 쓸 수 있습니다.
+# spans가 생기기 전의 로그는 구간을 나눌 수 없으므로, 스텝 이벤트 사이의 timestamp 차이를
+# 스텝 전체 시간(ESTIMATED_SPAN, observe + think + act + 대기)으로 어림해 넣고 리포트에 따로 표시합니다.
+
+BAR_WIDTH = 30
+ESTIMATED_SPAN = "step(timestamp)"
+_STEP_TYPES = ("step", "step_error")
+
+
+def _read_entries(path: str) -> List[Dict[str, Any]]:
+    entries: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # 실행 중에 끊긴 마지막 줄 등
+    return entries
+
+
+def _estimated_rows(entries: List[Dict[str, Any]]) -> List[Dict[str, float]]:
+    """spans 없는 예전 로그: run_start/이전 스텝 이벤트부터 이번 스텝 이벤트까지를 스텝 하나의 시간으로 봅니다."""
+    rows: List[Dict[str, float]] = []
+    previous: Optional[datetime.datetime] = None
+    for entry in entries:
+        kind = entry.get("type")
+        if kind != "run_start" and kind not in _STEP_TYPES:
+            continue
+        try:
+            current = datetime.datetime.fromisoformat(entry["timestamp"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if kind in _STEP_TYPES and previous is not None:
+            rows.append({ESTIMATED_SPAN: (current - previous).total_seconds() * 1000})
+        previous = current
+    return rows
+
+
+def load_spans(paths: List[str]) -> List[Dict[str, float]]:
+    """
+    로그 파일(또는 glob 패턴)들에서 스텝별 spans 딕셔너리를 읽어옵니다.
+    spans가 하나도 없는 파일은 timestamp로 어림한 {ESTIMATED_SPAN: ms}를 대신 넣습니다.
+    """
+    rows: List[Dict[str, float]] = []
+    for pattern in paths:
+        for path in sorted(glob.glob(pattern)):
+            entries = _read_entries(path)
+            recorded = [entry["spans"] for entry in entries if entry.get("spans")]
+            rows.extend(recorded or _estimated_rows(entries))
+    return rows
+
+
+def percentile(values: List[float], q: float) -> float:
+    """선형 보간 백분위수 (q: 0~100)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * q / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def summarize(rows: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    values: Dict[str, List[float]] = {}
+    for spans in rows:
+        for path, ms in spans.items():
+            values.setdefault(path, []).append(ms)
+    return {
+        path: {
+            "count": len(v),
+            "p50": percentile(v, 50),
+            "p95": percentile(v, 95),
+            "mean": sum(v) / len(v),
+            "total": sum(v),
+        }
+        for path, v in values.items()
+    }
+
+
+def _tree_order(paths: List[str], stats: Dict[str, Dict[str, float]]) -> List[str]:
+    """부모 바로 아래에 자식이 오도록, 같은 단계에서는 합계가 큰 순서로 정렬합니다."""
+    def children(parent: Optional[str]) -> List[str]:
+        depth = 0 if parent is None else parent.count("/") + 1
+        found = [
+            p for p in paths
+            if p.count("/") == depth and (parent is None or p.startswith(parent + "/"))
+        ]
+        return sorted(found, key=lambda p: -stats[p]["total"])
+
+    ordered: List[str] = []
+
+    def visit(parent: Optional[str]) -> None:
+        for path in children(parent):
+            ordered.append(path)
+            visit(path)
+
+    visit(None)
+    return ordered
+
+
+def format_report(stats: Dict[str, Dict[str, float]], steps: int) -> str:
+    if not stats:
+        return "spans가 기록된 스텝이 없습니다."
+    ordered = _tree_order(list(stats), stats)
+    grand_total = sum(s["total"] for p, s in stats.items() if "/" not in p) or 1.0
+
+    lines = [f"스텝 {steps}개"]
+    if ESTIMATED_SPAN in stats:
+        lines.append(
+            f"(spans가 없는 예전 로그 {stats[ESTIMATED_SPAN]['count']}스텝은 구간을 나눌 수 없어, "
+            f"스텝 로그 timestamp 간격을 '{ESTIMATED_SPAN}'로 어림했습니다)"
+        )
+    lines.append("")
+    lines.append(f"{'span':<28} {'n':>5} {'p50 ms':>10} {'p95 ms':>10} {'mean ms':>10} {'total s':>9}")
+    for path in ordered:
+        s = stats[path]
+        name = "  " * path.count("/") + path.rsplit("/", 1)[-1]
+        lines.append(
+            f"{name:<28} {s['count']:>5} {s['p50']:>10.1f} {s['p95']:>10.1f} {s['mean']:>10.1f} {s['total'] / 1000:>9.2f}"
+        )
+
+    lines += ["", "[flame: 전체 시간 대비 합계 비율]"]
+    for path in ordered:
+        share = stats[path]["total"] / grand_total
+        name = "  " * path.count("/") + path.rsplit("/", 1)[-1]
+        bar = "█" * max(1, round(share * BAR_WIDTH)) if share > 0 else ""
+        lines.append(f"{name:<28} {share * 100:5.1f}% {bar}")
+    return "\n".join(lines)
+
+
+def folded_stacks(rows: List[Dict[str, float]]) -> List[str]:
+    """
+    flamegraph용 folded stack 줄("observe;parse 1234")을 만듭니다. 값은 자기 시간(self time, μs)입니다.
+    (부모 구간 시간에서 바로 아래 자식 구간 시간을 뺀 값)
+    """
+    self_us: Dict[str, int] = {}
+    for spans in rows:
+        for path, ms in spans.items():
+            child_ms = sum(
+                v for p, v in spans.items()
+                if p.startswith(path + "/") and p.count("/") == path.count("/") + 1
+            )
+            own = max(0.0, ms - child_ms)
+            self_us[path] = self_us.get(path, 0) + int(own * 1000)
+    return [f"{path.replace('/', ';')} {us}" for path, us in sorted(self_us.items()) if us > 0]
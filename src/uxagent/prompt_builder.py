@@ -0,0 +1,115 @@
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import tiktoken  # 선택 의존성: 있으면 정확한 토큰 수, 없으면 근사치
+except ImportError:
+    tiktoken = None
+
+# --- 전략가 메시지 빌더 ---
+# 프롬프트 캐싱(provider 쪽 prefix cache)이 적용되도록 '변하지 않는 부분'을 앞에 둡니다.
+#   1) system: STRATEGIST_PROMPT (+ 모드별 규칙)   ← 실행 내내 동일
+#   2) user:   [최종 목표]                          ← 실행 내내 동일
+#   3) user:   [이전 행동 기록]                     ← 토큰 예산 안에서 최근 기록 위주로 압축
+#   4) user:   [현재 관찰]                          ← 매 스텝 바뀜
+# 기존처럼 history(json indent=2)를 목표/관찰 앞에 두면, 히스토리가 바뀔 때마다 그 뒤 전체가 캐시에서 빠집니다.
+
+HISTORY_TOKEN_BUDGET = 1500
+# 예산 중 최근 기록을 원문 그대로 싣는 비율 (나머지는 오래된 기록의 한 줄 요약)
+FULL_HISTORY_SHARE = 0.75
+ONE_LINE_CHARS = 100
+
+_encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토큰 수를 셉니다. tiktoken이 없으면 근사치를 씁니다.
+    (o200k 기준 ASCII는 약 4자당 1토큰, 한글 등 비 ASCII 문자는 대략 1자당 1토큰 이하 → 넉넉하게 1로 계산)
+    """
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        return len(_encoding.encode(text))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def _one_line(content: str) -> str:
+    """'--- 나의 이전 행동 (Step 3) ---\\n{...}' 형태의 기록을 머리줄 + 본문 앞부분 한 줄로 줄입니다."""
+    head, _, rest = content.strip().partition("\n")
+    rest = " ".join(rest.split())
+    if len(rest) > ONE_LINE_CHARS:
+        rest = rest[:ONE_LINE_CHARS] + "…"
+    return f"{head} {rest}".strip()
+
+
+def compact_history(history: List[Dict[str, str]], token_budget: int = HISTORY_TOKEN_BUDGET) -> str:
+    """
+    최근 기록은 원문 그대로, 그보다 오래된 기록은 한 줄 요약으로, 예산을 넘는 나머지는 개수만 남깁니다.
+    """
+    full_budget = int(token_budget * FULL_HISTORY_SHARE)
+    used = 0
+    kept: List[str] = []
+    index = len(history) - 1
+
+    # 1) 최근 기록부터 원문
+    while index >= 0:
+        text = history[index]["content"].strip()
+        cost = estimate_tokens(text)
+        if used + cost > full_budget:
+            break
+        kept.append(text)
+        used += cost
+        index -= 1
+
+    # 2) 그 이전 기록은 한 줄 요약
+    while index >= 0:
+        text = _one_line(history[index]["content"])
+        cost = estimate_tokens(text)
+        if used + cost > token_budget:
+            break
+        kept.append(text)
+        used += cost
+        index -= 1
+
+    kept.reverse()
+    if index >= 0:
+        kept.insert(0, f"(더 오래된 기록 {index + 1}개 생략)")
+    return "\n".join(kept)
+
+
+def build_strategist_messages(
+    system_prompt: str,
+    goal: str,
+    observation: str,
+    history: List[Dict[str, str]],
+    system_suffix: Optional[str] = None,
+    history_token_budget: int = HISTORY_TOKEN_BUDGET
+) -> Tuple[List[Dict[str, str]], Dict[str, int]]:
+    """
+    전략가 호출용 메시지와 섹션별 추정 토큰 수를 돌려줍니다.
+    system_suffix는 모드별 추가 규칙(stream/single)으로, 고정 prefix 안(system 바로 뒤)에 들어갑니다.
+    """
+    messages: List[Dict[str, str]] = [{"role": "system", "content": system_prompt}]
+    if system_suffix:
+        messages.append({"role": "system", "content": system_suffix})
+    messages.append({"role": "user", "content": f"[최종 목표]\n{goal.strip()}"})
+
+    history_text = compact_history(history, history_token_budget) if history else ""
+    if history_text:
+        messages.append({"role": "user", "content": f"[이전 행동 기록 (참고용)]\n{history_text}"})
+
+    messages.append({
+        "role": "user",
+        "content": f"[현재 관찰 (observe_summary.txt)]\n{observation}\n\n[당신의 전략 (자연어 출력)]",
+    })
+
+    tokens = {
+        "system": estimate_tokens(system_prompt) + (estimate_tokens(system_suffix) if system_suffix else 0),
+        "goal": estimate_tokens(goal),
+        "history": estimate_tokens(history_text) if history_text else 0,
+        "observation": estimate_tokens(observation),
+    }
+    tokens["total"] = sum(tokens.values())
+    return messages, tokens
@@ -0,0 +1,86 @@
+import fnmatch
+from typing import Any, Dict, Optional, Sequence
+from urllib.parse import urlsplit
+
+# --- 요청 가로채기(route)로 무거운 리소스 차단 ---
+# 에이전트는 DOM 요약본만 읽으므로 이미지/폰트/미디어, 분석 스크립트 같은 제3자 요청은 내려받을 필요가 없습니다.
+# BrowserContext.route("**/*")에 핸들러를 걸어 정책에 맞는 요청은 abort하고 나머지는 fallback으로 넘깁니다.
+# (fallback이라 먼저 걸어 둔 다른 route 핸들러 - 예: HAR 재생 - 가 있으면 그쪽으로 넘어감)
+#   - "off":    차단 안 함 (route도 걸지 않음)
+#   - "assets": image, font, media
+#   - "lean":   assets + 제3자 도메인 요청 (문서를 연 호스트와 그 하위 도메인이 아닌 곳, 스타일시트 제외)
+# 스타일시트는 제3자 CDN에 있어도 막지 않습니다. visibility="rendered"의 숨김 판별과 viewport 위치 계산이 CSS에 달려 있기 때문입니다.
+# allow 패턴(fnmatch, 호스트 또는 전체 URL 기준)에 맞는 요청은 정책과 상관없이 통과시킵니다.
+# 주의: Playwright는 route를 걸면 브라우저 HTTP 캐시를 끕니다. 같은 스크립트를 페이지마다 다시 받게 되므로
+#       대부분 같은 출처 요청인 사이트라면 "off"가 더 빠를 수 있습니다. 동기 API에서는 요청마다 파이썬 핸들러를 거치고,
+#       그 핸들러는 메인 스레드가 Playwright 호출 안에 있을 때만 처리됩니다.
+#       그래서 기본값(main.BLOCK_RESOURCES)은 "off"이고, 대상 사이트에서 시간을 재 보고 이득일 때만 켭니다.
+BLOCK_POLICIES: Dict[str, frozenset] = {
+    "off": frozenset(),
+    "assets": frozenset({"image", "font", "media"}),
+    "lean": frozenset({"image", "font", "media", "third_party"}),
+}
+
+_NEVER_THIRD_PARTY = ("document", "stylesheet")
+
+
+class ResourceBlocker:
+    """정책 하나와 통계(차단 이유별 개수)를 가진 판별기입니다. 컨텍스트마다 하나씩 씁니다."""
+
+    def __init__(self, policy: str = "assets", allow: Sequence[str] = ()):
+        if policy not in BLOCK_POLICIES:
+            raise ValueError(f"지원하지 않는 차단 정책입니다: {policy} (가능: {tuple(BLOCK_POLICIES)})")
+        self.policy = policy
+        self.allow = tuple(allow)
+        self.blocked: Dict[str, int] = {}
+        self.passed = 0
+        self._block = BLOCK_POLICIES[policy]
+        self._first_party: set = set()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._block)
+
+    def add_first_party(self, url: str) -> None:
+        host = urlsplit(url).hostname
+        if host:
+            self._first_party.add(host)
+
+    def _is_third_party(self, host: str) -> bool:
+        return not any(host == fp or host.endswith("." + fp) for fp in self._first_party)
+
+    def _allowed(self, url: str, host: str) -> bool:
+        return any(fnmatch.fnmatch(host, p) or fnmatch.fnmatch(url, p) for p in self.allow)
+
+    def check(self, url: str, resource_type: str, main_document: bool) -> Optional[str]:
+        """막아야 하면 이유(리소스 종류 또는 "third_party")를, 통과면 None을 돌려주고 통계에 더합니다."""
+        host = urlsplit(url).hostname or ""
+        reason: Optional[str] = None
+        if main_document:
+            # 최상위 문서는 막지 않고, 그 호스트를 자사(first party)로 기억
+            self._first_party.add(host)
+        elif url.startswith(("data:", "blob:")) or self._allowed(url, host):
+            pass
+        elif resource_type in self._block:
+            reason = resource_type
+        elif ("third_party" in self._block and resource_type not in _NEVER_THIRD_PARTY
+              and self._is_third_party(host)):
+            reason = "third_party"
+        if reason is None:
+            self.passed += 1
+        else:
+            self.blocked[reason] = self.blocked.get(reason, 0) + 1
+        return reason
+
+    def stats(self) -> Dict[str, int]:
+        return {"passed": self.passed, **self.blocked}
+
+
+def is_main_document(request: Any) -> bool:
+    """최상위 프레임의 문서 요청인지 (서비스 워커 요청처럼 frame이 없으면 False)"""
+    if request.resource_type != "document":
+        return False
+    try:
+        return request.frame.parent_frame is None
+    except Exception:
+        return False
@@ -0,0 +1,189 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import pyarrow  # 선택 의존성: export_runs(Parquet/Arrow)에서만 필요
+    import pyarrow.feather
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# --- 실행 로그 기록기 ---
+# 이벤트마다 파일을 열고 닫는 대신 실행(run)당 파일 핸들 하나를 열어 두고 버퍼에 쌓았다가,
+# FLUSH_INTERVAL_S가 지났거나 FLUSH_EVERY개가 쌓이면 flush 합니다. (close()에서 마지막 flush)
+# 스텝이 끝나는 이벤트(FLUSH_TYPES)는 바로 flush 하므로, 긴 think() 도중 프로세스가 죽거나 배치가 취소돼도
+# 끝난 스텝까지는 파일에 남습니다.
+# 관찰 요약본도 로그 안에 바로 남깁니다. 같은 요약본은 해시로 한 번만 쓰고 스텝 로그에는 해시만 적습니다.
+#   {"type": "observation", "hash": "3f2a…", "summary": "..."}   ← 처음 본 요약본일 때만
+#   {"type": "step", ..., "observation": "3f2a…", "thought": ..., "action": ...}
+# 수천 개 실행을 분석할 때는 export_runs로 Parquet/Arrow 파일 하나로 모읍니다. (uxagent export)
+
+FLUSH_INTERVAL_S = 2.0
+FLUSH_EVERY = 20
+FLUSH_TYPES = frozenset({"step", "step_error", "run_error", "run_end"})
+BUFFER_BYTES = 1 << 16
+EXPORT_FORMATS = ("parquet", "arrow")
+
+
+def observation_hash(summary: str) -> str:
+    return hashlib.sha1(summary.encode("utf-8")).hexdigest()[:16]
+
+
+class RunRecorder:
+    """실행 하나의 JSONL 로그입니다. 여러 스레드에서 log()를 불러도 줄이 섞이지 않습니다."""
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval_s: float = FLUSH_INTERVAL_S,
+        flush_every: int = FLUSH_EVERY
+    ):
+        self.path = path
+        self.flush_interval_s = flush_interval_s
+        self.flush_every = flush_every
+        self._file = open(path, "a", encoding="utf-8", buffering=BUFFER_BYTES)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._observations: set = set()
+
+    def log(self, data: Dict[str, Any]) -> None:
+        try:
+            line = json.dumps(data, ensure_ascii=False) + "\n"
+            with self._lock:
+                if self._file.closed:
+                    return
+                self._file.write(line)
+                self._pending += 1
+                if (data.get("type") in FLUSH_TYPES
+                        or self._pending >= self.flush_every
+                        or time.monotonic() - self._last_flush >= self.flush_interval_s):
+                    self._flush_locked()
+        except Exception as e:
+            print(f"--- ❌ Logger 에러 ---: {e}")
+
+    def observation(self, summary: str) -> str:
+        """요약본을 (처음 보는 것이면) 로그에 남기고 해시를 돌려줍니다. 스텝 로그의 "observation"에 넣으세요."""
+        digest = observation_hash(summary)
+        if digest not in self._observations:
+            self._observations.add(digest)
+            self.log({"type": "observation", "hash": digest, "summary": summary})
+        return digest
+
+    def _flush_locked(self) -> None:
+        self._file.flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+# --- 컬럼형 내보내기 ---
+# 스텝(step / step_error) 한 줄이 한 행입니다. 요약본은 observation 줄에서 해시로 찾아 붙이며,
+# Parquet의 사전(dictionary) 인코딩 덕분에 같은 요약본이 여러 행에 있어도 파일에는 거의 한 번만 들어갑니다.
+# 해시가 없는 예전 로그는 observation이 빈 값입니다. (observation_file은 실행마다 덮어써지므로 믿을 수 없음)
+_STEP_COLUMNS = [
+    ("run_id", "string"),
+    ("goal", "string"),
+    ("run_result", "string"),
+    ("type", "string"),
+    ("step", "int32"),
+    ("phase", "string"),
+    ("timestamp", "string"),
+    ("result", "string"),
+    ("action_name", "string"),
+    ("action_params", "string"),
+    ("thought", "string"),
+    ("observation_hash", "string"),
+    ("observation", "string"),
+    ("error", "string"),
+    ("settle_ms", "float64"),
+    ("spans", "string"),
+    ("think_metrics", "string"),
+    ("fast_path_rule", "string"),
+]
+
+
+def _read_events(path: str) -> List[Dict[str, Any]]:
+    events: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # 실행 중에 끊긴 마지막 줄 등
+    return events
+
+
+def _dump(value: Any) -> Optional[str]:
+    return json.dumps(value, ensure_ascii=False) if value else None
+
+
+def collect_rows(patterns: List[str]) -> List[Dict[str, Any]]:
+    """로그 파일(또는 glob 패턴)들의 스텝 이벤트를 _STEP_COLUMNS 형태의 행으로 펼칩니다."""
+    rows: List[Dict[str, Any]] = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            events = _read_events(path)
+            observations = {e["hash"]: e["summary"] for e in events if e.get("type") == "observation"}
+            start = next((e for e in events if e.get("type") == "run_start"), {})
+            end = next((e for e in events if e.get("type") == "run_end"), {})
+            run_id = start.get("run_id") or os.path.basename(path)[len("run_"):-len(".jsonl")]
+            for entry in events:
+                if entry.get("type") not in ("step", "step_error"):
+                    continue
+                action = entry.get("action") or {}
+                rows.append({
+                    "run_id": run_id,
+                    "goal": start.get("goal"),
+                    "run_result": end.get("result"),
+                    "type": entry.get("type"),
+                    "step": entry.get("step"),
+                    "phase": entry.get("phase"),
+                    "timestamp": entry.get("timestamp"),
+                    "result": entry.get("result"),
+                    "action_name": action.get("name"),
+                    "action_params": _dump(action.get("params")),
+                    "thought": entry.get("thought"),
+                    "observation_hash": entry.get("observation"),
+                    "observation": observations.get(entry.get("observation") or ""),
+                    "error": entry.get("error") or entry.get("error_message"),
+                    "settle_ms": (entry.get("settle") or {}).get("waited_ms"),
+                    "spans": _dump(entry.get("spans")),
+                    "think_metrics": _dump(entry.get("think_metrics")),
+                    "fast_path_rule": (entry.get("fast_path") or {}).get("rule"),
+                })
+    return rows
+
+
+def export_runs(patterns: List[str], out_path: str, fmt: str = "parquet") -> int:
+    """
+    스텝 행들을 zstd 압축 Parquet 또는 Arrow(Feather v2) 파일 하나로 씁니다. 쓴 행 수를 돌려줍니다.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"지원하지 않는 내보내기 형식입니다: {fmt} (가능: {EXPORT_FORMATS})")
+    if pyarrow is None:
+        raise ValueError("Parquet/Arrow 내보내기에는 'pyarrow' 패키지가 필요합니다. (pip install 'uxagent[export]')")
+
+    schema = pyarrow.schema([(name, getattr(pyarrow, kind)()) for name, kind in _STEP_COLUMNS])
+    table = pyarrow.Table.from_pylist(collect_rows(patterns), schema=schema)
+    if fmt == "parquet":
+        pyarrow.parquet.write_table(table, out_path, compression="zstd")
+    else:
+        pyarrow.feather.write_feather(table, out_path, compression="zstd")
+    return table.num_rows
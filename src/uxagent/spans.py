@@ -0,0 +1,72 @@
+import contextlib
+import time
+from typing import Any, Dict, Iterator, List
+
+# --- 구간(span) 타이밍 ---
+# 스텝 하나를 settle / observe / think / act 같은 구간으로 나누고, 구간 안의 세부 단계는
+# "observe/parse" 처럼 '/'로 이어진 경로로 기록합니다. 같은 경로가 여러 번 열리면 시간을 더합니다.
+#     spans = SpanRecorder()
+#     with spans.span("observe"):
+#         with spans.span("parse"): ...
+#     log["spans"] = spans.take()   # {"observe": 12.3, "observe/parse": 8.1}
+# 기록된 로그는 `uxagent report`(profile_report)로 모아 봅니다.
+
+
+class SpanRecorder:
+    """세션(에이전트 실행) 하나에서만 사용합니다. 스레드 간 공유하지 마세요."""
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self._stack: List[str] = []
+
+    def _path(self, name: str) -> str:
+        return "/".join(self._stack + [name])
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        path = self._path(name)
+        self._stack.append(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            self.add_path(path, (time.perf_counter() - started) * 1000)
+
+    def add(self, name: str, ms: float) -> None:
+        """이미 측정된 시간(ms)을 현재 구간 아래에 기록합니다."""
+        self.add_path(self._path(name), ms)
+
+    def add_path(self, path: str, ms: float) -> None:
+        self.durations[path] = round(self.durations.get(path, 0.0) + ms, 1)
+
+    def take(self) -> Dict[str, float]:
+        """지금까지 기록한 구간을 돌려주고 비웁니다. (스텝 로그를 쓸 때 호출)"""
+        durations, self.durations = self.durations, {}
+        return durations
+
+
+class _NullRecorder(SpanRecorder):
+    """spans 인자를 주지 않았을 때 쓰는 기록하지 않는 recorder"""
+
+    def span(self, name: str) -> Any:
+        return contextlib.nullcontext()
+
+    def add_path(self, path: str, ms: float) -> None:
+        pass
+
+
+NO_SPANS: SpanRecorder = _NullRecorder()
+
+# think() metrics의 호출별 지연을 think 아래 구간으로 옮길 때 쓰는 키
+_THINK_METRIC_SPANS = {
+    "strategist_ms": "strategist",
+    "translator_ms": "translator",
+    "single_ms": "single",
+}
+
+
+def add_think_metrics(spans: SpanRecorder, metrics: Dict[str, Any]) -> None:
+    for key, name in _THINK_METRIC_SPANS.items():
+        if key in metrics:
+            spans.add_path(f"think/{name}", metrics[key])
@@ -0,0 +1,283 @@
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .prompt_builder import estimate_tokens
+
+# --- 요약본 예산(budget) 맞추기 ---
+# observe 요약본(줄마다 "  " * 깊이 + "<태그 ...> 텍스트")을 앞에서부터 자르는 대신 예산 안으로 줄입니다.
+#   1) 같은 모양의 형제(상품 카드 등)가 MIN_REPEAT개 이상 이어지면 처음 SAMPLE_COUNT개만 그대로 두고,
+#      나머지는 각 항목의 첫 줄(하위 텍스트가 모인 줄)과 ax-id 줄만 남긴 뒤 개수를 적습니다.
+#   2) 그래도 넘치면 줄마다 점수(ax-id, 폼 요소, 제목, 목표 키워드 일치, 하위 트리의 실행 가능 요소 밀도)를 매겨
+#      점수가 높은 줄부터 조상 줄과 함께 예산이 찰 때까지 담고, 빠진 구간은 "… (N줄 생략)"으로 표시합니다.
+# 페이지 아래쪽의 주문/결제 폼도 점수로 살아남습니다. 예산 안에 들어오는 요약본은 그대로 돌려줍니다.
+# 맨 앞 알림 블록과 visibility="viewport" 요약본의 마지막 줄(화면 밖 요소 수)은 점수와 상관없이 항상 남깁니다.
+# 예산은 넘지 않는 상한입니다. 생략/반복 안내 줄과 마지막 줄까지 합쳐 넘치면 넘친 만큼 줄여 다시 고르고,
+# 그래도 안 되는 아주 작은 예산(알림 블록만으로 넘치는 경우 등)은 뒤에서부터 줄을 버립니다.
+# bs4/dom 엔진의 요약본 형식이 같으므로 엔진과 상관없이 동작하고, delta 블록([Δ])은 건드리지 않습니다.
+
+MIN_REPEAT = 3
+SAMPLE_COUNT = 1
+# 반복 단위로 보는 형제 묶음의 최대 길이
+MAX_PERIOD = 4
+
+_LINE = re.compile(r"( *)<([\w-]+)")
+_KEYWORD = re.compile(r"[0-9A-Za-z가-힣]{2,}")
+# 목표 문장의 낱말에서 떼어 낼 조사/어미 (긴 것부터)
+_KO_SUFFIXES = ("에서", "으로", "까지", "부터", "하는", "해주세요", "합니다", "을", "를", "이", "가", "은", "는", "의", "에", "로", "와", "과", "도", "만")
+_STOPWORDS = {"당신은", "지금부터", "이곳에서", "여러", "가장", "있는", "끝에", "새로", "나오는", "도달하면"}
+
+# dom_serializer.SERIALIZE_JS가 viewport 모드에서 붙이는 마지막 줄의 시작
+_VIEWPORT_TRAILER = "… (화면 밖 요소 "
+
+_FORM_TAGS = {"input", "textarea", "select", "button", "label", "form"}
+_HEADING_TAGS = {"h1", "h2", "h3", "h4"}
+
+
+def goal_keywords(goal: str) -> List[str]:
+    """목표 문장에서 줄 점수에 쓸 키워드(두 글자 이상, 조사 제거)를 뽑습니다."""
+    keywords: List[str] = []
+    for word in _KEYWORD.findall(goal.lower()):
+        if word in _STOPWORDS:
+            continue
+        for suffix in _KO_SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+                word = word[: -len(suffix)]
+                break
+        if word not in keywords:
+            keywords.append(word)
+    return keywords
+
+
+def fit_summary(
+    summary: str,
+    token_budget: Optional[int] = None,
+    max_chars: Optional[int] = None,
+    goal: str = ""
+) -> str:
+    """
+    요약본을 token_budget(추정 토큰) 또는 max_chars(글자 수) 안으로 줄입니다. 둘 다 None이면 그대로 돌려줍니다.
+    goal은 줄 점수의 키워드 일치에 씁니다.
+    """
+    if token_budget is not None:
+        budget, cost = token_budget, estimate_tokens
+    elif max_chars is not None:
+        budget, cost = max_chars, _char_cost
+    else:
+        return summary
+    if summary.startswith("[Δ]") or cost(summary) <= budget:
+        return summary
+
+    lines = summary.split("\n")
+    prefix, tree = _split_alerts(lines)
+    suffix = tree[-1:] if tree and tree[-1].startswith(_VIEWPORT_TRAILER) else []
+    nodes = _parse_tree(tree[: len(tree) - len(suffix)])
+    collapsed, run_notes = _collapse_repeats(nodes)
+
+    kept = [i for i in range(len(nodes)) if i not in collapsed]
+    scores = _score_lines(nodes, kept, goal_keywords(goal))
+    line_budget = budget - sum(cost(line) for line in prefix + suffix)
+    while True:
+        selected = _select(nodes, kept, scores, line_budget, cost)
+        out = "\n".join(_render(prefix, nodes, collapsed, selected, run_notes, suffix))
+        over = cost(out) - budget
+        if over <= 0:
+            return out
+        if not selected:
+            return _truncate(out, budget, cost)
+        line_budget = min(line_budget, sum(cost(nodes[i]["text"]) for i in selected)) - over
+
+
+def _truncate(text: str, budget: int, cost: Callable[[str], int]) -> str:
+    """줄 단위로 뒤에서부터 버려 budget에 맞춥니다. (첫 줄조차 넘치면 빈 문자열)"""
+    lines = text.split("\n")
+    while lines and cost("\n".join(lines)) > budget:
+        lines.pop()
+    return "\n".join(lines)
+
+
+def _char_cost(text: str) -> int:
+    return len(text) + 1  # 줄바꿈 포함
+
+
+def _split_alerts(lines: List[str]) -> Tuple[List[str], List[str]]:
+    """맨 앞의 알림 블록("[!] CURRENT ALERTS:" ~ "---")은 항상 남깁니다."""
+    if lines and lines[0].startswith("[!]") and "---" in lines:
+        end = lines.index("---") + 1
+        return lines[:end], lines[end:]
+    return [], lines
+
+
+def _parse_tree(lines: List[str]) -> List[Dict]:
+    """들여쓰기로 부모/하위 트리 범위를 복원합니다. (노드: text, indent, tag, aid, parent, end)"""
+    nodes: List[Dict] = []
+    open_stack: List[int] = []
+    for index, text in enumerate(lines):
+        match = _LINE.match(text)
+        indent = len(match.group(1)) if match else len(text) - len(text.lstrip(" "))
+        while open_stack and nodes[open_stack[-1]]["indent"] >= indent:
+            nodes[open_stack.pop()]["end"] = index
+        nodes.append({
+            "text": text,
+            "indent": indent,
+            "tag": match.group(2) if match else "",
+            "aid": " ax-id=" in text,
+            "parent": open_stack[-1] if open_stack else -1,
+            "end": len(lines),
+        })
+        open_stack.append(index)
+    return nodes
+
+
+def _collapse_repeats(nodes: List[Dict]) -> Tuple[set, Dict[int, Tuple[str, List[int]]]]:
+    """
+    같은 모양(태그 + 자식들의 상대 들여쓰기/모양)의 형제 묶음이 이어진 구간을 찾아,
+    SAMPLE_COUNT개 이후 묶음은 각 항목의 첫 줄과 ax-id 줄만 남깁니다.
+    텍스트 없는 래퍼(카드 div 등)는 요약본에 찍히지 않으므로, 카드 하나가 형제 여러 줄(<a>, <p>, <ul> …)로
+    펼쳐져 있어도 MAX_PERIOD개까지의 묶음 단위로 반복을 찾습니다.
+    반환값: (접혀서 빠지는 줄 번호, {구간 마지막 줄 번호: (안내 문구, 구간 항목들의 첫 줄 번호)})
+    """
+    children: Dict[int, List[int]] = {}
+    for index, node in enumerate(nodes):
+        children.setdefault(node["parent"], []).append(index)
+
+    # 자식부터 모양 번호를 매김 (모양이 같으면 같은 번호)
+    shape_ids: Dict[Tuple, int] = {}
+    shape = [0] * len(nodes)
+    for index in range(len(nodes) - 1, -1, -1):
+        node = nodes[index]
+        key = (node["tag"], tuple(
+            (nodes[c]["indent"] - node["indent"], shape[c]) for c in children.get(index, ())
+        ))
+        shape[index] = shape_ids.setdefault(key, len(shape_ids))
+
+    collapsed: set = set()
+    notes: Dict[int, Tuple[str, List[int]]] = {}
+    for siblings in children.values():
+        shapes = [shape[i] for i in siblings]
+        start = 0
+        while start < len(siblings):
+            period, repeats = _repeat_at(shapes, start)
+            run = siblings[start:start + period * repeats]
+            if repeats >= MIN_REPEAT and any(nodes[i]["end"] - i > 1 for i in run[:period]):
+                for item in run[period * SAMPLE_COUNT:]:
+                    collapsed.update(
+                        i for i in range(item + 1, nodes[item]["end"]) if not nodes[i]["aid"]
+                    )
+                first = nodes[run[0]]
+                unit = "".join(f"<{nodes[i]['tag']}>" for i in run[:period])
+                note = (
+                    " " * first["indent"]
+                    + f"… (위와 같은 구조의 {unit} {repeats}개: "
+                    + f"{SAMPLE_COUNT}개 이후는 항목별 첫 줄과 ax-id 줄만 표시)"
+                )
+                notes[nodes[run[-1]]["end"] - 1] = (note, run)
+                start += len(run)
+            else:
+                start += 1
+    return collapsed, notes
+
+
+def _repeat_at(shapes: List[int], start: int) -> Tuple[int, int]:
+    """start부터 같은 묶음(길이 period)이 몇 번 이어지는지. 가장 많은 줄을 덮는 (period, 반복 수)"""
+    best = (1, 1)
+    for period in range(1, MAX_PERIOD + 1):
+        unit = shapes[start:start + period]
+        if len(unit) < period:
+            break
+        repeats = 1
+        while shapes[start + repeats * period:start + (repeats + 1) * period] == unit:
+            repeats += 1
+        if repeats >= MIN_REPEAT and period * repeats > best[0] * best[1]:
+            best = (period, repeats)
+    return best
+
+
+def _score_lines(nodes: List[Dict], kept: List[int], keywords: List[str]) -> Dict[int, float]:
+    # 하위 트리(남은 줄 기준)의 ax-id 밀도
+    lines_below = [0] * len(nodes)
+    aids_below = [0] * len(nodes)
+    for index in reversed(kept):
+        node = nodes[index]
+        lines_below[index] += 1
+        aids_below[index] += node["aid"]
+        if node["parent"] >= 0:
+            lines_below[node["parent"]] += lines_below[index]
+            aids_below[node["parent"]] += aids_below[index]
+
+    scores: Dict[int, float] = {}
+    for index in kept:
+        node = nodes[index]
+        lowered = node["text"].lower()
+        score = 2.0 * aids_below[index] / lines_below[index]
+        if node["aid"]:
+            score += 3.0
+        if node["tag"] in _FORM_TAGS:
+            score += 2.0
+        if node["tag"] in _HEADING_TAGS:
+            score += 1.0
+        score += 1.5 * min(3, sum(1 for k in keywords if k in lowered))
+        scores[index] = score
+    return scores
+
+
+def _select(
+    nodes: List[Dict],
+    kept: List[int],
+    scores: Dict[int, float],
+    budget: int,
+    cost: Callable[[str], int]
+) -> set:
+    """점수가 높은 줄부터, 아직 안 담긴 조상 줄까지 함께 담습니다. (같은 점수면 문서 앞쪽 먼저)"""
+    selected: set = set()
+    used = 0
+    for index in sorted(kept, key=lambda i: (-scores[i], i)):
+        if index in selected:
+            continue
+        chain = []
+        current = index
+        while current >= 0 and current not in selected:
+            chain.append(current)
+            current = nodes[current]["parent"]
+        chain_cost = sum(cost(nodes[i]["text"]) for i in chain)
+        if used + chain_cost <= budget:
+            selected.update(chain)
+            used += chain_cost
+    return selected
+
+
+def _render(
+    prefix: List[str],
+    nodes: List[Dict],
+    collapsed: set,
+    selected: set,
+    run_notes: Dict[int, Tuple[str, List[int]]],
+    suffix: List[str]
+) -> List[str]:
+    out = list(prefix)
+    gap = 0
+    gap_indent = 0
+
+    def flush_gap() -> None:
+        nonlocal gap
+        if gap:
+            out.append(" " * gap_indent + f"… ({gap}줄 생략)")
+            gap = 0
+
+    for index, node in enumerate(nodes):
+        if index in selected:
+            flush_gap()
+            out.append(node["text"])
+        elif index not in collapsed:
+            if not gap:
+                gap_indent = node["indent"]
+            gap += 1
+        if index in run_notes:
+            note, run = run_notes[index]
+            if any(item in selected for item in run):
+                flush_gap()
+                out.append(note)
+    flush_gap()
+    out.extend(suffix)
+    folded = ", 반복 구조는 접음" if collapsed else ""
+    out.append(f"... (요약본 {len(nodes)}줄 중 {len(selected)}줄 표시{folded})")
+    return out
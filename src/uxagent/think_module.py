@@ -1,15 +1,28 @@
-import os
 import json
-from openai import OpenAI
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional
 
-# --- 1. LLM 클라이언트 초기화 ---
-try:
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-except Exception as e:
+from . import llm_cache
+from . import llm_provider
+from .prompt_builder import build_strategist_messages
+
+# --- 1. LLM provider 초기화 ---
+# UXAGENT_LLM_PROVIDER=openai(기본)|mock, 역할별 모델은 UXAGENT_STRATEGIST_MODEL / UXAGENT_TRANSLATOR_MODEL
+# (OpenAI 클라이언트는 첫 호출 때 만들어지므로 API 키 없이도 import할 수 있습니다.)
+provider: llm_provider.LLMProvider = llm_provider.from_env()
+if not provider.ready():
     print(f"--- ⚠️ 경고: OpenAI API 키가 설정되지 않았습니다. THINK 모듈이 작동하지 않습니다. ---")
     print("--- ➡️ 터미널에서 'export OPENAI_API_KEY=your_api_key_here'를 실행하세요. ---")
-    client = None
+
+# LLM 응답 캐시 (UXAGENT_LLM_CACHE=rw 이면 기록+재사용, replay 이면 기록된 응답만 사용)
+cache = llm_cache.from_env()
+
+
+def set_provider(new_provider: llm_provider.LLMProvider) -> None:
+    """think()가 사용할 provider를 바꿉니다. (예: 부하 테스트에서 MockProvider 사용)"""
+    global provider
+    provider = new_provider
+
 
 # --- 2. 시스템 프롬프트 (분리) ---
 
@@ -29,6 +42,7 @@ STRATEGIST_PROMPT = """
     * **(중요)** '배송 정보' 섹션 아래에 '결제 수단' 섹션이 있는지 끝까지 확인하세요. "정보가 없다"고 **절대 성급하게 결론 내리지 마세요.**
 3.  **순차적 계획 (Sequential Planning):**
     * 폼 입력(이름, 연락처, 주소)과 옵션 선택(결제 수단) 등 **페이지의 모든 단계를 빠짐없이** 순서대로 수행해야 합니다.
+    * 지금 관찰에 보이는 입력칸을 여러 개 채워야 한다면, 한 칸씩 나누지 말고 **이번 계획에 순서대로 모두** 적으세요. (한 번에 실행됩니다)
 4.  **자기 수정 (Self-Correction):**
     * **(중요)** 만약 `observe` 요약본 상단에 **`[!] CURRENT ALERTS:`**가 관찰된다면, 그것은 당신의 **이전 행동이 실패했음**을 의미합니다.
     * (예: `<alert> 모든 항목을 입력해주세요` 또는 `<alert> 시스템 오류때문에 어렵습니다`)
@@ -36,6 +50,8 @@ STRATEGIST_PROMPT = """
     * (예: '카드 결제'가 실패했다면, '무통장입금'을 시도하는 등 새로운 계획을 세우세요.)
 5.  **휴리스틱 (Heuristic):**
     * 결제 수단처럼 여러 옵션이 있다면, **가장 위에 있는 옵션**을 먼저 시도하세요.
+6.  **대상 지정 (ax-id):**
+    * 클릭/입력할 요소에 `ax-id=aid-N`이 보이면, 계획에 그 ax-id를 함께 적으세요. (예: "'이름' 입력칸(aid-8)에 '홍길동'을 입력합니다.")
 
 [폼 입력 계획]
 * (이전과 동일) ...
@@ -53,100 +69,281 @@ TRANSLATOR_PROMPT = """
 2.  **[중요] 'fill' 번역 규칙:**
     * 전략가가 "'이름' <label>을 가진 필드..."라고 말하면: `{"name": "fill", "params": {"label": "이름", ...}}`
     * **절대 `label` 텍스트(예: "연락처")를 `placeholder` 키에 넣지 마세요.**
-3.  **절대** 'params' 안에 `ax-id`, `href`, `class` 등 '힌트' 속성을 **키(key)로 사용하지 마세요.**
-4.  `_find_locator`가 이해하는 **7개의 유효한 키**(`data-testid`, `label`, `placeholder`, `role`, `name_text`, `text`, `selector`)만 사용하세요.
+3.  **절대** 'params' 안에 `ax-id`, `href`, `class` 등 '힌트' 속성을 **키(key)로 사용하지 마세요.** (ax-id 값은 오직 `aid` 키로만 전달)
+4.  `_find_locator`가 이해하는 **8개의 유효한 키**(`aid`, `data-testid`, `label`, `placeholder`, `role`, `name_text`, `text`, `selector`)만 사용하세요.
+5.  [전략가의 생각]에 대상의 ax-id(예: aid-8)가 있다면 **반드시 `aid` 키를 우선 사용**하세요.
 [유효한 'params' 키]
+0.  `aid` (예: "aid-8")
 1.  `data-testid`
 2.  `label` (예: "이름", "무통장입금", "카드 간편결제")
 3.  `placeholder`
 4.  `role` + `name_text`
 5.  `text`
 6.  `selector`
+[스크롤]
+-   관찰 마지막 줄에 '화면 밖 요소 … 생략'이 있고 [전략가의 생각]이 화면 밖 내용을 보려 한다면 `scroll` 액션을 생성하세요.
+-   (예: `{"name": "scroll", "params": {"direction": "down"}}`, 특정 요소까지: `{"name": "scroll", "params": {"aid": "aid-8"}}`)
+[여러 액션 묶기 (batch)]
+-   [전략가의 생각]이 **지금 페이지에서** 여러 칸을 차례로 입력/선택하려 한다면, 하나의 `batch` 액션으로 묶으세요.
+-   `{"name": "batch", "params": {"actions": [<action>, <action>, ...]}}` (최대 8개, 순서대로 실행)
+-   안에는 `fill`, `click`, `scroll`, `wait`만 넣습니다. 페이지를 이동시키는 click(예: '결제하기')은 **맨 마지막**에만 두세요.
+-   (예: `{"name": "batch", "params": {"actions": [{"name": "fill", "params": {"aid": "aid-8", "value": "홍길동"}}, {"name": "fill", "params": {"aid": "aid-9", "value": "010-1234-5678"}}]}}`)
 [작업 완료]
 -   [전략가의 생각]이 '목표 달성' 또는 '구매 완료'를 의미한다면, `finish` 액션을 생성하세요.
 [출력]
 -   **다른 말은 절대 하지 말고, 오직 'JSON' 객체만 출력합니다.**
 -   (예: `{"name": "click", "params": {"label": "카드 간편결제"}}`)
 -   (예: `{"name": "fill", "params": {"label": "이름", "value": "홍길동"}}`)
+-   (예: `{"name": "fill", "params": {"aid": "aid-8", "value": "홍길동"}}`)
+"""
+
+# --- 저지연 모드용 프롬프트 ---
+# stream 모드: 전략가가 계획 끝을 표시하면 스트림을 거기서 끊고 바로 번역가를 호출합니다.
+PLAN_END_MARKER = "[계획 끝]"
+STREAM_PLAN_SUFFIX = f"""
+[스트리밍 출력 규칙]
+* 계획 서술이 끝나면 마지막 줄에 `{PLAN_END_MARKER}` 를 쓰고, 그 뒤에는 아무것도 쓰지 마세요.
 """
 
-def think(observation: str, goal: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
+# single 모드: 전략가 + 번역가 역할을 한 번의 호출로 처리 (JSON 출력)
+SINGLE_CALL_PROMPT = f"""
+[단일 호출 모드]
+이번에는 '전략가'와 '행동 번역가'의 역할을 한 번에 수행합니다.
+1. 먼저 위의 원칙대로 다음 행동 계획을 한글 자연어로 서술하고 (thought),
+2. 아래 번역가 규칙에 따라 그 계획을 단 하나의 action JSON으로 번역하세요. (action)
+
+{TRANSLATOR_PROMPT}
+
+[단일 호출 출력 형식]
+-   오직 다음 형태의 JSON 객체만 출력합니다: `{{"thought": "<자연어 계획>", "action": {{"name": ..., "params": {{...}}}}}}`
+"""
+
+THINK_MODES = ("two_call", "stream", "single")
+
+
+def _translator_messages(thought_content: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": TRANSLATOR_PROMPT},
+        {"role": "user", "content": f"[전략가의 생각]\n{thought_content}\n\n[번역된 'action' JSON 출력]"}
+    ]
+
+
+def _parse_action(action_content: str) -> Dict[str, Any]:
+    parsed_action = json.loads(action_content)
+    # 'name'과 'params' 키가 있는지 확인
+    if "name" in parsed_action and "params" in parsed_action:
+        # batch는 안의 액션들도 같은 모양이어야 함 (액션별 상세 검사는 act()에서)
+        if parsed_action["name"] == "batch":
+            actions = parsed_action["params"].get("actions")
+            if not isinstance(actions, list) or not all(isinstance(a, dict) and "name" in a for a in actions):
+                raise ValueError(f"'batch' 액션의 'actions'는 name이 있는 action 목록이어야 합니다: {action_content}")
+        return parsed_action
+    raise ValueError(f"'action' JSON에 'name' 또는 'params' 키가 없습니다: {action_content}")
+
+
+def _complete(
+    role: str,
+    messages: List[Dict[str, str]],
+    metrics: Dict[str, Any],
+    session: Optional[str] = None,
+    **params: Any
+) -> str:
     """
-    관찰(observation)과 목표(goal)를 기반으로 다음 행동(action)을 결정합니다.
-    (내부적으로 2-Call LLM을 사용)
+    역할(role)에 맞는 모델로 provider를 캐시 뒤에서 호출하고 응답 텍스트를 돌려줍니다.
+    캐시 키는 (provider, model, messages, params) 해시이므로 관찰/히스토리가 한 글자라도 다르면 새로 호출합니다.
+    (session은 provider에만 넘기고 캐시 키에는 넣지 않음)
     """
-    if client is None:
-        raise ValueError("OpenAI 클라이언트가 초기화되지 않았습니다. API 키를 확인하세요.")
+    model = llm_provider.ROLE_MODELS[role]
+    key = llm_cache.make_key(provider.name, model, messages, **params)
+    cached = cache.get(key)
+    if cached is not None:
+        metrics["cache_hits"] = metrics.get("cache_hits", 0) + 1
+        return cached
+    content = provider.complete(model, messages, role, session=session, **params)
+    if content:
+        cache.put(key, model, content)
+    return content
+
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
 
-    # --- 🤖 [CALL 1: 전략가] 자연어 '생각' 생성 ---
-    strategist_messages = [
-        {"role": "system", "content": STRATEGIST_PROMPT},
-    ]
-    if history:
-        strategist_messages.append({"role": "user", "content": f"이전 행동 기록 (참고용):\n{json.dumps(history, indent=2, ensure_ascii=False)}"})
-    
-    strategist_prompt = f"""
-    [최종 목표]
-    {goal}
 
-    [현재 관찰 (observe_summary.txt)]
-    {observation}
+def _error_decision(thought: str, e: Exception, metrics: Dict[str, Any]) -> Dict[str, Any]:
+    return {"thought": thought, "action": {"name": "finish", "params": {"reason": f"Error: {e}"}}, "metrics": metrics}
+
+
+def think(
+    observation: str,
+    goal: str,
+    history: List[Dict[str, str]],
+    mode: str = "two_call",
+    session: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    관찰(observation)과 목표(goal)를 기반으로 다음 행동(action)을 결정합니다.
 
-    [당신의 전략 (자연어 출력)]
+    mode:
+      - "two_call": 전략가 -> 번역가 순서로 2번 호출 (기존 방식)
+      - "stream":   전략가 응답을 스트리밍으로 출력하고, 계획 끝 표시가 나오면 바로 번역가 호출
+      - "single":   structured output(JSON) 한 번의 호출로 thought + action을 함께 받음
+    session: 호출한 실행의 run_id (동시 실행에서 provider가 세션별 상태를 나눌 때 씀)
+    반환값의 "metrics"에는 호출별 지연 시간(ms)이 들어 있습니다. (stream 모드는 첫 토큰까지의 시간 포함)
+    LLM 에러는 finish 결정으로 바꾸지만, replay 모드의 ReplayMiss는 그대로 던집니다.
+    (기록이 없는 회귀 실행이 성공(finish)으로 집계되지 않고 think 실패로 남도록)
     """
-    strategist_messages.append({"role": "user", "content": strategist_prompt})
+    if not provider.ready() and not cache.replay:
+        raise ValueError("OpenAI 클라이언트가 초기화되지 않았습니다. API 키를 확인하세요.")
+    if mode not in THINK_MODES:
+        raise ValueError(f"지원하지 않는 think 모드입니다: {mode} (가능: {THINK_MODES})")
+
+    started = time.perf_counter()
+    metrics: Dict[str, Any] = {"mode": mode, "provider": provider.name}
+    suffix = {"stream": STREAM_PLAN_SUFFIX, "single": SINGLE_CALL_PROMPT}.get(mode)
+    strategist_messages, prompt_tokens = build_strategist_messages(
+        STRATEGIST_PROMPT, goal, observation, history, system_suffix=suffix
+    )
+    metrics["prompt_tokens_est"] = prompt_tokens
+
+    if mode == "single":
+        decision = _think_single(strategist_messages, metrics, session)
+        metrics["total_ms"] = _ms(started)
+        return decision
 
+    # --- 🤖 [CALL 1: 전략가] 자연어 '생각' 생성 ---
+    call_started = time.perf_counter()
     try:
-        response_thought = client.chat.completions.create(
-            model="gpt-4o", # 전략가는 고성능 모델 사용
-            messages=strategist_messages,
-            temperature=0.1,
-        )
-        thought_content = response_thought.choices[0].message.content
-        if not thought_content:
-            raise ValueError("전략가 LLM이 빈 'thought'를 반환했습니다.")
-        
-        print(f"💡 LLM Thought: {thought_content}") # main.py 대신 여기서 'thought'를 바로 출력
+        if mode == "stream":
+            thought_content = _stream_strategist(strategist_messages, metrics, call_started, session)
+        else:
+            thought_content = _complete(
+                "strategist", # 전략가는 고성능 모델 사용
+                strategist_messages,
+                metrics,
+                session,
+                temperature=0.1,
+            )
+            if not thought_content:
+                raise ValueError("전략가 LLM이 빈 'thought'를 반환했습니다.")
+            
+            print(f"💡 LLM Thought: {thought_content}") # main.py 대신 여기서 'thought'를 바로 출력
+        metrics["strategist_ms"] = _ms(call_started)
 
+    except llm_cache.ReplayMiss:
+        raise
     except Exception as e:
         print(f"--- ❌ Think 모듈 (Call 1: 전략가) 에러 ---")
         print(f"에러: {e}")
-        return {"thought": f"전략가 LLM 에러: {e}", "action": {"name": "finish", "params": {"reason": f"Error: {e}"}}}
+        metrics["total_ms"] = _ms(started)
+        return _error_decision(f"전략가 LLM 에러: {e}", e, metrics)
 
     # --- 🤖 [CALL 2: 번역가] 'action' JSON 생성 ---
-    translator_messages = [
-        {"role": "system", "content": TRANSLATOR_PROMPT},
-        {"role": "user", "content": f"[전략가의 생각]\n{thought_content}\n\n[번역된 'action' JSON 출력]"}
-    ]
-
+    call_started = time.perf_counter()
     try:
-        response_action = client.chat.completions.create(
-            model="gpt-4o", # 번역가도 정확해야 하므로 gpt-4o (또는 gpt-4o-mini 테스트 가능)
-            messages=translator_messages,
+        action_content = _complete(
+            "translator", # 기본은 gpt-4o (UXAGENT_TRANSLATOR_MODEL=gpt-4o-mini 등으로 테스트 가능)
+            _translator_messages(thought_content),
+            metrics,
+            session,
             response_format={"type": "json_object"}, # JSON 출력 모드
             temperature=0.0,
         )
-        
-        action_content = response_action.choices[0].message.content
         if not action_content:
             raise ValueError("번역가 LLM이 빈 'action'을 반환했습니다.")
 
-        parsed_action = json.loads(action_content)
-        
-        # 'name'과 'params' 키가 있는지 확인
-        if "name" in parsed_action and "params" in parsed_action:
-            # 최종 결과물 조합
-            return {
-                "thought": thought_content,
-                "action": parsed_action
-            }
-        else:
-            raise ValueError(f"'action' JSON에 'name' 또는 'params' 키가 없습니다: {action_content}")
+        parsed_action = _parse_action(action_content)
+        metrics["translator_ms"] = _ms(call_started)
+        metrics["total_ms"] = _ms(started)
+        # 최종 결과물 조합
+        return {
+            "thought": thought_content,
+            "action": parsed_action,
+            "metrics": metrics
+        }
 
+    except llm_cache.ReplayMiss:
+        raise
     except Exception as e:
         print(f"--- ❌ Think 모듈 (Call 2: 번역가) 에러 ---")
         print(f"에러: {e}")
-        return {"thought": thought_content, "action": {"name": "finish", "params": {"reason": f"Error: {e}"}}}
+        metrics["total_ms"] = _ms(started)
+        return _error_decision(thought_content, e, metrics)
+
+
+def _stream_strategist(
+    strategist_messages: List[Dict[str, str]],
+    metrics: Dict[str, Any],
+    call_started: float,
+    session: Optional[str] = None
+) -> str:
+    """
+    전략가 응답을 스트리밍으로 받으면서 바로 출력합니다.
+    PLAN_END_MARKER가 나오면 남은 스트림을 기다리지 않고 끊어서, 번역가가 곧바로 시작할 수 있게 합니다.
+    캐시에 있으면 저장된 계획을 한 번에 출력합니다.
+    """
+    model = llm_provider.ROLE_MODELS["strategist"]
+    key = llm_cache.make_key(provider.name, model, strategist_messages, temperature=0.1, stream=True)
+    cached = cache.get(key)
+    if cached is not None:
+        metrics["cache_hits"] = metrics.get("cache_hits", 0) + 1
+        metrics["strategist_ttft_ms"] = _ms(call_started)
+        print(f"💡 LLM Thought: {cached}")
+        return cached
+
+    deltas = provider.stream(model, strategist_messages, "strategist", session=session, temperature=0.1)
+    parts: List[str] = []
+    print("💡 LLM Thought: ", end="", flush=True)
+    try:
+        for delta in deltas:
+            if "strategist_ttft_ms" not in metrics:
+                metrics["strategist_ttft_ms"] = _ms(call_started)
+            parts.append(delta)
+            print(delta, end="", flush=True)
+            if PLAN_END_MARKER in "".join(parts[-8:]):
+                metrics["stream_cut"] = True
+                break
+    finally:
+        deltas.close()
+        print()
+
+    thought_content = "".join(parts).split(PLAN_END_MARKER)[0].strip()
+    if not thought_content:
+        raise ValueError("전략가 LLM이 빈 'thought'를 반환했습니다.")
+    cache.put(key, model, thought_content)
+    return thought_content
+
+
+def _think_single(
+    strategist_messages: List[Dict[str, str]], metrics: Dict[str, Any], session: Optional[str] = None
+) -> Dict[str, Any]:
+    call_started = time.perf_counter()
+    try:
+        content = _complete(
+            "strategist",
+            strategist_messages,
+            metrics,
+            session,
+            response_format={"type": "json_object"},
+            temperature=0.1,
+        )
+        if not content:
+            raise ValueError("LLM이 빈 응답을 반환했습니다.")
+        parsed = json.loads(content)
+        thought_content = parsed.get("thought") or ""
+        if not thought_content:
+            raise ValueError(f"응답 JSON에 'thought'가 없습니다: {content}")
+        parsed_action = _parse_action(json.dumps(parsed.get("action") or {}, ensure_ascii=False))
+        metrics["single_ms"] = _ms(call_started)
+        print(f"💡 LLM Thought: {thought_content}")
+        return {"thought": thought_content, "action": parsed_action, "metrics": metrics}
+
+    except llm_cache.ReplayMiss:
+        raise
+    except Exception as e:
+        print(f"--- ❌ Think 모듈 (단일 호출) 에러 ---")
+        print(f"에러: {e}")
+        metrics["single_ms"] = _ms(call_started)
+        return _error_decision(f"LLM 에러: {e}", e, metrics)
 
 
 if __name__ == "__main__":
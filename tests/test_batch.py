@@ -0,0 +1,62 @@
+import pytest
+
+from uxagent import browser_module
+
+
+class AlertPage:
+    """act 한 번마다 alerts_after에 적힌 알림 목록([요소 번호, 텍스트])을 돌려주는 가짜 페이지"""
+
+    def __init__(self, before, alerts_after):
+        self.url = "https://example.com/order"
+        self.shown = before
+        self.alerts_after = list(alerts_after)
+
+    def evaluate(self, script, arg=None):
+        return self.shown
+
+
+def _fills(count):
+    return [("fill", {"label": f"칸 {i}", "value": "x"}) for i in range(count)]
+
+
+@pytest.fixture
+def fake_act(monkeypatch):
+    def install(page, fail_at=None):
+        calls = []
+
+        def act(_page, command):
+            calls.append(command)
+            if len(calls) == fail_at:
+                raise ValueError("요소를 찾지 못했습니다")
+            page.shown = page.alerts_after.pop(0)
+        monkeypatch.setattr(browser_module, "act", act)
+        return calls
+    return install
+
+
+def test_alert_still_on_screen_does_not_stop_batch(fake_act):
+    old = [1, "모든 항목을 입력해주세요"]
+    page = AlertPage([old], [[old]] * 3)
+    fake_act(page)
+    report = browser_module._run_batch(page, _fills(3))
+    assert report == {"total": 3, "done": 3}
+
+
+def test_same_text_raised_again_stops_batch(fake_act):
+    text = "모든 항목을 입력해주세요"
+    page = AlertPage([[1, text]], [[[1, text]], [[2, text]], []])
+    fake_act(page)
+    report = browser_module._run_batch(page, _fills(3))
+    assert report["done"] == 2
+    assert report["stopped"] == "alert"
+    assert report["alerts"] == [text]
+
+
+def test_failure_keeps_done_count(fake_act):
+    page = AlertPage([], [[], [], []])
+    fake_act(page, fail_at=3)
+    with pytest.raises(ValueError) as excinfo:
+        browser_module._run_batch(page, _fills(3))
+    assert "앞의 2개는 이미 실행됨" in str(excinfo.value)
+    assert excinfo.value.batch["done"] == 2
+    assert excinfo.value.batch["stopped"] == "error"
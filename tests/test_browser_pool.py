@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from uxagent.browser_pool import BrowserPool
+
+
+class FakeContext:
+    async def close(self):
+        pass
+
+
+class BrokenPool(BrowserPool):
+    """브라우저 없이 컨텍스트 size개로 시작하고, 반납 후 재생성은 항상 실패하는 풀"""
+
+    def __init__(self, size):
+        super().__init__(size=size)
+        self.attempts = 0
+        for _ in range(size):
+            self._idle.put_nowait((0, FakeContext()))
+        self._live = size
+        self._started = True
+
+    async def _new_context(self, browser_index):
+        self.attempts += 1
+        raise RuntimeError("browser crashed")
+
+
+def test_lease_raises_once_every_context_failed():
+    async def run():
+        pool = BrokenPool(size=1)
+        waiter = None
+        async with pool.lease():
+            # 반납을 기다리는 다른 세션
+            waiter = asyncio.ensure_future(pool.lease().__aenter__())
+            await asyncio.sleep(0)
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(waiter, timeout=1)
+        with pytest.raises(RuntimeError):
+            async with pool.lease():
+                pass
+        return pool
+
+    pool = asyncio.run(run())
+    assert pool.attempts == 2  # 한 번 다시 시도한 뒤 포기
+
+
+def test_failed_context_only_shrinks_pool():
+    async def run():
+        pool = BrokenPool(size=2)
+        async with pool.lease():
+            pass
+        async with pool.lease():  # 남은 하나는 계속 빌릴 수 있음
+            pass
+        return pool
+
+    assert asyncio.run(run())._live == 0
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+from importlib import metadata
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def test_module_entry_point_runs(tmp_path):
+    env = {**os.environ, "PYTHONPATH": SRC}
+    result = subprocess.run(
+        [sys.executable, "-m", "uxagent.cli", "--help"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "batch" in result.stdout
+
+
+def test_console_script_resolves(capsys):
+    scripts = [ep for ep in metadata.entry_points(group="console_scripts") if ep.name == "uxagent"]
+    if not scripts:
+        pytest.skip("uxagent가 설치되어 있지 않음 (pip install -e .)")
+    main = scripts[0].load()
+    with pytest.raises(SystemExit) as exc:
+        main(["batch", "--help"])
+    assert exc.value.code == 0
+    assert "--concurrency" in capsys.readouterr().out
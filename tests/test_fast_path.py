@@ -0,0 +1,101 @@
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from uxagent import fast_path
+from uxagent.main import HIGH_LEVEL_GOAL
+
+ROOT = Path(__file__).resolve().parents[1]
+PAGES = sorted(ROOT.glob("observe_*_summary.txt"), key=lambda p: int(re.search(r"\d+", p.name).group()))
+# [필수 정보] 항목 -> 주문 폼의 input id
+FIELD_IDS = {"이름": "name", "연락처": "phone", "주소": "address"}
+
+
+def _page(number: int) -> str:
+    return (ROOT / f"observe_{number}_summary.txt").read_text(encoding="utf-8")
+
+
+def _input_id(observation: str, aid: str) -> str:
+    match = re.search(rf"<input ax-id={aid} id=(\S+)", observation)
+    assert match, f"{aid}는 input이 아닙니다."
+    return match.group(1)
+
+
+def _fills(action):
+    if action["name"] == "batch":
+        return action["params"]["actions"]
+    return [action] if action["name"] == "fill" else []
+
+
+def _history_clicked(label: str):
+    action = {"name": "click", "params": {"label": label}}
+    return [{"role": "system", "content": f"--- 나의 이전 행동 (Step 1) ---\n{json.dumps(action, ensure_ascii=False)}"}]
+
+
+@pytest.mark.parametrize("path", PAGES, ids=lambda p: p.stem)
+def test_recorded_pages_fill_the_matching_inputs(path):
+    observation = path.read_text(encoding="utf-8")
+    decision, info = fast_path.decide(observation, HIGH_LEVEL_GOAL, [])
+    if decision is None:
+        assert info["rule"] is None
+        return
+    required = fast_path.goal_required_info(HIGH_LEVEL_GOAL)
+    values_by_id = {FIELD_IDS[key]: value for key, value in required.items()}
+    for fill in _fills(decision["action"]):
+        input_id = _input_id(observation, fill["params"]["aid"])
+        assert fill["params"]["value"] == values_by_id[input_id]
+
+
+def test_recorded_pages_decisions():
+    rules = {
+        int(re.search(r"\d+", p.name).group()): fast_path.decide(p.read_text(encoding="utf-8"), HIGH_LEVEL_GOAL, [])[1]["rule"]
+        for p in PAGES
+    }
+    assert rules[1] is None and rules[2] is None  # 알림이 떠 있으면 LLM에게
+    assert rules[3] == rules[4] == rules[5] == "fill_required_info"
+    assert rules[11] == "goal_reached"
+
+
+def test_submit_payment_after_choosing_method():
+    observation = _page(6)
+    decision, info = fast_path.decide(observation, HIGH_LEVEL_GOAL, _history_clicked("카드 간편결제"))
+    assert info["rule"] == "submit_payment"
+    assert "data-testid=button-payment" in next(
+        line for line in observation.splitlines() if f"ax-id={decision['action']['params']['aid']}" in line
+    )
+
+
+def test_ambiguous_label_falls_back_to_think():
+    observation = "\n".join([
+        "<h2> 배송 정보",
+        "  <label for=email> 이메일 주소",
+        "  <input ax-id=aid-1 id=email>",
+        "  <label for=address> 배송 주소",
+        "  <input ax-id=aid-2 id=address>",
+    ])
+    decision, info = fast_path.decide(observation, HIGH_LEVEL_GOAL, [])
+    assert decision is None
+    assert info["misses"]["fill_required_info"] == "unambiguous"
+
+
+def test_exact_label_wins_over_containment():
+    observation = "\n".join([
+        "  <label for=email> 이메일 주소",
+        "  <input ax-id=aid-1 id=email>",
+        "  <label for=address> 주소",
+        "  <input ax-id=aid-2 id=address>",
+    ])
+    matched, ambiguous = fast_path._match_required({"주소": "서울"}, fast_path._form_fields(observation))
+    assert not ambiguous
+    assert [field["aid"] for _, _, field in matched] == ["aid-2"]
+
+
+def test_repeated_action_is_not_reissued():
+    observation = _page(5)
+    decision, _ = fast_path.decide(observation, HIGH_LEVEL_GOAL, [])
+    history = [{"role": "system", "content": f"--- 나의 이전 행동 (Step 1) ---\n{json.dumps(decision['action'], ensure_ascii=False)}"}]
+    again, info = fast_path.decide(observation, HIGH_LEVEL_GOAL, history)
+    assert again is None
+    assert info["misses"]["fill_required_info"] == "repeat"
@@ -0,0 +1,41 @@
+import pytest
+
+from uxagent import llm_cache, llm_provider, think_module
+
+
+def test_key_separates_providers(tmp_path):
+    messages = [{"role": "user", "content": "hi"}]
+    cache = llm_cache.LLMCache(str(tmp_path / "cache.sqlite3"), mode="rw")
+    cache.put(llm_cache.make_key("mock", "gpt-4o", messages, temperature=0.1), "gpt-4o", "(mock)")
+    assert cache.get(llm_cache.make_key("openai", "gpt-4o", messages, temperature=0.1)) is None
+    assert cache.get(llm_cache.make_key("mock", "gpt-4o", messages, temperature=0.1)) == "(mock)"
+    cache.close()
+
+
+def test_mock_replies_do_not_replay_as_openai(tmp_path, monkeypatch):
+    cache = llm_cache.LLMCache(str(tmp_path / "cache.sqlite3"), mode="rw")
+    monkeypatch.setattr(think_module, "cache", cache)
+    monkeypatch.setattr(think_module, "provider", llm_provider.MockProvider(latency_s=0))
+    think_module.think("<body>", "목표", [], mode="two_call")
+
+    cache.mode = "replay"
+    monkeypatch.setattr(think_module, "provider", llm_provider.OpenAIProvider(api_key="sk-test"))
+    with pytest.raises(llm_cache.ReplayMiss):
+        think_module.think("<body>", "목표", [], mode="two_call")
+    cache.close()
+
+
+@pytest.mark.parametrize("mode", think_module.THINK_MODES)
+def test_replay_miss_is_not_a_finish(tmp_path, monkeypatch, mode):
+    cache = llm_cache.LLMCache(str(tmp_path / "cache.sqlite3"), mode="replay")
+    monkeypatch.setattr(think_module, "cache", cache)
+    monkeypatch.setattr(think_module, "provider", llm_provider.MockProvider(latency_s=0))
+    with pytest.raises(llm_cache.ReplayMiss):
+        think_module.think("<body>", "목표", [], mode=mode)
+    cache.close()
+
+
+def test_from_env_name_overrides_environment(monkeypatch):
+    monkeypatch.setenv("UXAGENT_LLM_PROVIDER", "mock")
+    assert llm_provider.from_env().name == "mock"
+    assert llm_provider.from_env("openai").name == "openai"
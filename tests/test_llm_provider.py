@@ -0,0 +1,22 @@
+import pytest
+
+from uxagent import llm_provider
+
+SCRIPT = [
+    {"thought": "첫 번째", "action": {"name": "wait", "params": {}}},
+    {"thought": "두 번째", "action": {"name": "wait", "params": {}}},
+    {"thought": "세 번째", "action": {"name": "wait", "params": {}}},
+]
+
+
+def test_base_provider_is_abstract():
+    with pytest.raises(TypeError):
+        llm_provider.LLMProvider()
+
+
+def test_mock_script_position_is_per_session():
+    provider = llm_provider.MockProvider(script=SCRIPT, latency_s=0)
+    seen = {"a": [], "b": []}
+    for session in ["a", "b", "a", "a", "b", "b"]:
+        seen[session].append(provider.complete("gpt-4o", [], "strategist", session=session))
+    assert seen["a"] == seen["b"] == ["첫 번째", "두 번째", "세 번째"]
@@ -0,0 +1,47 @@
+import glob
+import os
+
+import pytest
+
+from uxagent.browser_module import summarize_html
+from uxagent.observe_bench import GOLDEN_MAX_DEPTH, normalize_summary, output_digests, synthetic_page
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+RAW_PAGES = sorted(glob.glob(os.path.join(ROOT, "observe_*_raw.html")))
+
+
+def _parsers():
+    parsers = ["html.parser"]
+    try:
+        import lxml  # noqa: F401  (선택 의존성: uxagent[lxml])
+        parsers.append("lxml")
+    except ImportError:
+        pass
+    return parsers
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("parser", _parsers())
+@pytest.mark.parametrize("raw_path", RAW_PAGES, ids=os.path.basename)
+def test_summary_matches_golden(raw_path, parser):
+    golden_path = raw_path[: -len("_raw.html")] + "_summary.txt"
+    summary, _ = summarize_html(_read(raw_path), GOLDEN_MAX_DEPTH, parser=parser)
+    assert normalize_summary(summary) == normalize_summary(_read(golden_path))
+
+
+def test_synthetic_page_is_deterministic():
+    html_content = synthetic_page(2_000)
+    first, _ = summarize_html(html_content, GOLDEN_MAX_DEPTH)
+    again, _ = summarize_html(html_content, GOLDEN_MAX_DEPTH)
+    assert first == again
+
+
+def test_parsers_agree_on_synthetic_page():
+    pytest.importorskip("lxml")
+    html_content = synthetic_page(2_000)
+    assert output_digests(html_content, GOLDEN_MAX_DEPTH, "html.parser") == \
+        output_digests(html_content, GOLDEN_MAX_DEPTH, "lxml")
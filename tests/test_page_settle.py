@@ -0,0 +1,32 @@
+import time
+
+import pytest
+from playwright.sync_api import Error as PlaywrightError
+
+from uxagent import page_settle
+
+
+class ClosedPage:
+    """evaluate/wait_for_load_state가 바로 실패하는 닫힌 페이지"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def evaluate(self, *args, **kwargs):
+        self.calls += 1
+        raise PlaywrightError("Target page, context or browser has been closed")
+
+    def wait_for_load_state(self, *args, **kwargs):
+        raise PlaywrightError("Target page, context or browser has been closed")
+
+    def is_closed(self):
+        return True
+
+
+def test_closed_page_raises_instead_of_spinning():
+    page = ClosedPage()
+    started = time.perf_counter()
+    with pytest.raises(PlaywrightError):
+        page_settle.wait_for_settle(page, max_ms=2000)
+    assert page.calls == 1
+    assert time.perf_counter() - started < 0.5
@@ -0,0 +1,31 @@
+import json
+
+from uxagent import profile_report
+
+
+def _write_log(path, events):
+    path.write_text("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events), encoding="utf-8")
+
+
+def test_old_log_without_spans_is_estimated_from_timestamps(tmp_path):
+    _write_log(tmp_path / "run_old.jsonl", [
+        {"type": "run_start", "timestamp": "2025-11-13T01:50:51.000000"},
+        {"type": "step", "step": 1, "timestamp": "2025-11-13T01:51:01.000000"},
+        {"type": "step_error", "step": 2, "phase": "observe", "timestamp": "2025-11-13T01:51:03.500000"},
+        {"type": "run_end", "timestamp": "2025-11-13T01:51:04.000000"},
+    ])
+    rows = profile_report.load_spans([str(tmp_path / "run_*.jsonl")])
+    assert rows == [{profile_report.ESTIMATED_SPAN: 10000.0}, {profile_report.ESTIMATED_SPAN: 2500.0}]
+    report = profile_report.format_report(profile_report.summarize(rows), len(rows))
+    assert "예전 로그 2스텝" in report
+
+
+def test_recorded_spans_are_used_as_is(tmp_path):
+    _write_log(tmp_path / "run_new.jsonl", [
+        {"type": "run_start", "timestamp": "2025-11-13T01:50:51.000000"},
+        {"type": "step", "step": 1, "timestamp": "2025-11-13T01:51:01.000000",
+         "spans": {"observe": 120.0, "observe/parse": 80.0, "think": 900.0}},
+    ])
+    rows = profile_report.load_spans([str(tmp_path / "run_*.jsonl")])
+    assert rows == [{"observe": 120.0, "observe/parse": 80.0, "think": 900.0}]
+    assert profile_report.ESTIMATED_SPAN not in profile_report.format_report(profile_report.summarize(rows), 1)
@@ -0,0 +1,23 @@
+import json
+
+from uxagent.run_recorder import RunRecorder
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_step_events_are_flushed_without_close(tmp_path):
+    path = tmp_path / "run.jsonl"
+    recorder = RunRecorder(str(path), flush_interval_s=3600, flush_every=1000)
+    recorder.log({"type": "run_start"})
+    recorder.observation("<body>")
+    assert _lines(path) == []  # 일반 이벤트는 버퍼에 남음
+
+    recorder.log({"type": "step", "step": 1})
+    assert [line["type"] for line in _lines(path)] == ["run_start", "observation", "step"]
+
+    recorder.log({"type": "run_error", "error": "boom"})
+    assert _lines(path)[-1]["type"] == "run_error"
+    recorder.close()
@@ -0,0 +1,16 @@
+import asyncio
+import time
+
+from uxagent.async_main import set_session_executor
+
+
+def test_blocking_calls_do_not_queue_behind_default_executor_size():
+    sessions = 64  # 기본 executor 상한(min(32, CPU + 4))보다 많음
+
+    async def run():
+        set_session_executor(sessions)
+        started = time.perf_counter()
+        await asyncio.gather(*(asyncio.to_thread(time.sleep, 0.2) for _ in range(sessions)))
+        return time.perf_counter() - started
+
+    assert asyncio.run(run()) < 0.35
@@ -0,0 +1,76 @@
+import glob
+import os
+
+import pytest
+
+from uxagent.prompt_builder import estimate_tokens
+from uxagent.summary_budget import fit_summary
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+SUMMARIES = sorted(glob.glob(os.path.join(ROOT, "observe_*_summary.txt")))
+GOAL = "상품을 장바구니에 담고 주문 정보를 입력해 결제하기"
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("path", SUMMARIES, ids=os.path.basename)
+@pytest.mark.parametrize("budget", [30, 100, 200, 500])
+def test_token_budget_is_hard_limit(path, budget):
+    out = fit_summary(_read(path), token_budget=budget, goal=GOAL)
+    assert estimate_tokens(out) <= budget
+
+
+@pytest.mark.parametrize("path", SUMMARIES, ids=os.path.basename)
+@pytest.mark.parametrize("max_chars", [80, 300, 1000])
+def test_char_budget_is_hard_limit(path, max_chars):
+    out = fit_summary(_read(path), max_chars=max_chars, goal=GOAL)
+    assert len(out) <= max_chars
+
+
+def test_summary_within_budget_is_unchanged():
+    summary = _read(SUMMARIES[0])
+    assert fit_summary(summary, max_chars=len(summary) + 10) == summary
+
+
+def _long_shop_page():
+    lines = ["<body>", "  <header>", "    <p> 오늘의 특가! 회원 가입하면 10% 할인"]
+    lines += [f"    <p> 배너 문구 {i} 지금 바로 확인하세요" for i in range(20)]
+    lines.append("  <ul>")
+    for i in range(30):
+        lines += [
+            "    <li>",
+            f"      <a ax-id=aid-{i + 1} href=/product/{i}> 상품 {i}",
+            f"        <p> 상품 {i} 설명: 가볍고 튼튼한 노트북 가방",
+            "        <p> 무료 배송",
+        ]
+    lines += [
+        "  <section>",
+        "    <h2> 결제 수단",
+        "      <label ax-id=aid-100 for=card> 카드 간편결제",
+        "      <input ax-id=aid-101 id=card type=radio>",
+        "      <button ax-id=aid-102 data-testid=button-payment> 결제하기",
+    ]
+    lines.append("… (화면 밖 요소 42개 생략: 위 0, 아래 42, 옆 0 — scroll 액션으로 이동하면 보입니다)")
+    return "\n".join(lines)
+
+
+def test_payment_form_at_bottom_survives_tight_budget():
+    summary = _long_shop_page()
+    out = fit_summary(summary, token_budget=250, goal=GOAL)
+    assert estimate_tokens(out) <= 250
+    for line in ("<h2> 결제 수단", "ax-id=aid-101", "ax-id=aid-102"):
+        assert line in out
+    # 반복 카드와 장식 문구가 먼저 빠짐
+    assert "위와 같은 구조의" in out
+    assert "상품 29 설명" not in out
+    assert "배너 문구 19" not in out
+
+
+def test_viewport_trailer_is_kept():
+    summary = _long_shop_page()
+    out = fit_summary(summary, max_chars=600, goal=GOAL)
+    assert len(out) <= 600
+    assert "… (화면 밖 요소 42개 생략" in out